@@ -21,48 +21,69 @@ async def load_config_early():
         log.error("ERROR: Failed to load configuration. config is None Exiting...")
         exit(1)  # Stop execution if config failed to load
 
-# Run the config load early
-asyncio.run(load_config_early())
 
-# Create bot instance
-intents = discord.Intents.default()
-intents.message_content = False
+# ──────────────────────────
+# Create the Bot
+# ──────────────────────────
+bot = None  # commands.Bot, created by main()
 
-bot = commands.Bot(command_prefix="!", intents=intents) 
+def create_bot() -> commands.Bot:
+    # Create bot instance
+    intents = discord.Intents.default()
+    intents.message_content = False
 
-# Register commands from all .py files in the commands folder
-commands_dir = "./commands"  # Path to the command files
-for filename in os.listdir(commands_dir):
-    if filename.endswith(".py") and not filename.startswith("_"):
-        module_name = filename[:-3]  # Remove .py extension
-        try:
-            # Import the module dynamically
-            module = __import__(f"commands.{module_name}", fromlist=["register_commands"])
-            
-            # Call the `register_commands()` function in the module
-            if hasattr(module, "register_commands"):
-                module.register_commands(bot)
-                log.debug(f"Registered commands from {module_name}")
-            else:
-                log.warning(f"No register() function in {module_name}, skipping.")
-        except Exception as e:
-            log.error(f"Error loading {module_name}: {e}")
+    new_bot = commands.Bot(command_prefix="!", intents=intents) 
+    new_bot.event(on_ready)
+
+    # Register commands from all .py files in the commands folder
+    commands_dir = "./commands"  # Path to the command files
+    for filename in os.listdir(commands_dir):
+        if filename.endswith(".py") and not filename.startswith("_"):
+            module_name = filename[:-3]  # Remove .py extension
+            try:
+                # Import the module dynamically
+                module = __import__(f"commands.{module_name}", fromlist=["register_commands"])
+                
+                # Call the `register_commands()` function in the module
+                if hasattr(module, "register_commands"):
+                    module.register_commands(new_bot)
+                    log.debug(f"Registered commands from {module_name}")
+                else:
+                    log.warning(f"No register() function in {module_name}, skipping.")
+            except Exception as e:
+                log.error(f"Error loading {module_name}: {e}")
+    return new_bot
 
 
 async def start_tasks():
     import tasks.background_tasks as bg_tasks
     import tasks.ops_tasks as ops_tasks
     import tasks.notification_tasks as noti_tasks
+    import utility.chat_buffer as chat_buffer
+    import utility.crash_reports # Registers its crash-reports/ watch
+    import utility.log_index as log_index
+    import utility.daily_players # Registers its join event and log index subscribers
+    import utility.player_sessions # Registers its session event and log index subscribers
+    import utility.log_tailer as log_tailer
+    import utility.log_watcher as log_watcher
+    import utility.chart_renderer as chart_renderer
+    chart_renderer.start() # Import matplotlib in the renderer process before the first chart is requested
     # State gathering tasks
+    await chat_buffer.seed_from_archives() # Recent chat from archived logs, latest.log is read by the tailer
+    log_watcher.start() # Feeds new latest.log lines to the tasks below as they are written
+    log_tailer.request_poll() # Read the current latest.log session
+    log_index.request_index() # Summarize archived logs that have no sidecar yet
     bg_tasks.player_count_logger_task.start() # Start the new CSV logger in the background
-    bg_tasks.update_lag_history.start()
+    bg_tasks.save_lag_series.start()
+    bg_tasks.sample_java_process.start()
     bg_tasks.clear_daily_state.start()
     # Ops tasks
     ops_tasks.update_bot_presence_task.start(bot)
     ops_tasks.backup_task.start()
     ops_tasks.restart_task.start()
     # Notification tasks
-    noti_tasks.notify_player_join.start(bot)     # Player joined
+    noti_tasks.notify_player_join.start(bot)     # Player joined or left
+    noti_tasks.reconcile_online_players.start(bot) # Catch joins and leaves the log missed
     noti_tasks.notify_server_behind.start(bot)   # Server is lagging
     noti_tasks.notify_external_chunks.start(bot) # external chunks might be causing lag
     noti_tasks.notify_generic_errors.start(bot)    # chunks might be broken, player base might be affected
@@ -71,7 +92,6 @@ async def start_tasks():
 # ──────────────────────────
 # Bot Lifecycle
 # ──────────────────────────
-@bot.event
 async def on_ready():
     # Generate state.yaml if it doesn't already exist
     await st.load_state()
@@ -90,4 +110,16 @@ async def on_ready():
     await start_tasks()
     log.info(f"Logged in as {bot.user} (ID: {bot.user.id})")
 
-bot.run(cfg.config.bot.bot_token)
+
+def main():
+    global bot
+    # Run the config load early
+    asyncio.run(load_config_early())
+    bot = create_bot()
+    bot.run(cfg.config.bot.bot_token)
+
+
+# The chart renderer's worker is spawned, which imports this file again as __mp_main__.
+# Everything that starts the bot has to stay behind this guard, or the worker logs in as a second bot.
+if __name__ == "__main__":
+    main()
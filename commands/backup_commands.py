@@ -173,7 +173,7 @@ class BackupCommands(app_commands.Group):
                     # Wait for MC server to boot and notify when it's up or timed out
                     max_wait_time = 300  # 5 minutes
                     wait_time = 0
-                    while await rcon_helpers.get_players() is None and wait_time < max_wait_time:
+                    while await rcon_helpers.get_players(max_age_sec=0) is None and wait_time < max_wait_time:
                         await asyncio.sleep(1)
                         wait_time += 1
 
@@ -1,13 +1,15 @@
+import io
 import os
 import shutil
 import re
 import time
+import datetime
 import subprocess
 
 import discord
 from discord import app_commands
 from discord import ui
-from utility.globals import *
+import utility.globals as globals
 
 import state.state as st
 import config.config as cfg
@@ -15,7 +17,15 @@ from utility.logger import get_logger
 log = get_logger()
 import utility.helper_functions as helpers
 import utility.ops_helpers as ops_helpers
+import utility.rcon_helpers as rcon_helpers
 import utility.server_properties_helper as props_helper
+import utility.file_tail as file_tail
+import utility.crash_reports as crash_reports
+import utility.lag_tiers as lag_tiers
+import utility.metrics as metrics
+import utility.player_stats as player_stats
+import utility.render_cache as render_cache
+import utility.process_stats as process_stats
 
 # ──────────────────────────
 # Slash Commands
@@ -23,42 +33,31 @@ import utility.server_properties_helper as props_helper
 def register_commands(bot):
 
     @bot.tree.command(name="status", description="Show the Minecraft server status")
-    async def slash_status(interaction: discord.Interaction):
+    @app_commands.describe(lag_window="Time window of the lag graph and lag summary.")
+    @app_commands.choices(lag_window=[
+        discord.app_commands.Choice(name="3 hours", value="3h"),
+        discord.app_commands.Choice(name="24 hours", value="24h"),
+        discord.app_commands.Choice(name="7 days", value="7d"),
+        discord.app_commands.Choice(name="30 days", value="30d")
+    ])
+    async def slash_status(interaction: discord.Interaction, lag_window: str = "3h"):
         """
         Slash command that responds with the server status, logs, memory, etc.
         Replicates the old !status command.
         """
-        global ext_chunk_count
         await helpers.log_interaction(interaction)
 
         try:
-            # Gather system/server information
-            ps_output = subprocess.check_output(['ps', '-eo', 'pid,comm,etime']).decode()
-            java_process_line = [line for line in ps_output.split('\n') if 'java' in line][0]
-
-            # Extract the Minecraft server uptime from the `ps` output
-            try:
-                java_process_line = next((line for line in ps_output.splitlines() if 'java' in line), None)
-
-                if java_process_line:
-                    raw_uptime = java_process_line.split()[-1]  # Get the raw uptime, e.g., "03:29:42"
-                    uptime_parts = list(map(int, raw_uptime.split(":")))  # Split into hours, minutes, seconds
-
-                    # Ensure the format aligns with "HH Hours MM Minutes SS Seconds"
-                    formatted_mc_uptime = (
-                        f"{uptime_parts[0]} hours " if len(uptime_parts) == 3 and uptime_parts[0] > 0 else ""
-                    ) + (
-                        f"{uptime_parts[-2]} minutes " if len(uptime_parts) >= 2 else ""
-                    )
-                else:
-                    formatted_mc_uptime = "Unknown"
-
-            except Exception as e:
-                log.error(f"Error parsing Minecraft server uptime: {e}")
+            # Minecraft server uptime from the java process found by the process sampler
+            mc_started_at = process_stats.server_started_at()
+            if mc_started_at is not None:
+                uptime_minutes = int((datetime.datetime.now() - mc_started_at).total_seconds() // 60)
+                formatted_mc_uptime = (
+                    f"{uptime_minutes // 60} hours " if uptime_minutes >= 60 else ""
+                ) + f"{uptime_minutes % 60} minutes"
+            else:
                 formatted_mc_uptime = "Unknown"
 
-
-
             # Extract machine uptime
             machine_uptime_cmd = subprocess.check_output(['uptime', '-p']).decode().strip()  # "up 1 month, 1 week, 14 hours, 8 minutes"
 
@@ -134,39 +133,44 @@ def register_commands(bot):
                 used = "Unknown"
                 available = "Unknown"
 
-            # Crash reports
-            crashes_cmd = (
-                f"head -n 4 {cfg.config.minecraft.crash_reports_dir}/* | grep -E 'Time: ' | awk '{{print $2 \" \" $3}}' | tail -n 10"
-            )
-            crashes_times = subprocess.check_output([crashes_cmd], shell=True).decode() or "No crashes yet! <3"
+            # Java process resource trends since the server started, from the process sampler
+            process_trend = process_stats.trend_text()
+
+            # Crash reports, cached until the log watcher sees crash-reports/ change
+            crashes_times = "\n".join(crash_reports.get_recent_crash_times(10)) or "No crashes yet! <3"
 
-            latest_logs = subprocess.check_output(['tail', '-n', str(5), cfg.config.minecraft.log_file_path]).decode()
+            latest_logs = "".join(await file_tail.async_tail_lines(cfg.config.minecraft.log_file_path, 5))
 
-            # Detect lag occurrences
-            with open(cfg.config.minecraft.log_file_path, 'r') as log_file:
-                log_contents = log_file.read()
-            lag_occurrences = len(re.findall(r'Running \d+ms or \d+ ticks behind', log_contents))
+            # Lag occurrences, ms behind and total missed ticks since the server started, kept up to date by the log session metrics
+            lag = metrics.get(metrics.LAG_MS)
+            total_missed_ticks = metrics.get(metrics.MISSED_TICKS).sum
 
-            # Average ms behind
-            ms_values = [int(match) for match in re.findall(r'Running (\d+)ms or \d+ ticks behind', log_contents)]
-            average_ms = sum(ms_values) / len(ms_values) if ms_values else 0
+            # Lag over the chosen window, read from the lag history tier that covers it
+            lag_summary = lag_tiers.summary(helpers.LAG_GRAPH_WINDOWS[lag_window])
 
-            # Total missed ticks
-            total_missed_ticks = sum(
-                int(match) for match in re.findall(r'Running \d+ms or (\d+) ticks behind', log_contents)
+            # Generic error pattern hits in the log lines read since the bot started, most frequent first
+            error_hits = sorted(
+                ((hits, pattern) for pattern, hits in cfg.generic_error_matcher.hits.items() if hits),
+                reverse=True
             )
+            error_hits_text = "\n".join(f"{hits:>5}  {pattern}" for hits, pattern in error_hits[:5]) or "None"
 
             output = (
-                f"Player Count: `{player_count}`\n"
+                f"Player Count: `{globals.player_count}`\n"
                 f"Minecraft uptime: `{formatted_mc_uptime.strip()}`\n"
                 f"Machine uptime: `{formatted_uptime}`\n"
                 f"Total backup size: `{backup_size} ({available_space} available)`\n"
                 f"Memory usage: `{used} ({available} available, total {total_memory})`\n"
                 f"Recent crashes: ```\n{crashes_times}\n```"
-                f"*'Running behind'* log occurrences: `{lag_occurrences}`\n"
-                f"Average ms of *'Running behind'* logs: `{average_ms:.0f}` ms\n"
+                f"Java process since start: ```\n{process_trend}\n```"
+                f"*'Running behind'* log occurrences: `{lag.count}`\n"
+                f"Average ms of *'Running behind'* logs: `{lag.mean:.0f}` ms (min `{lag.min or 0:.0f}`, max `{lag.max or 0:.0f}`)\n"
                 f"Total missed seconds from *'Running behind'* logs: `{total_missed_ticks * 50 / 1000}`\n"
-                f"*'Saving external chunk'* log occurrences: `{ext_chunk_count}`\n"
+                f"*'Saving external chunk'* log occurrences: `{metrics.get(metrics.OVERSIZED_CHUNKS).count}`\n"
+                f"Lag last {lag_window}: `{lag_summary.sum_ms / 1000:.1f}` sec behind in `{lag_summary.count}` logs (max `{lag_summary.max_ms}` ms, p95 `{lag_summary.p95_ms}` ms)\n"
+                f"Chart cache: `{render_cache.stats_text()}`\n"
+                f"RCON: `{rcon_helpers.breaker_text()}`\n"
+                f"Generic error hits: ```\n{error_hits_text}\n```"
                 f"Latest logs:```\n{latest_logs}```"
             )
 
@@ -183,13 +187,13 @@ def register_commands(bot):
         except Exception as e:
             output = f"An error occurred: {str(e)}"
 
-        helpers.generate_lag_graph()
+        lag_png = await helpers.generate_lag_graph(lag_window)
 
         # Respond to the slash command so everyone can see
         await interaction.response.send_message(
             output, 
             ephemeral=True, 
-            file=discord.File(cfg.config.stats.lag_png, filename=cfg.config.stats.lag_png)
+            file=discord.File(io.BytesIO(lag_png), filename=os.path.basename(cfg.config.stats.lag_png))
         )
 
 
@@ -369,8 +373,7 @@ def register_commands(bot):
             log_file_path = cfg.config.minecraft.debug_log_file_path
 
         try:
-            with open(log_file_path, "r") as log_file:
-                log_lines = log_file.readlines()[-line_count:]  # Read only the last N lines
+            log_lines = await file_tail.async_tail_lines(log_file_path, line_count)  # Read only the last N lines
 
             log_text = "".join(log_lines)  # Convert to a single string
             messages = [log_text[i:i + cfg.config.bot.discord_char_limit] for i in range(0, len(log_text), cfg.config.bot.discord_char_limit)]  # Split into chunks
@@ -472,8 +475,7 @@ def register_commands(bot):
             if self.confirmation.value.strip().upper() == "YES":
                 try:
                     if self.target == "mc_players":
-                        if os.path.exists("_data/stats.csv"):
-                            os.remove("_data/stats.csv")
+                        if player_stats.delete_all():
                             await interaction.response.send_message("✅ Minecraft player data has been deleted.", ephemeral=True)
                         else:
                             await interaction.response.send_message("⚠️ No Minecraft player data found.", ephemeral=True)
@@ -481,8 +483,7 @@ def register_commands(bot):
                         st.clear_state()
                         await interaction.response.send_message("✅ Discord user data has been deleted.", ephemeral=True)
                     elif self.target == "both":
-                        if os.path.exists("_data/stats.csv"):
-                            os.remove("_data/stats.csv")
+                        player_stats.delete_all()
                         st.clear_state()
                         await interaction.response.send_message("✅ Both Minecraft player data and Discord user data have been deleted.", ephemeral=True)
                     else:
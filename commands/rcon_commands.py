@@ -1,7 +1,9 @@
+import io
 import os
 import re
 import sys
-import subprocess
+import datetime
+from typing import Optional
 
 import discord
 from discord import app_commands
@@ -12,6 +14,10 @@ from utility.logger import get_logger
 log = get_logger()
 import utility.helper_functions as helpers
 import utility.rcon_helpers as rcon_helpers
+import utility.daily_players as daily_players
+import utility.player_stats as player_stats
+import utility.player_sessions as player_sessions
+import utility.log_timestamp as log_timestamp
 
 
 # Create a command group for /rcon
@@ -21,7 +27,7 @@ class RconCommands(app_commands.Group):
         self.bot = bot
 
     @app_commands.command(name="players", description="Show who is online, who has joined today and how many joined yesterday.")
-    @app_commands.describe(last_days="Optional number of days to show in the player count graph.")
+    @app_commands.describe(last_days="Optional number of days to show in the player count graph and unique player count.")
     async def slash_players(self, interaction: discord.Interaction, last_days: int = 30):
         """
         1) Counts how many players joined yesterday, how many are online now, and how many joined today.
@@ -33,35 +39,20 @@ class RconCommands(app_commands.Group):
         await helpers.log_interaction(interaction)
         await interaction.response.defer(ephemeral=False, thinking=True)
 
-        # ─── 1) PLAYERS WHO JOINED YESTERDAY ───
-        try:
-            # Similar approach to the "players who joined today," but for "yesterday" logs
-            # For instance, date -d '1 day ago' for the day:
-            # (zcat logs/2025-01-18*.log.gz && cat logs/latest.log) ...
-            players_yesterday_cmd = (
-                f"(zcat {cfg.config.minecraft.logs_dir}/$(date +'%Y-%m'-%d -d '1 day ago')*.log.gz 2>/dev/null || true) "
-                f"| grep joined | awk '{{print $6}}' | sort -u"
-            )
-            players_yesterday = subprocess.check_output(
-                [players_yesterday_cmd], shell=True
-            ).decode(errors="ignore").strip()
-            if players_yesterday:
-                players_yesterday_count = players_yesterday.count("\n") + 1
-            else:
-                players_yesterday_count = 0
-        except Exception as e:
-            log.error(f"Error retrieving players who joined yesterday: {e}")
-            players_yesterday_count = 0
+        # ─── 1) PLAYERS WHO JOINED TODAY, YESTERDAY AND IN THE LAST N DAYS ───
+        # Kept per day from join events and backfilled from archived logs, no log searching needed
+        today = datetime.date.today()
+        players_today = sorted(daily_players.players_on(today))
+        players_yesterday_count = len(daily_players.players_on(today - datetime.timedelta(days=1)))
+        players_last_days_count = len(daily_players.players_last_days(last_days))
+        today_rollups = player_stats.daily_rollups(1)
 
         # ─── 2) CURRENT ONLINE PLAYERS VIA RCON ───
-        await rcon_helpers.ensure_rcon_connection()
-        if rcon_helpers.mcr_connection is None:
-            # We'll still try to show the other info even if RCON is down
-            currently_online = []
-            player_count_now = 0
-        else:
-            currently_online = await rcon_helpers.get_players()
-            player_count_now = len(currently_online)
+        # The shared snapshot is at most player_list_ttl_sec old, so this doesn't add a `list` of its own
+        snapshot = await rcon_helpers.get_player_snapshot()
+        # We'll still try to show the other info even if RCON is down
+        currently_online = snapshot.players or []
+        player_count_now = len(currently_online)
 
         # ─── 4) BUILD TEXT OUTPUT ───
 
@@ -71,18 +62,21 @@ class RconCommands(app_commands.Group):
         # Players Online Now: 2
         # Players Joined Today: 5
         top_text = (
-            f"Players Yesterday: `{players_yesterday_count}`"
+            f"Players Yesterday: `{players_yesterday_count}`\n"
+            f"Unique Players Last {last_days} Days: `{players_last_days_count}`"
         )
+        if today_rollups:
+            top_text += f"\nPeak Today: `{today_rollups[-1].max_players}` (avg `{today_rollups[-1].mean_players:.1f}`)"
 
         # Code block #1: Players Joined Today
-        if len(st.state.mc_players_today) == 0:
+        if len(players_today) == 0:
             joined_today_lines = "no players today"
         else:
-            joined_today_lines = "\n".join(st.state.mc_players_today)
+            joined_today_lines = "\n".join(players_today)
 
         code_block_today = (
             "```text\n"
-            f"■■■■ Players Joined Today ({len(st.state.mc_players_today)}) ■■■■\n"
+            f"■■■■ Players Joined Today ({len(players_today)}) ■■■■\n"
             f"{joined_today_lines}\n"
             "```"
         )
@@ -102,7 +96,7 @@ class RconCommands(app_commands.Group):
 
         # Update / generate graph PNG
         helpers.update_csv_player_count()
-        helpers.generate_player_count_graph(last_days)
+        player_count_png = await helpers.generate_player_count_graph(last_days)
 
         # Final response
         reply = f"{top_text}\n{code_block_today}{code_block_online}"
@@ -111,8 +105,52 @@ class RconCommands(app_commands.Group):
         await interaction.followup.send(
             content=reply,
             ephemeral=False,
-            file=discord.File(cfg.config.stats.player_count_png, filename=cfg.config.stats.player_count_png)
+            file=discord.File(io.BytesIO(player_count_png), filename=os.path.basename(cfg.config.stats.player_count_png))
+        )
+
+
+
+    @app_commands.command(name="playtime", description="Show playtime per player, peak concurrency and session lengths.")
+    @app_commands.describe(player="Optional player to show, everyone if empty.", last_days="Number of days to look back.")
+    async def slash_playtime(self, interaction: discord.Interaction, player: Optional[str] = None, last_days: int = 7):
+        """
+        Answers from the player session index (join/leave/restart events of archived logs and latest.log):
+        playtime per player, the most players online at once and how long sessions last.
+        """
+        await helpers.log_interaction(interaction)
+
+        end_ms = log_timestamp.now_ms()
+        start_ms = end_ms - last_days * 24 * 3600 * 1000
+        totals = player_sessions.playtime_ms(start_ms, end_ms, player)
+        lengths = player_sessions.session_lengths_ms(start_ms, end_ms, player)
+
+        if not totals:
+            who = f"`{player}`" if player else "anyone"
+            await interaction.response.send_message(f"No sessions of {who} in the last {last_days} days.", ephemeral=True)
+            return
+
+        ranking = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:15]
+        ranking_lines = "\n".join(f"{player_sessions.format_duration_ms(ms):>9}  {name}" for name, ms in ranking)
+        top_text = f"Playtime last {last_days} days: `{player_sessions.format_duration_ms(sum(totals.values()))}`"
+        if player is None:
+            peak, peak_ms = player_sessions.peak_concurrency(start_ms, end_ms)
+            if peak_ms is not None:
+                top_text += f"\nPeak online: `{peak}` players ({log_timestamp.ms_to_datetime(peak_ms):%d.%m %H:%M})"
+        if lengths:
+            top_text += (
+                f"\nSessions: `{len(lengths)}`, median `{player_sessions.format_duration_ms(player_sessions.percentile(lengths, 0.5))}`, "
+                f"p90 `{player_sessions.format_duration_ms(player_sessions.percentile(lengths, 0.9))}`, "
+                f"longest `{player_sessions.format_duration_ms(lengths[-1])}`"
+            )
+
+        reply = (
+            f"{top_text}\n"
+            "```text\n"
+            f"■■■■ Playtime ({len(totals)} players) ■■■■\n"
+            f"{ranking_lines}\n"
+            "```"
         )
+        await interaction.response.send_message(reply, ephemeral=False)
 
 
 
@@ -149,7 +187,7 @@ class RconCommands(app_commands.Group):
         try:
             # Format text for Minecraft
             say_string = f"§7§o{interaction.user.name}: {message}§r"
-            rcon_helpers.mcr_connection.command(f"say {say_string}")
+            await rcon_helpers.mcr_connection.command(f"say {say_string}")
             await interaction.response.send_message(
                 f"Sent to server chat:\n`{interaction.user.name}: {message}`",
                 ephemeral=False
@@ -210,7 +248,7 @@ class RconCommands(app_commands.Group):
                 command = f"weather {weather_type}"
 
             # Execute the command
-            response = rcon_helpers.mcr_connection.command(command)
+            response = await rcon_helpers.mcr_connection.command(command)
 
             # Format the duration into human-readable units
             if duration_minutes:
@@ -271,65 +309,58 @@ class RconCommands(app_commands.Group):
             return  # Stop execution if the user is not authorized
   
 
-        await rcon_helpers.ensure_rcon_connection()
-        if rcon_helpers.mcr_connection is None:
-            await interaction.followup.send("Could not connect to RCON. Try again later.", ephemeral=True)
+        entity_types = {
+            "items": ["minecraft:item"],
+            "vanilla_animals": [
+                "minecraft:cow", "minecraft:sheep", "minecraft:chicken", "minecraft:pig",
+                "minecraft:horse", "minecraft:donkey", "minecraft:llama", "minecraft:mooshroom",
+                "minecraft:rabbit", "minecraft:cat", "minecraft:wolf", "minecraft:parrot",
+                "minecraft:fox", "minecraft:frog", "minecraft:turtle", "minecraft:snow_golem"
+            ],
+            "vanilla_monsters": [
+                "minecraft:zombie", "minecraft:skeleton", "minecraft:creeper", "minecraft:spider",
+                "minecraft:enderman", "minecraft:witch", "minecraft:slime", "minecraft:ghast",
+                "minecraft:blaze", "minecraft:phantom", "minecraft:silverfish", "minecraft:drowned",
+                "minecraft:ravager", "minecraft:vindicator", "minecraft:illusioner", "minecraft:evoker",
+                "minecraft:husk", "minecraft:warden", "minecraft:zombified_piglin", "minecraft:shulker",
+                "minecraft:magma_cube", "minecraft:hoglin", "minecraft:stray", "minecraft:pillager",
+                "minecraft:guardian", "minecraft:elder_guardian", "minecraft:piglin", "minecraft:piglin_brute"
+            ],
+            "vanilla_villagers": [
+                "minecraft:villager", "minecraft:wandering_trader",
+                "minecraft:iron_golem", "minecraft:snow_golem"
+            ],
+        }.get(target)
+        if entity_types is None:
+            await interaction.followup.send("Invalid target. Please choose a valid option.", ephemeral=True)
             return
 
         try:
-            response_lines = []
-            if target == "items":
-                response = rcon_helpers.mcr_connection.command("kill @e[type=minecraft:item]")
-                response_lines.append(f"`{response.strip()}` - Cleared all dropped items.")
-
-            elif target == "vanilla_animals":
-                animal_types = [
-                    "minecraft:cow", "minecraft:sheep", "minecraft:chicken", "minecraft:pig",
-                    "minecraft:horse", "minecraft:donkey", "minecraft:llama", "minecraft:mooshroom",
-                    "minecraft:rabbit", "minecraft:cat", "minecraft:wolf", "minecraft:parrot",
-                    "minecraft:fox", "minecraft:frog", "minecraft:turtle", "minecraft:snow_golem"
-                ]
-                for entity in animal_types:
-                    response = rcon_helpers.mcr_connection.command(f"kill @e[type={entity}]")
-                    if not response.startswith("No entity was found"):
-                        response_lines.append(f"{response.strip()} - Cleared all {entity.split(':')[1]}s.")
-
-            elif target == "vanilla_monsters":
-                monster_types = [
-                    "minecraft:zombie", "minecraft:skeleton", "minecraft:creeper", "minecraft:spider",
-                    "minecraft:enderman", "minecraft:witch", "minecraft:slime", "minecraft:ghast",
-                    "minecraft:blaze", "minecraft:phantom", "minecraft:silverfish", "minecraft:drowned",
-                    "minecraft:ravager", "minecraft:vindicator", "minecraft:illusioner", "minecraft:evoker",
-                    "minecraft:husk", "minecraft:warden", "minecraft:zombified_piglin", "minecraft:shulker",
-                    "minecraft:magma_cube", "minecraft:hoglin", "minecraft:stray", "minecraft:pillager",
-                    "minecraft:guardian", "minecraft:elder_guardian", "minecraft:piglin", "minecraft:piglin_brute"
-                ]
-                for entity in monster_types:
-                    response = rcon_helpers.mcr_connection.command(f"kill @e[type={entity}]")
-                    if not response.startswith("No entity was found"):
-                        response_lines.append(f"{response.strip()} - Cleared all {entity.split(':')[1]}s.")
-
-            elif target == "vanilla_villagers":
-                villager_types = [
-                    "minecraft:villager", "minecraft:wandering_trader",
-                    "minecraft:iron_golem", "minecraft:snow_golem"
-                ]
-                for entity in villager_types:
-                    response = rcon_helpers.mcr_connection.command(f"kill @e[type={entity}]")
-                    if not response.startswith("No entity was found"):
-                        response_lines.append(f"{response.strip()} - Cleared all {entity.split(':')[1]}s.")
+            # The kills run one after another, the sweep gives up after minecraft.rcon.batch_deadline_sec
+            batch = await rcon_helpers.run_batch(
+                [f"kill @e[type={entity}]" for entity in entity_types],
+                deadline_sec=cfg.config.minecraft.rcon.batch_deadline_sec
+            )
+        except ConnectionError:
+            await interaction.followup.send("Could not connect to RCON. Try again later.", ephemeral=True)
+            return
 
-            else:
-                await interaction.followup.send("Invalid target. Please choose a valid option.", ephemeral=True)
-                return
+        response_lines = []
+        for entity, response in zip(entity_types[:batch.sent], batch.responses):
+            if response is None:
+                response_lines.append(f"No response for {entity.split(':')[1]}s.")
+            elif target == "items":
+                response_lines.append(f"`{response.strip()}` - Cleared all dropped items.")
+            elif not response.startswith("No entity was found"):
+                response_lines.append(f"{response.strip()} - Cleared all {entity.split(':')[1]}s.")
 
-            # Combine all responses into a single message
-            final_response = "\n".join(response_lines) if response_lines else "No entities were found to kill."
-            await interaction.followup.send(final_response, ephemeral=False)
+        if batch.not_run:
+            skipped = ", ".join(entity.split(':')[1] for entity in entity_types[batch.sent:])
+            response_lines.append(f"Not run, the server stopped answering or took too long: {skipped}.")
 
-        except Exception as e:
-            await rcon_helpers.close_rcon_connection()
-            await interaction.followup.send(f"Failed to execute kill command: {e}", ephemeral=True)
+        # Combine all responses into a single message
+        final_response = "\n".join(response_lines) if response_lines else "No entities were found to kill."
+        await interaction.followup.send(final_response, ephemeral=False)
 
 
 
@@ -349,7 +380,7 @@ class RconCommands(app_commands.Group):
             return
 
         try:
-            response = rcon_helpers.mcr_connection.command(rcon_command)
+            response = await rcon_helpers.mcr_connection.command(rcon_command)
             reply = f"Command executed: `{rcon_command}`"
             if response.strip():
                 reply += f"\nResponse: ```{response}```"
@@ -4,9 +4,11 @@ import yaml
 from config.root_config import *
 from utility.logger import get_logger
 log = get_logger()
+from utility.pattern_matcher import MultiPatternMatcher
 
 CONFIG_FILE = "config.yaml"
 config = None
+generic_error_matcher = MultiPatternMatcher([])  # Compiled notifications.generic_error_patterns
 
 # ──────────────────────────
 # Configuration Helper Functions
@@ -21,6 +23,7 @@ async def load_config() -> bool:
     if not os.path.exists(CONFIG_FILE):
         log.error(f"Config file {CONFIG_FILE} not found. Using defaults.")
         config = Config()
+        update_generic_error_matcher()
         return True
     try:
         log.debug("Loading config...")
@@ -43,6 +46,8 @@ async def load_config() -> bool:
                 backup=BackupConfig(**data["minecraft"].get("backup", {})),
                 modpack_url=data["minecraft"].get("modpack_url", ""),
                 restart=RestartConfig(**data["minecraft"].get("restart", {})),
+                log_tail=LogTailConfig(**data["minecraft"].get("log_tail", {})),
+                rcon=RconConfig(**data["minecraft"].get("rcon", {})),
             ),
             curseforge=CurseForge(**data["curseforge"]),
             stats=StatsConfig(**data["stats"]),
@@ -51,10 +56,23 @@ async def load_config() -> bool:
     except Exception as e:
         config = Config()
         log.error(f"Failed to load config: {e}")
+        update_generic_error_matcher()
         return False
+    update_generic_error_matcher()
     log.info("Finished loading config")
     return True
 
+def update_generic_error_matcher():
+    """
+    Compiles notifications.generic_error_patterns into generic_error_matcher.
+    The config is reloaded often, so this only recompiles (and resets the hit counters) when the patterns changed.
+    """
+    global generic_error_matcher
+    patterns = [pattern for pattern in config.notifications.generic_error_patterns.keys() if pattern]
+    if patterns != generic_error_matcher.patterns:
+        generic_error_matcher = MultiPatternMatcher(patterns)
+        log.debug(f"Compiled {len(generic_error_matcher.patterns)} generic error patterns.")
+
 def save_config():
     global config
     """
@@ -72,6 +90,8 @@ def save_config():
                     **config.minecraft.__dict__,
                     "backup": config.minecraft.backup.__dict__,
                     "restart": config.minecraft.restart.__dict__,
+                    "log_tail": config.minecraft.log_tail.__dict__,
+                    "rcon": config.minecraft.rcon.__dict__,
                 },
                 "curseforge": config.curseforge.__dict__,
                 "stats": config.stats.__dict__,
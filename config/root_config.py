@@ -9,6 +9,7 @@ class ChatConfig:
     update_interval_sec: int = 5
     duration_min: int = 900
     lines: int = 10
+    history_lines: int = 100
 
 @dataclass
 class PresenceConfig:
@@ -33,6 +34,19 @@ class BackupConfig:
     delete_frequent_after_hours: int = 24
     delete_sparse_after_days: int = 120
 
+@dataclass
+class LogTailConfig:
+    poll_interval_sec: int = 1
+
+@dataclass
+class RconConfig:
+    host: str = "localhost"
+    timeout_sec: float = 5.0
+    player_list_ttl_sec: float = 2.0
+    batch_deadline_sec: float = 15.0
+    backoff_min_sec: float = 1.0
+    backoff_max_sec: float = 60.0
+
 @dataclass
 class MinecraftConfig:
     service_name: Optional[str] = None  # Private field, prevents direct access
@@ -41,6 +55,8 @@ class MinecraftConfig:
     backup: BackupConfig = field(default_factory=BackupConfig)
     modpack_url: str = ""
     restart: RestartConfig = field(default_factory=RestartConfig)
+    log_tail: LogTailConfig = field(default_factory=LogTailConfig)
+    rcon: RconConfig = field(default_factory=RconConfig)
     
     def __post_init__(self):
         """ Ensure service_name falls back to the server_path name if empty or None and ends with .service. """
@@ -76,8 +92,17 @@ class CurseForge:
 class StatsConfig:
     csv_interval_min: int = 5
     csv_path: str = "_data/stats.csv"
+    player_count_store_path: str = "_data/player_counts.bin"
+    player_count_rollups_dir: str = "_data/player_count_rollups"
     player_count_png: str = "_data/stat_players.png"
     lag_png: str = "_data/stat_counts.png"
+    log_index_dir: str = "_data/log_index"
+    daily_players_path: str = "_data/daily_players.json"
+    sessions_path: str = "_data/sessions.json"
+    lag_series_path: str = "_data/lag_series.bin"
+    lag_tiers_path: str = "_data/lag_tiers.bin"
+    process_stats_path: str = "_data/process_stats.bin"
+    process_sample_interval_sec: int = 30
 
 @dataclass
 class NotificationConfig:
@@ -86,6 +111,7 @@ class NotificationConfig:
     check_last_min_advancements: int = 1
     check_last_min_errors: int = 1 
     check_last_min_joins: int = 1
+    leaves_enabled: bool = False
     threshold_sec: int = 10
     lag_window_min: int = 10
     notification_cooldown_min: int = 30
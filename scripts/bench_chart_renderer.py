@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import random
+import asyncio
+import datetime
+import argparse
+import tempfile
+import statistics
+
+# Run from anywhere, import the bot's modules from the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import utility.chart_renderer as chart_renderer
+
+# ─────────────────────────────────────────────────────────────────────────
+# Benchmark: chart rendering
+# ─────────────────────────────────────────────────────────────────────────
+# Measures the latency a command sees for the player count and lag charts:
+#   cold: first chart of a fresh renderer process (spawn + matplotlib import + first figure)
+#   warm: following charts, matplotlib loaded and the figures reused
+# The event loop stays free the whole time, a ticker task counts how late it gets to run.
+
+def make_player_data(days: int):
+    today = datetime.date.today()
+    rng = random.Random(1)
+    dates = [(today - datetime.timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range(days, -1, -1)]
+    return dates, [rng.randrange(12) for _ in dates]
+
+
+def make_lag_data(bars: int):
+    rng = random.Random(2)
+    lag_data = [rng.choice([0, 0, 0, rng.uniform(2, 40)]) for _ in range(bars)]
+    p95_data = [value * 0.8 for value in lag_data]
+    tick_step = max(1, bars // 8)
+    tick_positions = list(range(0, bars - tick_step // 2, tick_step)) + [bars - 1]
+    tick_labels = [f"{(bars - i) // 60 + 1}h ago" for i in tick_positions[:-1]] + ["Now"]
+    return lag_data, p95_data, tick_positions, tick_labels
+
+
+async def ticker(stop: asyncio.Event, delays: list):
+    """Sleeps 10 ms at a time and records how late it wakes up, i.e. how long the loop was blocked"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(0.01)
+        delays.append(loop.time() - start - 0.01)
+
+
+async def run(args, directory: str):
+    dates, max_counts = make_player_data(args.days)
+    lag_args = make_lag_data(args.bars)
+    player_png = os.path.join(directory, "players.png")
+    lag_png = os.path.join(directory, "lag.png")
+
+    stop = asyncio.Event()
+    delays = []
+    ticker_task = asyncio.create_task(ticker(stop, delays))
+
+    start = time.perf_counter()
+    await chart_renderer.render(chart_renderer.render_player_count, dates, max_counts, player_png)
+    cold = time.perf_counter() - start
+
+    warm_players, warm_lag = [], []
+    for _ in range(args.renders):
+        start = time.perf_counter()
+        await chart_renderer.render(chart_renderer.render_player_count, dates, max_counts, player_png)
+        warm_players.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        await chart_renderer.render(chart_renderer.render_lag, *lag_args, "minute", "3h", lag_png)
+        warm_lag.append(time.perf_counter() - start)
+
+    stop.set()
+    await ticker_task
+    chart_renderer.shutdown()
+
+    print(f"{args.days} day player chart, {args.bars} bar lag chart, {args.renders} warm renders each")
+    print(f"{'cold (spawn + import + render)':<34} {cold * 1000:8.1f} ms")
+    print(f"{'warm player count chart (median)':<34} {statistics.median(warm_players) * 1000:8.1f} ms")
+    print(f"{'warm lag chart (median)':<34} {statistics.median(warm_lag) * 1000:8.1f} ms")
+    print(f"{'event loop max blocked':<34} {max(delays, default=0) * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold and warm chart rendering in the renderer process.")
+    parser.add_argument("--renders", type=int, default=20, help="Number of warm renders per chart.")
+    parser.add_argument("--days", type=int, default=30, help="Days in the player count chart.")
+    parser.add_argument("--bars", type=int, default=180, help="Bars in the lag chart.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(args, directory))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+# Run from anywhere, import the bot's modules from the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utility.pattern_matcher import MultiPatternMatcher
+
+# ─────────────────────────────────────────────────────────────────────────
+# Benchmark: generic_error_patterns matching vs number of patterns
+# ─────────────────────────────────────────────────────────────────────────
+# Compares the old "a|b|c" alternation, the trie regex alone and the MultiPatternMatcher (anchor
+# word prefilter in front of the trie regex) as the number of configured patterns grows.
+# One of the four synthetic lines is an error line, which always gets past the prefilter.
+
+BASE_PATTERNS = [
+    "Failed to store chunk",
+    "Forcing regeneration of chunk",
+    "Rebuilding corrupted chunk",
+    "Missing chunk",
+    "stream is truncated: expected",
+]
+WORDS = (
+    "entity tick block render save load region packet player world dimension recipe tag "
+    "registry biome structure feature Could not Unable Exception Caused NullPointer overflow invalid"
+).split()
+LINES = [
+    "[19Jan2025 20:04:21.001] [Server thread/INFO] [com.example.somemod.Core/]: Loaded 214 recipes for machine grinder",
+    "[19Jan2025 20:04:21.002] [Worker-Main-3/DEBUG] [net.minecraft.server.packs.resources.ReloadableResourceManager/]: Reloading ResourceManager: vanilla, mod_resources",
+    "[19Jan2025 20:04:21.003] [Server thread/INFO] [FTB Quests/]: Saved quest data for 4 teams",
+    "[19Jan2025 20:04:20.123] [Server thread/ERROR] [net.minecraft.world.level.chunk.storage.IOWorker/]: Failed to store chunk [3, 7]",
+]
+
+
+def make_patterns(count: int):
+    rng = random.Random(3)
+    patterns = BASE_PATTERNS[:count]
+    while len(patterns) < count:
+        patterns.append(f"{rng.choice(WORDS)} {' '.join(rng.sample(WORDS, 2))} failed")
+    return patterns
+
+
+def bench(func, lines):
+    start = time.perf_counter()
+    for line in lines:
+        func(line)
+    return (time.perf_counter() - start) / len(lines) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generic error pattern matching.")
+    parser.add_argument("--lines", type=int, default=200_000, help="Number of synthetic log lines.")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    lines = [rng.choice(LINES) for _ in range(args.lines)]
+
+    print(f"{args.lines} lines")
+    print(f"{'patterns':>8}  {'alternation':>14}  {'trie regex':>14}  {'matcher':>14}")
+    for count in (1, 5, 50, 200):
+        patterns = make_patterns(count)
+        alternation = re.compile(r"(" + "|".join(re.escape(pattern) for pattern in patterns) + r")")
+        matcher = MultiPatternMatcher(patterns)
+        for line in LINES:
+            old_match = alternation.search(line)
+            assert (old_match.group(0) if old_match else None) == matcher.search(line), line
+        print(
+            f"{count:>8}  {bench(alternation.search, lines):>11.0f} ns  {bench(matcher._regex.search, lines):>11.0f} ns"
+            f"  {bench(matcher.search, lines):>11.0f} ns"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+# Run from anywhere, import the bot's modules from the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import config.config as cfg
+import utility.log_events as log_events
+
+# ─────────────────────────────────────────────────────────────────────────
+# Benchmark: per-line cost of the log event classifier
+# ─────────────────────────────────────────────────────────────────────────
+# Compares log_events.classify() against the old approach, where every consumer
+# ran its own regex over every line of latest.log.
+
+SAMPLE_LINES = [
+    "[19Jan2025 20:04:15.335] [Server thread/INFO] [net.minecraft.server.MinecraftServer/]: <jonshard> anyone seen my horse?",
+    "[19Jan2025 20:04:16.101] [Server thread/WARN] [net.minecraft.server.MinecraftServer/]: Can't keep up! Is the server overloaded? Running 2114ms or 42 ticks behind",
+    "[19Jan2025 20:04:17.002] [Server thread/INFO] [net.minecraft.server.MinecraftServer/]: jonemartin joined the game",
+    "[19Jan2025 20:04:18.450] [Server thread/INFO] [net.minecraft.server.MinecraftServer/]: jonemartin has made the advancement [Stone Age]",
+    "[19Jan2025 20:04:19.777] [Server thread/WARN] [net.minecraft.world.level.chunk.storage.RegionFile/]: Saving oversized chunk [12, -4] (1290752 bytes} to external file",
+    "[19Jan2025 20:04:20.123] [Server thread/ERROR] [net.minecraft.world.level.chunk.storage.IOWorker/]: Failed to store chunk [3, 7]",
+]
+FILLER_LINES = [
+    "[19Jan2025 20:04:21.001] [Server thread/INFO] [com.example.somemod.Core/]: Loaded 214 recipes for machine grinder",
+    "[19Jan2025 20:04:21.002] [Worker-Main-3/DEBUG] [net.minecraft.server.packs.resources.ReloadableResourceManager/]: Reloading ResourceManager: vanilla, mod_resources",
+    "[19Jan2025 20:04:21.003] [Server thread/INFO] [FTB Quests/]: Saved quest data for 4 teams",
+]
+GENERIC_ERROR_PATTERNS = {
+    "Failed to store chunk": "",
+    "Forcing regeneration of chunk": "",
+    "Rebuilding corrupted chunk": "",
+    "Missing chunk": "",
+    "stream is truncated: expected": "",
+}
+
+
+def make_lines(count: int, interesting_ratio: float):
+    rng = random.Random(1)
+    return [
+        rng.choice(SAMPLE_LINES) if rng.random() < interesting_ratio else rng.choice(FILLER_LINES)
+        for _ in range(count)
+    ]
+
+
+def scan_per_consumer(lines):
+    """The pre-event-bus approach: one regex pass per consumer"""
+    lag_regex = re.compile(r'^\[(?P<datetime>\d{1,2}[A-Za-z]{3}\d{4} \d{2}:\d{2}:\d{2}\.\d+)] .*?Running (?P<ms>\d+)ms or \d+ ticks behind')
+    chat_regex = re.compile(r'Server thread/INFO\] \[net\.minecraft\.server\.MinecraftServer/\]: (\[Rcon\]|<|\[Server\])')
+    advancements_regex = re.compile(r"^\[.*?\] \[.*?\] \[.*?/\]: \w+ has made the advancement \[.*?\]$")
+    join_regex = re.compile(r'^\[(?P<dt>\d{1,2}[A-Za-z]{3}\d{4}\s+\d{2}:\d{2}:\d{2}\.\d+)\]\s.*?:\s+(?P<user>\S+)\s+(?P<action>joined|left)\sthe game')
+    generic_error_regex = re.compile(r"(" + "|".join(re.escape(p) for p in GENERIC_ERROR_PATTERNS) + r")")
+    hits = 0
+    for line in lines:
+        hits += bool(lag_regex.match(line))
+        hits += bool(chat_regex.search(line))
+        hits += bool(advancements_regex.search(line))
+        hits += bool(join_regex.match(line))
+        hits += line.count("Saving oversized chunk")
+        hits += bool(generic_error_regex.search(line))
+    return hits
+
+
+def scan_classify(lines):
+    hits = 0
+    for line in lines:
+        hits += log_events.classify(line) is not None
+    return hits
+
+
+def bench(name, func, lines):
+    start = time.perf_counter()
+    hits = func(lines)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<22} {elapsed:8.3f} s  {elapsed / len(lines) * 1e9:8.0f} ns/line  ({hits} hits)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the latest.log event classifier.")
+    parser.add_argument("--lines", type=int, default=500_000, help="Number of synthetic log lines.")
+    parser.add_argument("--interesting", type=float, default=0.05, help="Fraction of lines that produce an event.")
+    args = parser.parse_args()
+
+    cfg.config = cfg.Config()
+    cfg.config.notifications.generic_error_patterns = GENERIC_ERROR_PATTERNS
+    cfg.update_generic_error_matcher()
+
+    lines = make_lines(args.lines, args.interesting)
+    print(f"{args.lines} lines, {args.interesting:.0%} of them interesting")
+    bench("per-consumer regexes", scan_per_consumer, lines)
+    bench("log_events.classify", scan_classify, lines)
+
+
+if __name__ == "__main__":
+    main()
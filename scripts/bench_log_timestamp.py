@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+import os
+import re
+import sys
+import time
+import random
+import datetime
+import argparse
+
+# Run from anywhere, import the bot's modules from the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import utility.log_timestamp as log_timestamp
+
+# ─────────────────────────────────────────────────────────────────────────
+# Benchmark: log timestamp parsing
+# ─────────────────────────────────────────────────────────────────────────
+# Compares the old regex + strptime path against utility/log_timestamp.py
+# on synthetic lines spread over a few days, like a week of archived logs.
+
+OLD_TIMESTAMP_REGEX = re.compile(
+    r'^\[(?P<day>\d{1,2})(?P<month>[a-zA-Z]{3})\.?(?P<year>\d{4}) (?P<hour>\d{2}):(?P<minute>\d{2}):(?P<second>\d{2})\.(?P<millis>\d+)\]'
+)
+
+def old_extract_timestamp(log_line):
+    """The previous helpers.extract_timestamp"""
+    ts_match = OLD_TIMESTAMP_REGEX.match(log_line)
+    if ts_match:
+        log_day = ts_match.group("day")
+        log_month = ts_match.group("month").capitalize()
+        log_year = ts_match.group("year")
+        log_time = f"{ts_match.group('hour')}:{ts_match.group('minute')}:{ts_match.group('second')}.{ts_match.group('millis')}"
+
+        log_timestamp_str = f"{log_day}{log_month}{log_year} {log_time}"
+        return datetime.datetime.strptime(log_timestamp_str, "%d%b%Y %H:%M:%S.%f")
+    return None
+
+
+def make_lines(count: int):
+    start = datetime.datetime(2025, 1, 19, 0, 0)
+    step = datetime.timedelta(days=7) / count  # A week of lines, in order like a real log
+    rng = random.Random(1)
+    lines = []
+    for i in range(count):
+        ts = start + step * i
+        millis = rng.randrange(1000)
+        lines.append(f"[{ts.day}{ts.strftime('%b%Y %H:%M:%S')}.{millis:03d}] [Server thread/INFO] [net.minecraft.server.MinecraftServer/]: line {i}")
+    return lines
+
+
+def bench(name, func, lines):
+    start = time.perf_counter()
+    for line in lines:
+        func(line)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<34} {elapsed:8.3f} s  {elapsed / len(lines) * 1e9:6.0f} ns/line")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark log timestamp parsing.")
+    parser.add_argument("--lines", type=int, default=3_000_000, help="Number of synthetic log lines.")
+    args = parser.parse_args()
+
+    lines = make_lines(args.lines)
+
+    # Both parsers have to agree before their speed matters
+    for line in lines[::max(1, len(lines) // 1000)]:
+        expected = old_extract_timestamp(line)
+        assert log_timestamp.parse_timestamp(line) == expected, line
+        assert log_timestamp.parse_timestamp_ms(line) == int(expected.timestamp() * 1000), line
+
+    print(f"{args.lines} lines")
+    bench("regex + strptime (old)", old_extract_timestamp, lines)
+    bench("log_timestamp.parse_timestamp", log_timestamp.parse_timestamp, lines)
+    bench("log_timestamp.parse_timestamp_ms", log_timestamp.parse_timestamp_ms, lines)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import struct
+import asyncio
+import argparse
+import threading
+import statistics
+
+# Run from anywhere, import the bot's modules from the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utility.async_rcon import AsyncRcon
+
+# ─────────────────────────────────────────────────────────────────────────
+# Benchmark: RCON latency, mcrcon vs utility/async_rcon.py
+# ─────────────────────────────────────────────────────────────────────────
+# Sends the same command N times with each client and reports the latency per command,
+# plus N commands issued at once by concurrent callers of the asyncio client, which take turns.
+# Without --host a local fake server is started: it reads packets the way the vanilla server does
+# (one read per packet, more than one packet in a read drops the client), answers "list" like
+# Minecraft, splits responses over 4096 bytes into several packets, and can add a delay per
+# command (--delay-ms) to stand in for a busy server.
+
+FAKE_PASSWORD = "bench"
+
+
+def fake_response(command: str) -> str:
+    if command.startswith("echo "):
+        return command[5:]
+    if command.startswith("big "):
+        return "x" * int(command[4:])
+    return "There are 2 of a max of 20 players online: jonemartin, ola"
+
+
+async def handle_fake_client(reader, writer, delay_sec: float):
+    """
+    Frames packets like the vanilla/Forge RconClient: one read of up to 1460 bytes per packet,
+    and the client is dropped if that read doesn't hold exactly one packet.
+    """
+    try:
+        while True:
+            data = await reader.read(1460)
+            if len(data) < 14:
+                break
+            (length,) = struct.unpack_from("<i", data)
+            if length != len(data) - 4:
+                print(f"Fake server: {len(data)} bytes read for a {length} byte packet, dropping the client")
+                break
+            request_id, packet_type = struct.unpack_from("<ii", data, 4)
+            body = data[12:-2].decode("utf-8")
+            if packet_type == 3:  # Login
+                replies = [(request_id if body == FAKE_PASSWORD else -1, 2, b"")]
+            elif packet_type == 2:  # Command, answered in 4096 byte fragments, an empty response still gets one packet
+                if delay_sec:
+                    await asyncio.sleep(delay_sec)
+                response = fake_response(body).encode("utf-8")
+                replies = [(request_id, 0, response[i:i + 4096]) for i in range(0, max(len(response), 1), 4096)]
+            else:  # Like Minecraft: unknown packet types are answered with an error message
+                replies = [(request_id, 0, f"Unknown request {packet_type:x}".encode("utf-8"))]
+            for reply_id, reply_type, payload in replies:
+                writer.write(struct.pack("<iii", 10 + len(payload), reply_id, reply_type) + payload + b"\x00\x00")
+            await writer.drain()
+    except ConnectionError:
+        pass
+    writer.close()
+
+
+def start_fake_server(delay_sec: float) -> int:
+    """Runs the fake server on its own event loop thread, returns its port"""
+    started = threading.Event()
+    port = []
+
+    def run():
+        loop = asyncio.new_event_loop()
+        server = loop.run_until_complete(asyncio.start_server(
+            lambda r, w: handle_fake_client(r, w, delay_sec), "127.0.0.1", 0
+        ))
+        port.append(server.sockets[0].getsockname()[1])
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait()
+    return port[0]
+
+
+def report(name: str, latencies: list):
+    print(f"{name:<34} median {statistics.median(latencies) * 1000:7.2f} ms  max {max(latencies) * 1000:7.2f} ms")
+
+
+def bench_mcrcon(host, port, password, command, count):
+    try:
+        from mcrcon import MCRcon
+    except ImportError:
+        print("mcrcon is not installed, skipping it.")
+        return
+    latencies = []
+    with MCRcon(host, password, port=port) as connection:
+        for _ in range(count):
+            start = time.perf_counter()
+            connection.command(command)
+            latencies.append(time.perf_counter() - start)
+    report("mcrcon (blocking)", latencies)
+
+
+async def bench_async(host, port, password, command, count):
+    connection = AsyncRcon(host, port, password)
+    await connection.connect()
+
+    # Both clients have to return the whole response, also when it spans several packets
+    if host == "127.0.0.1":
+        for size in (0, 4095, 4096, 8192, 20000):
+            response = await connection.command(f"big {size}")
+            assert len(response) == size, f"{size} byte response came back as {len(response)} bytes"
+
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        await connection.command(command)
+        latencies.append(time.perf_counter() - start)
+    report("async_rcon (sequential)", latencies)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(connection.command(f"echo {i}") if host == "127.0.0.1" else connection.command(command) for i in range(count)))
+    elapsed = time.perf_counter() - start
+    if host == "127.0.0.1":
+        assert results == [str(i) for i in range(count)], "responses were matched to the wrong requests"
+    assert connection.connected, "the server dropped the connection"
+    print(f"{'async_rcon (' + str(count) + ' concurrent callers)':<34} total  {elapsed * 1000:7.2f} ms")
+    await connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RCON command latency.")
+    parser.add_argument("--host", help="RCON host, a local fake server is used if omitted.")
+    parser.add_argument("--port", type=int, default=25575)
+    parser.add_argument("--password", default=FAKE_PASSWORD)
+    parser.add_argument("--command", default="list")
+    parser.add_argument("--count", type=int, default=200, help="Commands per client.")
+    parser.add_argument("--delay-ms", type=float, default=0, help="Fake server processing time per command.")
+    args = parser.parse_args()
+
+    host, port = args.host, args.port
+    if host is None:
+        host, port = "127.0.0.1", start_fake_server(args.delay_ms / 1000)
+        print(f"Fake RCON server on port {port}, {args.delay_ms} ms per command")
+
+    bench_mcrcon(host, port, args.password, args.command, args.count)
+    asyncio.run(bench_async(host, port, args.password, args.command, args.count))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import asyncio
+import argparse
+
+# Run from the bot's directory, import the bot's modules from the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import config.config as cfg
+
+# ─────────────────────────────────────────────────────────────────────────
+# Player count history <-> CSV
+# ─────────────────────────────────────────────────────────────────────────
+# Imports a "Timestamp,PlayerCount" CSV (the old _data/stats.csv, or the output
+# of rebuild_stats.py) into the bot's binary player count store, or exports the
+# store back to that CSV format.
+
+def main():
+    parser = argparse.ArgumentParser(description="Import/export the player count history as CSV.")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("csv_path", help="CSV file to read from (import) or write to (export).")
+    parser.add_argument("--compact", action="store_true", help="Downsample old samples after importing.")
+    args = parser.parse_args()
+
+    asyncio.run(cfg.load_config())  # Same store path as the bot
+    import utility.player_stats as player_stats
+    store = player_stats.get_store()
+
+    if args.action == "import":
+        imported = store.import_csv(args.csv_path)
+        print(f"Imported {imported} rows from {args.csv_path} into {store.path}.")
+        if args.compact:
+            player_stats.compact()
+        player_stats.rebuild_rollups()
+    else:
+        rows = store.export_csv(args.csv_path, player_stats.CSV_HEADER)
+        print(f"Exported {rows} rows from {store.path} to {args.csv_path}.")
+
+
+if __name__ == "__main__":
+    main()
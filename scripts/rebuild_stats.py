@@ -1,120 +1,205 @@
 #!/usr/bin/env python3
 
 import os
-import re
-import tarfile
+import sys
 import csv
-import datetime
-import gzip
+import json
+import time
+import heapq
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Run from the bot's directory, import the bot's modules from the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import config.config as cfg
 
 # ─────────────────────────────────────────────────────────────────────────
 # CONFIG
 # ─────────────────────────────────────────────────────────────────────────
 
-LOGS_DIR = "/mnt/SSD120GB/phonix/PhoenixDenPack2025/logs/"          # Directory containing *.tar.gz files
+LOGS_DIR = "/mnt/SSD120GB/phonix/PhoenixDenPack2025/logs/"          # Directory containing *.log.gz files
 OUTPUT_CSV = "stats_rebuilt.csv"    # The CSV we want to populate with historical data
-
-# Regex to capture bracketed date/time plus "username joined/left the game"
+CHECKPOINT_PATH = OUTPUT_CSV + ".checkpoint.json"  # Archives already in OUTPUT_CSV and the replay state after them
+
+# Join/leave/restart events are taken from the bot's per-archive sidecars (utility/log_index.py),
+# so each archive is only decompressed the first time it is seen by the bot or this script.
+# Archives are read by a process pool (--workers), each returning its events sorted by time,
+# and the per-archive lists are combined with a streaming k-way merge.
+# Runs are incremental: CHECKPOINT_PATH remembers the processed archives (name, size, mtime)
+# and who was online after the last event, so a re-run (e.g. nightly from cron) only reads
+# new archives and continues from there. Rows whose timestamp is already in OUTPUT_CSV are
+# not written again. --full ignores the checkpoint and rewrites OUTPUT_CSV.
 # Example lines:
 # [20Jan2025 11:24:46.081] [Server thread/INFO] [...]: jonemartin joined the game
 # [20Jan2025 11:24:18.509] [Server thread/INFO] [...]: jonemartin left the game
-JOIN_LEFT_PATTERN = re.compile(
-    r'^\[(?P<dt>\d{1,2}[A-Za-z]{3}\d{4}\s+\d{2}:\d{2}:\d{2}\.\d+)\]\s.*?:\s+(?P<user>\S+)\s+(?P<action>joined|left)\sthe game'
-)
-
-# Regex to detect server restarts
-# Example:
 # [20Jan2025 05:00:41.632] [Server thread/WARN] [ModernFix/]: Dedicated server took 37.64 seconds to load
-RESTART_PATTERN = re.compile(
-    r'^\[(?P<dt>\d{1,2}[A-Za-z]{3}\d{4}\s+\d{2}:\d{2}:\d{2}\.\d+)\].*Dedicated server took .* to load'
-)
 
-DATETIME_FORMAT = "%d%b%Y %H:%M:%S.%f"  # e.g. 20Jan2025 11:24:46.081
+# ─────────────────────────────────────────────────────────
+# ARCHIVE WORKERS
+# ─────────────────────────────────────────────────────────
+
+def init_worker():
+    """Process pool initializer, workers need the config for the sidecar dir and chat/error settings"""
+    asyncio.run(cfg.load_config())
+
+
+def event_time(event):
+    return event[0]
+
+
+def read_archive_events(full_path):
+    """
+    Reads one archive's join/leave/restart events from its sidecar, building the sidecar if needed.
+    Runs in a worker process.
+    Returns:
+        (archive name, sorted [(ts_ms, "join"/"left"/"restart", user), ...] or None if unreadable,
+         seconds taken, whether the sidecar had to be built)
+    """
+    import utility.log_index as log_index
+    start = time.perf_counter()
+    built = log_index.load_sidecar(full_path) is None
+    sidecar = log_index.get_sidecar(full_path)
+    if sidecar is None:
+        return os.path.basename(full_path), None, time.perf_counter() - start, built
+    events = sorted(
+        ((ts_ms, "left" if kind == "leave" else kind, user) for ts_ms, kind, user in sidecar["sessions"] if ts_ms is not None),
+        key=event_time
+    )
+    return os.path.basename(full_path), events, time.perf_counter() - start, built
+
+
+def read_all_archives(gz_files, workers):
+    """
+    Reads the events of all archives, fanned out to a process pool when workers > 1.
+    Prints a timing line per archive as it finishes.
+    Returns:
+        (list, list): One sorted event list per readable archive, and the names of those archives.
+    """
+    per_archive = []
+    read_names = []
+    def report(result):
+        name, events, seconds, built = result
+        if events is None:
+            print(f"{name:<28} could not be read, skipping.")
+            return
+        print(f"{name:<28} {len(events):>6} events {seconds * 1000:>8.1f} ms {'(indexed)' if built else '(sidecar)'}")
+        per_archive.append(events)
+        read_names.append(name)
+
+    if workers <= 1:
+        for full_path in gz_files:
+            report(read_archive_events(full_path))
+        return per_archive, read_names
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        futures = [pool.submit(read_archive_events, full_path) for full_path in gz_files]
+        for future in as_completed(futures):
+            report(future.result())
+    return per_archive, read_names
+
+
+# ─────────────────────────────────────────────────────────
+# CHECKPOINT
+# ─────────────────────────────────────────────────────────
+
+def archive_key(full_path):
+    stat = os.stat(full_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def load_checkpoint(path):
+    """Returns {"archives": {name: [size, mtime_ns]}, "online": [...], "last_ts_ms": ...}, empty if there is none"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"archives": {}, "online": [], "last_ts_ms": 0}
+
+
+def save_checkpoint(checkpoint, path):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(temp_path, path)
+
 
 # ─────────────────────────────────────────────────────────
 # MAIN
 # ─────────────────────────────────────────────────────────
 
 def main():
-    # 1. Collect all .log.gz files
-    gz_files = sorted(
-        f for f in os.listdir(LOGS_DIR)
-        if f.endswith(".log.gz")
-    )
+    parser = argparse.ArgumentParser(description="Rebuild the player count history from archived logs.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes reading archives in parallel (1 = no pool).")
+    parser.add_argument("--full", action="store_true", help="Ignore the checkpoint, reprocess every archive and rewrite the CSV.")
+    args = parser.parse_args()
+
+    asyncio.run(cfg.load_config())  # Same index dir and chat/error settings as the bot
+    import utility.log_index as log_index
+
+    # 1. Collect all .log.gz files, minus the ones already processed by a previous run
+    gz_files = log_index.list_archives(LOGS_DIR)
     if not gz_files:
         print(f"No *.log.gz files found in {LOGS_DIR}.")
         return
-
-    # We'll store all events in memory to sort them by time:
-    # events = [ (datetime_obj, "join"/"left"/"restart", username_or_None) ]
-    events = []
-
-    # 2. Parse each .log.gz for joined/left/restart lines
-    for filename in gz_files:
-        full_path = os.path.join(LOGS_DIR, filename)
-        print(f"Reading {full_path}...")
-        with gzip.open(full_path, "rt", errors="ignore") as f:
-            for line in f:
-                line = line.rstrip("\n")
-
-                # joined/left
-                m_jl = JOIN_LEFT_PATTERN.match(line)
-                if m_jl:
-                    dt_str = m_jl.group("dt")
-                    user = m_jl.group("user")
-                    action = m_jl.group("action")  # "joined" or "left"
-                    dt_obj = parse_datetime(dt_str)
-                    if dt_obj:
-                        etype = "join" if action == "joined" else "left"
-                        events.append((dt_obj, etype, user))
-                    continue
-
-                # restart
-                m_rs = RESTART_PATTERN.match(line)
-                if m_rs:
-                    dt_str = m_rs.group("dt")
-                    dt_obj = parse_datetime(dt_str)
-                    if dt_obj:
-                        events.append((dt_obj, "restart", None))
-                    continue
-
-    if not events:
-        print("No events found in any log. Exiting.")
+    if args.full:
+        checkpoint = {"archives": {}, "online": [], "last_ts_ms": 0}
+        if os.path.isfile(OUTPUT_CSV):
+            os.remove(OUTPUT_CSV)
+    else:
+        checkpoint = load_checkpoint(CHECKPOINT_PATH)
+    keys = {os.path.basename(full_path): archive_key(full_path) for full_path in gz_files}
+    new_files = [full_path for full_path in gz_files if checkpoint["archives"].get(os.path.basename(full_path)) != keys[os.path.basename(full_path)]]
+    print(f"{len(gz_files) - len(new_files)} archives already processed, {len(new_files)} new.")
+    if not new_files:
         return
 
-    # 3. Sort events by datetime
-    events.sort(key=lambda x: x[0])
+    # 2. Take joined/left/restart events from each archive's sidecar, one sorted list per archive
+    start = time.perf_counter()
+    per_archive, read_names = read_all_archives(new_files, args.workers)
+    print(f"Read {len(per_archive)} archives with {args.workers} worker(s) in {time.perf_counter() - start:.2f} s.")
 
-    # 4. Replay them => produce [timestamp, count] rows
-    reconstructed = replay_events(events)
+    # 3. Merge the sorted per-archive lists into one stream ordered by time, no global sort.
+    # Events up to the checkpoint are already replayed (e.g. an archive that was modified).
+    last_ts_ms = checkpoint["last_ts_ms"]
+    events = (event for event in heapq.merge(*per_archive, key=event_time) if event[0] > last_ts_ms)
 
-    # 5. Append to CSV
-    append_to_csv(reconstructed, OUTPUT_CSV)
-    print(f"Appended {len(reconstructed)} new rows to {OUTPUT_CSV}.")
+    # 4. Replay them => produce [timestamp, count] rows, continuing with who was online at the checkpoint
+    online = set(checkpoint["online"])
+    reconstructed, last_ts_ms = replay_events(events, online, last_ts_ms)
 
+    # 5. Append the rows that aren't in the CSV yet
+    existing = read_csv_timestamps(OUTPUT_CSV)
+    new_rows = [row for row in reconstructed if row[0] not in existing]
+    append_to_csv(new_rows, OUTPUT_CSV)
+    print(f"Appended {len(new_rows)} new rows to {OUTPUT_CSV} ({len(reconstructed) - len(new_rows)} already present).")
+
+    # 6. Remember what was processed, only after the CSV is written
+    for name in read_names:
+        checkpoint["archives"][name] = keys[name]
+    checkpoint["online"] = sorted(online)
+    checkpoint["last_ts_ms"] = last_ts_ms
+    save_checkpoint(checkpoint, CHECKPOINT_PATH)
 
-def parse_datetime(dt_str):
-    """Parse date/time string like '20Jan2025 11:24:46.081' -> datetime obj or None."""
-    try:
-        return datetime.datetime.strptime(dt_str, DATETIME_FORMAT)
-    except ValueError:
-        return None
 
-def replay_events(events):
+def replay_events(events, online, last_ts_ms=0):
     """
-    events: sorted list of (dt, evtype, user)
+    events: iterable of (ts_ms, evtype, user), sorted by time
     evtype in ("join", "left", "restart")
     user is a string or None
+    online: set of players online before the first event, updated in place.
     We maintain a set of online players. On 'join', add user. On 'left', remove user.
     On 'restart', clear the set.
     Each time the set size changes, record [dt_str, count].
-    Return list of (timestamp_str, count).
+    Return list of (timestamp_str, count) and the ts_ms of the last event (last_ts_ms if there was none).
     """
-    online = set()
+    import utility.log_timestamp as log_timestamp
     output = []
-    last_count = 0
+    last_count = len(online)
 
-    for (dt, evtype, user) in events:
+    for (ts_ms, evtype, user) in events:
+        last_ts_ms = ts_ms
         if evtype == "join":
             online.add(user)
         elif evtype == "left":
@@ -129,11 +214,21 @@ def replay_events(events):
         current_count = len(online)
         if current_count != last_count:
             # record a new row
-            ts_str = dt.strftime("%Y-%m-%d %H:%M")
+            ts_str = log_timestamp.ms_to_datetime(ts_ms).strftime("%Y-%m-%d %H:%M")
             output.append((ts_str, current_count))
             last_count = current_count
 
-    return output
+    return output, last_ts_ms
+
+
+def read_csv_timestamps(csv_path):
+    """Returns the timestamps of the rows already in csv_path"""
+    if not os.path.isfile(csv_path):
+        return set()
+    with open(csv_path, mode="r", newline="", encoding="utf-8") as csvfile:
+        reader = csv.reader(csvfile)
+        next(reader, None)  # Header
+        return {row[0] for row in reader if row}
 
 def append_to_csv(rows, csv_path):
     """
@@ -1,6 +1,6 @@
-import re
 import asyncio
 import datetime
+from typing import Optional
 from discord.ext import tasks
 
 import utility.globals as globals
@@ -10,23 +10,32 @@ from utility.logger import get_logger
 log = get_logger()
 
 import utility.helper_functions as helpers
+import utility.log_tailer as log_tailer
+import utility.log_watcher as log_watcher
+import utility.log_events as log_events
+import utility.lag_series as lag_series
+import utility.lag_tiers as lag_tiers
+import utility.chat_buffer as chat_buffer
+import utility.player_stats as player_stats
+import utility.process_stats as process_stats
 
 @tasks.loop(minutes=cfg.config.stats.csv_interval_min)
 async def player_count_logger_task():
     """
     A background task that runs indefinitely,
-    logging the player count to a CSV file every 15 minutes.
+    logging the player count to the player count history every csv_interval_min minutes.
     """
-    # Store how many players are currently online in the csv file
+    # Store how many players are currently online in the player count history
     helpers.update_csv_player_count()
 
 async def background_chat_update_task(channel_id: int):
     """
-    Repeatedly update the chat window in this channel
-    until the 5-minute timer expires.
+    Update the chat window in this channel whenever a new chat line arrives,
+    at most once every update_interval_sec, until the 5-minute timer expires.
     """
+    shown_version = chat_buffer.version
+    last_edit = asyncio.get_event_loop().time()
     while True:
-        await asyncio.sleep(cfg.config.bot.chat.update_interval_sec)
         # If the window is missing or removed from dict, stop
         if channel_id not in globals.chat_windows:
             return
@@ -45,8 +54,21 @@ async def background_chat_update_task(channel_id: int):
             log.debug(f"Task background_chat_update_task: Chat window in channel {channel_id} expired.")
             return
 
+        # Nothing new in chat since the last edit, sleep until a chat line arrives or the window expires
+        if shown_version == chat_buffer.version:
+            await chat_buffer.chat_wakeup.wait(timeout=data["expires_at"] - now)
+            continue
+
+        # Don't edit more often than update_interval_sec, lines arriving meanwhile go into the same edit
+        wait_sec = last_edit + cfg.config.bot.chat.update_interval_sec - now
+        if wait_sec > 0:
+            await asyncio.sleep(wait_sec)
+            if channel_id not in globals.chat_windows:
+                return
+        shown_version = chat_buffer.version
+
         # Otherwise, update the message
-        lines = helpers.get_recent_chat_lines(10)
+        lines = helpers.get_recent_chat_lines(cfg.config.bot.chat.lines)
         joined = "\n".join(lines)
         new_content = f"```text\n{joined}\n```"
         try:
@@ -56,6 +78,7 @@ async def background_chat_update_task(channel_id: int):
             # Remove and stop
             del globals.chat_windows[channel_id]
             return
+        last_edit = asyncio.get_event_loop().time()
 
                 
 @tasks.loop(minutes=1)
@@ -66,48 +89,42 @@ async def clear_daily_state():
     if now.hour == 0 and now.minute == 0: # Run at midnight
         st.state.mc_players_today.clear()
         st.save_state()
+        # Downsample old player count and java process samples, rewriting the files happens in a thread
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, player_stats.compact)
+        await loop.run_in_executor(None, process_stats.compact)
         
         
 
-@tasks.loop(minutes=1) # Has to run every 1 minute. Logic assumes that each element in globals.lag_history is 1 minute apart
-async def update_lag_history():
-    """Updates global variable lag_history with lag data from the log file"""
-    log.debug("Task update_lag_history: Running Task")
-    now = datetime.datetime.now()
-    one_minute_ago = now - datetime.timedelta(minutes=cfg.config.notifications.check_last_min_errors)# Calculate time 1 minute ago to filter logs
-    
-    # Read log file
-    with open(cfg.config.minecraft.log_file_path, 'r') as log_file:
-        log_contents = log_file.read()
-
-    lag_line_regex = re.compile(
-        r'^\[(?P<day>\d{1,2})(?P<month>[a-zA-Z]{3})\.?(?P<year>\d{4}) (?P<hour>\d{2}):(?P<minute>\d{2}):(?P<second>\d{2})\.(?P<millis>\d+)] .*?Running (?P<ms>\d+)ms or \d+ ticks behind'
-    )
-
-    # Parse log lines for lag entries within the last minute
-    total_lag_this_minute = 0  
-
-    for line in log_contents.splitlines():
-        match = lag_line_regex.match(line)
-        if match:
-            # Extract matched timestamp
-            log_day = match.group("day")
-            log_month = match.group("month").capitalize()
-            log_year = match.group("year")
-            log_time = f"{match.group('hour')}:{match.group('minute')}:{match.group('second')}.{match.group('millis')}"
-
-            log_timestamp_str = f"{log_day}{log_month}{log_year} {log_time}"
-            log_timestamp = datetime.datetime.strptime(log_timestamp_str, "%d%b%Y %H:%M:%S.%f")
-
-            # Check if the entry is within the last minute
-            if log_timestamp >= one_minute_ago:
-                lag_ms = int(match.group("ms"))
-                total_lag_this_minute += lag_ms / 1000  # Convert ms to seconds
-
-    # Add the current minute's lag to history
-    globals.lag_history.append(total_lag_this_minute)
-
-    # Keep only the last lag_window_minutes of lag data
-    if len(globals.lag_history) > 280: # 280 minutes = 4 hours
-        globals.lag_history.pop(0)
+# ──────────────────────────
+# latest.log Consumers
+# ──────────────────────────
+def on_lag(event: log_events.LagEvent):
+    """Adds a 'Running behind' log line to the lag history, session counters are kept by utility/metrics.py"""
+    lag_series.add(event.ts_ms, event.ms)
+    lag_tiers.add(event.ts_ms, event.ms)
+
+log_events.subscribe(log_events.LagEvent, on_lag)
+
+
+def on_logs_dir_changed(name: Optional[str]):
+    """Log watcher callback, reads new latest.log lines as soon as they are written"""
+    # A rotation shows up as a new latest.log or a new archive, the tailer sorts out which
+    if name is None or name == "latest.log" or name.endswith(".log.gz"):
+        log_tailer.request_poll()
 
+log_watcher.watch(cfg.config.minecraft.logs_dir, on_logs_dir_changed)
+
+
+@tasks.loop(seconds=cfg.config.stats.process_sample_interval_sec)
+async def sample_java_process():
+    """Records the java process' memory, CPU, threads, open files and I/O in the process history"""
+    await process_stats.sample_async()
+
+
+@tasks.loop(minutes=1)
+async def save_lag_series():
+    """Persists the per-second lag series and the lag history tiers, so lag history survives bot restarts"""
+    log.debug("Task save_lag_series: Running Task")
+    lag_series.save()
+    lag_tiers.save()
@@ -1,4 +1,4 @@
-import re
+import asyncio
 import datetime
 from discord.ext import tasks
 
@@ -9,55 +9,119 @@ from utility.logger import get_logger
 log = get_logger()
 
 import utility.rcon_helpers as rcon_helpers
-import utility.helper_functions as helpers
+import utility.lag_series as lag_series
+import utility.log_events as log_events
+import utility.metrics as metrics
+import utility.log_timestamp as log_timestamp
 
+bot_started_ms = log_timestamp.now_ms() # Joins and advancements logged before the bot started are not notified
 
-join_first_run = True # Flag to skip notifications on the first run
-tracked_players = []
-@tasks.loop(minutes=cfg.config.notifications.check_last_min_joins)
+JOIN_BATCH_SEC = 0.5  # Joins/leaves within this long of each other go out as one message, e.g. everyone rejoining after a restart
+
+online_players = set()  # Who is online according to join/leave lines, corrected by reconcile_online_players
+pending_joins = []  # Players who joined since notify_player_join last ran
+pending_leaves = []  # Players who left since notify_player_join last ran
+join_wakeup = log_events.Wakeup()
+
+def on_join(event: log_events.JoinEvent):
+    # Notifications are only for joins happening now, not lines read from before the bot started
+    if event.ts_ms is not None and event.ts_ms < bot_started_ms:
+        online_players.add(event.player)
+        return
+    # Already online if reconciliation saw the player before the log line was read, and notified then
+    if event.player not in online_players:
+        online_players.add(event.player)
+        pending_joins.append(event.player)
+        join_wakeup.set()
+
+def on_leave(event: log_events.LeaveEvent):
+    online_players.discard(event.player)
+    if event.ts_ms is not None and event.ts_ms < bot_started_ms:
+        return
+    pending_leaves.append(event.player)
+    join_wakeup.set()
+
+log_events.subscribe(log_events.JoinEvent, on_join)
+log_events.subscribe(log_events.LeaveEvent, on_leave)
+log_events.subscribe_rotation(online_players.clear) # A new server session starts with nobody online
+
+
+def join_names(players: list) -> str:
+    """'user1', 'user1 and user2' or 'user1, user2 and user3'"""
+    return ", ".join(players[:-1]) + " and " + players[-1] if len(players) > 1 else players[0]
+
+
+async def notify_join_subscribers(bot, players: list, message: str) -> int:
+    """DMs message to users subscribed to joins, except a subscriber whose own player is the only one in players"""
+    notified_count = 0
+    for user_info in st.state.join_subed_users:
+        # Handle both cases for if the user_info is just the userID or userID.username
+        log.debug("Handling user_info: " + str(user_info))
+        if isinstance(user_info, str) and '.' in user_info:
+            user_id, username = user_info.split('.')
+        else:
+            user_id = str(user_info)  # Ensure it's a string
+            username = None
+        
+        if username and username in players and len(players) == 1:
+            log.debug(f"Task notify_player_join: Ignoring self-notify user {username} (ID: {user_id}) about player(s) {players}")
+            continue
+        log.debug(f"Task notify_player_join: Notifying user {username} (userID: {user_id}) about player(s) {players}")
+        user = await bot.fetch_user(int(user_id))
+        await user.send(message)
+        notified_count += 1
+    return notified_count
+
+
+@tasks.loop()
 async def notify_player_join(bot):
-    """Uses state to send DM to users who as subscriberd to being updated when a player joins"""
-    global tracked_players, join_first_run
-    log.debug("Task notify_player_join: Running Task. Tracked players: " + str(tracked_players))
-    # Check if any new players have joined
-    players = await rcon_helpers.get_players()    
+    """
+    Uses state to send DM to users who as subscriberd to being updated when a player joins (and leaves, if leaves_enabled).
+    Woken by the "joined the game"/"left the game" lines of latest.log, so no RCON is needed.
+    """
+    # Sleep until the log tailer reads a join or leave line
+    await join_wakeup.wait()
+    await asyncio.sleep(JOIN_BATCH_SEC)
+
+    joined = list(dict.fromkeys(pending_joins))
+    left = list(dict.fromkeys(pending_leaves))
+    pending_joins.clear()
+    pending_leaves.clear()
+
+    # If new players notify discord users (in a list if many new players: 'user1, user2, and user3 joined')
+    if joined:
+        notified_count = await notify_join_subscribers(bot, joined, f"📢 `{join_names(joined)}` joined the Minecraft Server")
+        log.info(f"Task notify_player_join: Player(s) {joined} joined. Notified {notified_count} users")
+    if left and cfg.config.notifications.leaves_enabled:
+        notified_count = await notify_join_subscribers(bot, left, f"👋 `{join_names(left)}` left the Minecraft Server")
+        log.info(f"Task notify_player_join: Player(s) {left} left. Notified {notified_count} users")
+
+
+reconcile_first_run = True # Flag to skip notifications on the first run
+@tasks.loop(minutes=cfg.config.notifications.check_last_min_joins)
+async def reconcile_online_players(bot):
+    """
+    Compares the players online according to the log with RCON's `list`, in case a join or leave line was missed,
+    e.g. while the bot was down. Players that are online but were never seen joining are notified like a join.
+    """
+    global reconcile_first_run
+    players = await rcon_helpers.get_players()
     if players is None:
         return
-    new_players = []
-    for player in players:
-        if player not in tracked_players:
-            new_players.append(player)
-            log.debug("Task notify_player_join: New user detected: " + player)
-            
-    tracked_players = players
-    
+    missed_joins = [player for player in players if player not in online_players]
+    missed_leaves = online_players - set(players)
+    if missed_joins or missed_leaves:
+        log.debug(f"Task reconcile_online_players: Missed joins {missed_joins}, missed leaves {sorted(missed_leaves)}")
+    online_players.clear()
+    online_players.update(players)
+
     # Don't notify on the first run, if the bot was just restarted, we don't want to spam users
-    if join_first_run:
-        log.debug("Task notify_player_join: Skipping first run.")
-        join_first_run = False
+    if reconcile_first_run:
+        reconcile_first_run = False
         return
-    
-    # If new players notify discord users (in a list if many new players: 'user1, user2, and user3 joined')
-    if new_players:
-        joined_players = ", ".join(new_players[:-1]) + " and " + new_players[-1] if len(new_players) > 1 else new_players[0]
-        notified_count = 0
-        for user_info in st.state.join_subed_users:
-            # Handle both cases for if the user_info is just the userID or userID.username
-            log.debug("Handling user_info: " + str(user_info))
-            if isinstance(user_info, str) and '.' in user_info:
-                user_id, username = user_info.split('.')
-            else:
-                user_id = str(user_info)  # Ensure it's a string
-                username = None
-            
-            if username and username in new_players and len(new_players) == 1:
-                log.debug(f"Task notify_player_join: Ignoring self-notify user {username} (ID: {user_id}) that player(s) {new_players} joined,")
-                continue
-            log.debug(f"Task notify_player_join: Notifying user {username} (userID: {user_id}) that player(s) {new_players} joined")
-            user = await bot.fetch_user(int(user_id))
-            await user.send(f"📢 `{joined_players}` joined the Minecraft Server")
-            notified_count += 1
-        log.info(f"Task notify_player_join: Player {player} joined. Notified {notified_count} users")
+    if missed_joins:
+        pending_joins.extend(missed_joins)
+        join_wakeup.set()
 
 
 
@@ -85,11 +149,8 @@ async def notify_server_behind(bot):
     
     log.debug("Task notify_server_behind: Running Task")
 
-    # Take a slice of the last cfg.config.notifications.lag_window_min out of globals.lag_history
-    lag_history = globals.lag_history[-cfg.config.notifications.lag_window_min:]
-    
-    # Calculate total lag over the last N minutes using the slice
-    total_lag_in_window = sum(lag_history)
+    # Calculate total lag over the last N minutes from the per-second lag series
+    total_lag_in_window = lag_series.window_sum(cfg.config.notifications.lag_window_min * 60) / 1000 # Convert ms to seconds
 
     log.debug(f"Task notify_server_behind: Total lag last {cfg.config.notifications.lag_window_min} min: {total_lag_in_window} sec (Threshold: {cfg.config.notifications.threshold_sec})")
 
@@ -135,7 +196,7 @@ async def notify_external_chunks(bot):
     
     log.debug("Task notify_external_chunks: Running Task")
     
-    if globals.ext_chunk_count:
+    if metrics.get(metrics.OVERSIZED_CHUNKS).count:
         notified_count = 0
         for user_id in st.state.error_subed_users:
             user = await bot.fetch_user(int(user_id))
@@ -153,55 +214,56 @@ async def notify_external_chunks(bot):
 
 
 
+NOTIFY_BATCH_SEC = 2  # After the first event wakes a task, wait this long so a burst of lines goes out as one batch
+
 generic_errors_notification_cooldown_until = None  # Time until the next notification
-@tasks.loop(minutes=cfg.config.notifications.check_last_min_advancements)
+pending_errors = []  # GenericErrorEvents read from latest.log since notify_generic_errors last ran
+errors_wakeup = log_events.Wakeup()
+log_events.subscribe(log_events.GenericErrorEvent, pending_errors.append)
+log_events.subscribe(log_events.GenericErrorEvent, errors_wakeup.set)
+
+@tasks.loop()
 async def notify_generic_errors(bot):
     """
-    Checks for chunk-related errors and other generic errors in latest.log and sends notifications to subscribed users.
+    Waits for chunk-related errors and other generic errors in latest.log and sends notifications to subscribed users.
     Implements a cooldown to avoid spam.
     """
     global generic_errors_notification_cooldown_until
+    # Sleep until the log tailer reads an error line
+    await errors_wakeup.wait()
+    await asyncio.sleep(NOTIFY_BATCH_SEC)
+
     # Check if notifications are enabled
     if not cfg.config.notifications.errors_enabled:
         log.debug("Task notify_generic_errors: Notifications are disabled.")
+        pending_errors.clear()
         return
 
     # Check cooldown before proceeding
     now = datetime.datetime.now()
-    last_check_time = now - datetime.timedelta(minutes=cfg.config.notifications.check_last_min_errors)# Calculate time 1 minute ago to filter logs
+    last_check_ms = log_timestamp.now_ms() - cfg.config.notifications.check_last_min_errors * 60000 # Calculate time 1 minute ago to filter logs
     if generic_errors_notification_cooldown_until and now < generic_errors_notification_cooldown_until:
-        log.debug(f"Task notify_generic_errors: Skipping check. Notifications on cooldown until {advancements_notification_cooldown_until}.")
+        log.debug(f"Task notify_generic_errors: Skipping check. Notifications on cooldown until {generic_errors_notification_cooldown_until}.")
+        pending_errors.clear()  # Would be too old to notify once the cooldown ends, don't let an error storm pile up
         return
     log.debug("Task notify_generic_errors: Running Task")
 
-    # Compile MC log error patterns from config file
-    # Error message search patterns and explanations separated by colon (':')
     generic_error_patterns = cfg.config.notifications.generic_error_patterns
-    escaped_patterns = [re.escape(pattern) for pattern in generic_error_patterns.keys()]
-    generic_error_regex = re.compile(r"(" + "|".join(escaped_patterns) + r")")
-    # log.debug(f"Generic Error Patterns: {generic_error_patterns}")
-    
-    # Read latest.log file
-    with open(cfg.config.minecraft.log_file_path, 'r', encoding='utf-8', errors='ignore') as log_file:
-        log_contents = log_file.readlines()
+    # Take the errors read from latest.log since the last run
+    errors = pending_errors[:]
+    pending_errors.clear()
     
     scanned_lines = 0
     detected_messages = []
-    for line in log_contents:
+    for event in errors:
         # Check if the entry is within the last minute, if old, skip
-        log_timestamp =helpers.extract_timestamp(line)
-        if log_timestamp and log_timestamp < last_check_time:
-            # log.debug(f"Skipping old line from: {log_timestamp}") # Spammy
+        if event.ts_ms is not None and event.ts_ms < last_check_ms:
+            # log.debug(f"Skipping old line from: {event.timestamp}") # Spammy
             continue
         
-        # Search for generic errors in the log line
-        # log.debug(f"Checking line: {line}")
-        error_match = generic_error_regex.search(line)
-        if error_match:
-            log.debug(f"Task notify_generic_errors: Detected generic error in line: {line}")
-            useful_message = re.sub(r"^.*\[.*?\] \[.*?\] \[.*?/\]: ", "", line.strip())
-            explanation = generic_error_patterns.get(error_match.group(0), "Unknown error detected.")
-            detected_messages.append((useful_message, explanation))
+        log.debug(f"Task notify_generic_errors: Detected generic error in line: {event.line}")
+        explanation = generic_error_patterns.get(event.pattern, "Unknown error detected.")
+        detected_messages.append((event.message, explanation))
         scanned_lines += 1
     # Notify users if any errors were detected
     if detected_messages:
@@ -220,59 +282,56 @@ async def notify_generic_errors(bot):
     log.debug(f"Task notify_generic_errors: Scanned {scanned_lines} lines. Detected {len(detected_messages)} error messages.")
     
 
-advancements_first_run = True # Flag to skip notifications on the first run
 advancements_notification_cooldown_until = None  # Time until the next notification
-@tasks.loop(minutes=cfg.config.notifications.check_last_min_advancements)
+pending_advancements = []  # AdvancementEvents read from latest.log since notify_advancements last ran
+advancements_wakeup = log_events.Wakeup()
+log_events.subscribe(log_events.AdvancementEvent, pending_advancements.append)
+log_events.subscribe(log_events.AdvancementEvent, advancements_wakeup.set)
+
+@tasks.loop()
 async def notify_advancements(bot):
     """
         Uses state to send a DM to users subscribed for advancement notifications.
-        The function reads the Minecraft server log, checks for advancements made in the last N minutes,
+        The function waits for advancements in latest.log, checks for advancements made in the last N minutes,
         and sends notifications to subscribed users.
         Implements a cooldown to avoid spam.
     """
-    global advancements_notification_cooldown_until, advancements_first_run
+    global advancements_notification_cooldown_until
 
-    # Don't notify on the first run, if the bot was just restarted, we don't want to spam users
-    if advancements_first_run:
-        log.debug("Task notify_advancement: Skipping first run.")
-        advancements_first_run = False
-        return
+    # Sleep until the log tailer reads an advancement line
+    await advancements_wakeup.wait()
+    await asyncio.sleep(NOTIFY_BATCH_SEC)
 
     # Check if notifications are enabled
     if not cfg.config.notifications.advancements_enabled:
         log.debug("Task notify_advancement: Notifications are disabled.")
+        pending_advancements.clear()
         return
 
     # Check cooldown before proceeding
     now = datetime.datetime.now()
-    last_check_time = now - datetime.timedelta(minutes=cfg.config.notifications.check_last_min_advancements)# Calculate time 1 minute ago to filter logs
+    # Calculate time 1 minute ago to filter logs, and don't spam users with advancements from before a bot restart
+    last_check_ms = max(bot_started_ms, log_timestamp.now_ms() - cfg.config.notifications.check_last_min_advancements * 60000)
     if advancements_notification_cooldown_until and now < advancements_notification_cooldown_until:
         log.debug(f"Task notify_advancement: Skipping check. Notifications on cooldown until {advancements_notification_cooldown_until}.")
+        pending_advancements.clear()
         return
 
     log.debug("Task notify_advancement: Running Task")
-    advancements_regex = re.compile(r"^\[.*?\] \[.*?\] \[.*?/\]: \w+ has made the advancement \[.*?\]$")
-
-    # Read latest.log file
-    with open(cfg.config.minecraft.log_file_path, 'r', encoding='utf-8', errors='ignore') as log_file:
-        log_contents = log_file.readlines()
+    # Take the advancements read from latest.log since the last run
+    advancements = pending_advancements[:]
+    pending_advancements.clear()
     
     scanned_lines = 0
     detected_messages = []
-    for line in log_contents:
+    for event in advancements:
         # Check if the entry is within the last minute, if old, skip
-        log_timestamp =helpers.extract_timestamp(line)
-        if log_timestamp and log_timestamp < last_check_time:
-            # log.debug(f"Skipping old line from: {log_timestamp}") # Spammy
+        if event.ts_ms is not None and event.ts_ms < last_check_ms:
+            # log.debug(f"Skipping old line from: {event.timestamp}") # Spammy
             continue
         
-        # Search for advancements in the log line
-        # log.debug(f"Checking line: {line}")
-        advancements_match = advancements_regex.search(line)
-        if advancements_match:
-            log.debug(f"Task notify_advancement: Detected generic error in line: {line}")
-            useful_message = re.sub(r"^.*\[.*?\] \[.*?\] \[.*?/\]: ", "", line.strip())
-            detected_messages.append(useful_message)
+        log.debug(f"Task notify_advancement: Detected advancement in line: {event.line}")
+        detected_messages.append(event.message)
         scanned_lines += 1
         
     if detected_messages:
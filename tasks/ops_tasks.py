@@ -1,4 +1,4 @@
-import re
+import asyncio
 import datetime
 import discord
 from discord.ext import tasks
@@ -11,17 +11,27 @@ log = get_logger()
 
 import utility.ops_helpers as ops_helpers
 import utility.rcon_helpers as rcon_helpers
-
-
-@tasks.loop(seconds=cfg.config.bot.presence.update_interval_sec)
+import utility.daily_players as daily_players
+import utility.log_events as log_events
+import utility.metrics as metrics
+import utility.log_timestamp as log_timestamp
+
+
+# Log events that change the presence text wake the task right away, otherwise it refreshes
+# every update_interval_sec to notice the server going up or down and to count down the lag display
+presence_wakeup = log_events.Wakeup()
+for event_type in (log_events.LagEvent, log_events.OversizedChunkEvent, log_events.JoinEvent, log_events.LeaveEvent):
+    log_events.subscribe(event_type, presence_wakeup.set)
+log_events.subscribe_rotation(presence_wakeup.set)
+PRESENCE_MIN_INTERVAL_SEC = 5  # Discord rate limits presence updates, events never change it more often than this
+shown_status_message = None
+last_presence_change = 0.0  # Event loop time of the last change_presence
+
+@tasks.loop()
 async def update_bot_presence_task(bot):
-    last_lag_timestamp = None  # Timestamp of the last detected lag from the log
-    last_lag_ms = None  # Last lag value in milliseconds
+    global shown_status_message, last_presence_change
     lag_display_duration = 300  # 5 minutes in seconds
-
-    lag_line_regex = re.compile(
-        r'^\[(?P<datetime>\d{1,2}[A-Za-z]{3}\d{4} \d{2}:\d{2}:\d{2}\.\d+)] .*?Running (?P<ms>\d+)ms or \d+ ticks behind'
-    )
+    players = None
 
     try:
         # Check if the service is running without verifying the service file and reloading config every few seconds
@@ -39,59 +49,42 @@ async def update_bot_presence_task(bot):
             st.state.mc_players_ever = list(set(st.state.mc_players_ever) | set(players)) 
             st.state.mc_players_today = list(set(st.state.mc_players_today) | set(players)) 
             st.save_state()
+            daily_players.add_players(datetime.date.today(), players)
             
-            # Read the log file and check for external chunk saving or lag
-            with open(cfg.config.minecraft.log_file_path, 'r') as log_file:
-                log_contents = log_file.read()
-            globals.ext_chunk_count = len(re.findall(r'Saving oversized chunk', log_contents))
-
-            if globals.ext_chunk_count:
-                status_message = f"External chunks! ({globals.ext_chunk_count})"
-            else:
-                lines = log_contents.splitlines()
-                latest_lag_line = None
-
-                # Parse log lines for lag entries
-                for line in reversed(lines):
-                    match = lag_line_regex.match(line)
-                    if match:
-                        latest_lag_line = match
-                        break
-
-                if latest_lag_line:
-                    # Extract the log timestamp and lag value
-                    log_timestamp_str = latest_lag_line.group("datetime")
-                    log_timestamp = datetime.datetime.strptime(log_timestamp_str, "%d%b%Y %H:%M:%S.%f")
-                    lag_ms = int(latest_lag_line.group("ms"))
-
-                    # Update the lag status if the timestamp is newer
-                    if last_lag_timestamp is None or log_timestamp > last_lag_timestamp:
-                        last_lag_timestamp = log_timestamp
-                        last_lag_ms = lag_ms
-
-                    time_since_lag = (datetime.datetime.now() - last_lag_timestamp).total_seconds()
-                    if time_since_lag <= lag_display_duration:
-                        status_message = (
-                            f"{globals.player_count} players online ({last_lag_ms / 1000:.1f} sec behind, "
-                            f"{int(lag_display_duration - time_since_lag)} seconds remaining)"
-                        )
-                    else:
-                        # Lag display duration expired
-                        last_lag_timestamp = None
-                        last_lag_ms = None
-                        status_message = f"{globals.player_count} players online"
+            # External chunk and lag stats are kept up to date by the log session metrics
+            oversized_chunks = metrics.get(metrics.OVERSIZED_CHUNKS)
+            lag = metrics.get(metrics.LAG_MS)
+            if oversized_chunks.count:
+                status_message = f"External chunks! ({oversized_chunks.count})"
+            elif lag.last_ts_ms:
+                time_since_lag = (log_timestamp.now_ms() - lag.last_ts_ms) / 1000
+                if time_since_lag <= lag_display_duration:
+                    status_message = (
+                        f"{globals.player_count} players online ({lag.last / 1000:.1f} sec behind, "
+                        f"{int(lag_display_duration - time_since_lag)} seconds remaining)"
+                    )
                 else:
-                    # No lag detected in the latest logs
-                    last_lag_timestamp = None
-                    last_lag_ms = None
+                    # Lag display duration expired
                     status_message = f"{globals.player_count} players online"
+            else:
+                # No lag detected in the latest logs
+                status_message = f"{globals.player_count} players online"
 
     except Exception as e:
         log.error(f"Error updating status: {e}")
         status_message = "Server is offline"
     
-    # Update bot presence with the current status message
-    await bot.change_presence(activity=discord.Game(status_message))
+    # Update bot presence with the current status message, unless it is already shown
+    loop = asyncio.get_running_loop()
+    if status_message != shown_status_message:
+        await bot.change_presence(activity=discord.Game(status_message))
+        shown_status_message = status_message
+        last_presence_change = loop.time()
+
+    await presence_wakeup.wait(timeout=cfg.config.bot.presence.update_interval_sec)
+    # Woken by an event right after a change (e.g. every lag line updates the countdown): wait out the rest of the
+    # interval, the status is read again afterwards so the latest state is shown
+    await asyncio.sleep(max(0.0, last_presence_change + PRESENCE_MIN_INTERVAL_SEC - loop.time()))
 
 
 
@@ -0,0 +1,188 @@
+import asyncio
+import struct
+from typing import Dict, List, Optional
+
+from utility.logger import get_logger
+log = get_logger()
+
+# ──────────────────────────
+# asyncio RCON Client
+# ──────────────────────────
+# Source RCON protocol (https://wiki.vg/RCON) on asyncio streams, so a slow or hung server only
+# delays the coroutine waiting for it, never the event loop. A packet is
+#   int32 length, int32 request id, int32 type, body (ASCII/UTF-8), two NUL bytes
+# all little-endian. A single reader task reads every packet and hands its body to the request
+# with the same id, so late answers to timed-out requests are dropped instead of being mistaken
+# for the next answer.
+#
+# The vanilla/Forge server reads each packet with a single read() into a 1460 byte buffer and
+# drops the client if that read holds more or less than one packet. So only one packet may be
+# unanswered at a time: commands take turns (callers queue on a lock), and after a timeout the
+# connection is closed, since the server may still be busy and would read our next packet
+# together with whatever we send after it.
+#
+# The server splits responses over 4096 bytes into several packets without marking the last one.
+# A fragment shorter than 4096 bytes is the last one. After a full 4096 byte fragment an empty
+# SERVERDATA_RESPONSE_VALUE packet with its own id is sent: the server is done writing the command's
+# fragments by the time it reads it, so once that sentinel's answer arrives the response is complete.
+
+SERVERDATA_AUTH = 3
+SERVERDATA_AUTH_RESPONSE = 2
+SERVERDATA_EXECCOMMAND = 2
+SERVERDATA_RESPONSE_VALUE = 0
+
+PACKET_HEADER = struct.Struct("<iii")  # length, request id, type
+MAX_COMMAND_BYTES = 1446  # Longer requests are rejected by the server
+MAX_FRAGMENT_BYTES = 4096  # Response bodies are split into packets of this size
+
+
+class RconError(Exception):
+    pass
+
+
+class RconAuthError(RconError):
+    pass
+
+
+class _PendingCommand:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.fragments: List[bytes] = []
+        self.sentinel_id: Optional[int] = None
+        self.done = loop.create_future()
+
+    def finish(self):
+        if not self.done.done():
+            self.done.set_result(b"".join(self.fragments).decode("utf-8", errors="replace"))
+
+
+class AsyncRcon:
+    def __init__(self, host: str, port: int, password: str, timeout: float = 5.0):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._next_id = 1
+        self._pending: Dict[int, _PendingCommand] = {}    # Command request id -> its fragments
+        self._sentinels: Dict[int, int] = {}              # Sentinel request id -> command request id
+        self._auth: Optional[asyncio.Future] = None
+        self._turn = asyncio.Lock()  # One command at a time, see above
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and self._reader_task is not None and not self._reader_task.done()
+
+    def _request_id(self) -> int:
+        request_id = self._next_id
+        self._next_id = self._next_id + 1 if self._next_id < 0x7FFFFFFF else 1
+        return request_id
+
+    def _send(self, request_id: int, packet_type: int, body: str):
+        payload = body.encode("utf-8")
+        self._writer.write(PACKET_HEADER.pack(8 + len(payload) + 2, request_id, packet_type) + payload + b"\x00\x00")
+
+    # ─── Connection ───
+
+    async def connect(self):
+        """Opens the connection and logs in. Raises RconAuthError on a wrong password, OSError/TimeoutError if unreachable."""
+        self._reader, self._writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+        self._reader_task = asyncio.ensure_future(self._read_packets())
+        self._auth = asyncio.get_running_loop().create_future()
+        self._send(self._request_id(), SERVERDATA_AUTH, self.password)
+        try:
+            await self._writer.drain()
+            if not await asyncio.wait_for(asyncio.shield(self._auth), self.timeout):
+                raise RconAuthError("RCON login failed, check rcon.password in server.properties.")
+        except BaseException:
+            await self.close()
+            raise
+
+    async def close(self):
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (OSError, asyncio.CancelledError):
+                pass
+            self._writer = None
+        self._fail_pending(RconError("RCON connection closed."))
+
+    def _fail_pending(self, error: Exception):
+        for pending in self._pending.values():
+            if not pending.done.done():
+                pending.done.set_exception(error)
+        self._pending.clear()
+        self._sentinels.clear()
+        if self._auth is not None and not self._auth.done():
+            self._auth.set_exception(error)
+
+    async def _read_packets(self):
+        try:
+            while True:
+                header = await self._reader.readexactly(4)
+                (length,) = struct.unpack("<i", header)
+                data = await self._reader.readexactly(length)
+                request_id, packet_type = struct.unpack_from("<ii", data)
+                self._dispatch(request_id, packet_type, data[8:-2])
+        except (asyncio.IncompleteReadError, OSError) as e:
+            log.debug(f"RCON: Connection lost: {e}")
+            self._fail_pending(RconError("RCON connection lost."))
+            self._reader_task = None
+
+    def _dispatch(self, request_id: int, packet_type: int, body: bytes):
+        if self._auth is not None and not self._auth.done():
+            if packet_type == SERVERDATA_AUTH_RESPONSE:
+                self._auth.set_result(request_id != -1)
+            return  # Some servers send an empty RESPONSE_VALUE before the auth response
+        if request_id in self._sentinels:
+            pending = self._pending.get(self._sentinels.pop(request_id))
+            if pending is not None:
+                pending.finish()
+            return
+        pending = self._pending.get(request_id)
+        if pending is None:
+            return  # Answers a request that already timed out
+        pending.fragments.append(body)
+        if pending.sentinel_id is not None:
+            return  # More fragments, the sentinel's answer ends them
+        if len(body) < MAX_FRAGMENT_BYTES:
+            pending.finish()
+        else:
+            # Maybe more fragments follow, the server has written them all before it reads the sentinel
+            pending.sentinel_id = self._request_id()
+            self._sentinels[pending.sentinel_id] = request_id
+            self._send(pending.sentinel_id, SERVERDATA_RESPONSE_VALUE, "")
+
+    # ─── Commands ───
+
+    async def command(self, command: str, timeout: Optional[float] = None) -> str:
+        """
+        Runs a command and returns the server's full response. Concurrent calls wait for their turn.
+        Raises asyncio.TimeoutError (and closes the connection) if it doesn't arrive within timeout (default self.timeout),
+        RconError if the connection is down.
+        """
+        if len(command.encode("utf-8")) > MAX_COMMAND_BYTES:
+            raise RconError(f"RCON command is longer than {MAX_COMMAND_BYTES} bytes.")
+        async with self._turn:
+            if not self.connected:
+                raise RconError("RCON is not connected.")
+            request_id = self._request_id()
+            pending = _PendingCommand(asyncio.get_running_loop())
+            self._pending[request_id] = pending
+            self._send(request_id, SERVERDATA_EXECCOMMAND, command)
+            try:
+                await self._writer.drain()
+                return await asyncio.wait_for(pending.done, timeout if timeout is not None else self.timeout)
+            except asyncio.TimeoutError:
+                log.debug(f"RCON: No response to {command!r} in time, closing the connection.")
+                await self.close()
+                raise
+            finally:
+                self._pending.pop(request_id, None)
+                if pending.sentinel_id is not None:
+                    self._sentinels.pop(pending.sentinel_id, None)
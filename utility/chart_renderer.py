@@ -0,0 +1,186 @@
+import io
+import asyncio
+import datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utility.logger import get_logger
+log = get_logger()
+
+# ──────────────────────────
+# Chart Renderer Process
+# ──────────────────────────
+# matplotlib renders in a single worker process, so a chart never blocks the event loop
+# (heartbeats, presence, chat windows). The worker imports matplotlib and applies the dark style
+# once, and keeps one figure per size that is cleared and redrawn for every chart.
+# Commands prepare the data (lists of numbers and labels) and await the PNG bytes:
+#   png = await chart_renderer.render(chart_renderer.render_player_count, dates, counts, path)
+# The worker is spawned (not forked) so it doesn't inherit the bot's event loop and sockets.
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+        )
+    return _executor
+
+
+def start():
+    """Starts the worker and imports matplotlib in it, so the first chart doesn't pay for that"""
+    get_executor().submit(warm_up)
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def render(func: Callable[..., bytes], *args) -> bytes:
+    """Runs one of the render_* functions below in the worker process and returns the PNG bytes"""
+    global _executor
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_executor(), func, *args)
+    except BrokenProcessPool:
+        # The worker died (e.g. killed for memory), start a new one and try once more
+        log.warning("ChartRenderer: Worker process died, restarting it.")
+        _executor = None
+        return await loop.run_in_executor(get_executor(), func, *args)
+
+
+# ──────────────────────────
+# Worker Side
+# ──────────────────────────
+plt = None
+mticker = None
+_figures: Dict[Tuple[int, int], tuple] = {}  # figsize -> (figure, axes)
+
+
+def init_worker():
+    global plt, mticker
+    import matplotlib
+    matplotlib.use("Agg")  # Use a non-GUI backend
+    import matplotlib.pyplot
+    import matplotlib.ticker
+    plt = matplotlib.pyplot
+    mticker = matplotlib.ticker
+    plt.style.use("dark_background")
+
+
+def warm_up():
+    if plt is None:
+        init_worker()
+    _axes((10, 4))
+    _axes((12, 4))
+
+
+def _axes(figsize: Tuple[int, int]):
+    """Returns the reused figure and axes of this size, cleared for the next chart"""
+    if figsize not in _figures:
+        figure = plt.figure(figsize=figsize)
+        _figures[figsize] = (figure, figure.add_subplot())
+    figure, ax = _figures[figsize]
+    ax.clear()
+    return figure, ax
+
+
+def _save(figure, path: str) -> bytes:
+    figure.tight_layout()
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png")
+    png = buffer.getvalue()
+    with open(path, "wb") as f:
+        f.write(png)
+    return png
+
+
+def render_player_count(dates: List[str], max_counts: List[int], path: str) -> bytes:
+    """
+    Plots the daily max player counts as a column chart (bar chart) with a dark theme.
+    Args:
+        dates: Days as "YYYY-MM-DD", oldest first.
+        max_counts: Max players online on each day.
+        path: Where to save the PNG.
+    """
+    if plt is None:
+        init_worker()
+    figure, ax = _axes((10, 4))
+    days = [datetime.datetime.strptime(date, "%Y-%m-%d") for date in dates]
+
+    # Format the dates into the desired format: "short_weekday DD.MM"
+    formatted_dates = [day.strftime("%d.%m %a") for day in days]
+    bars = ax.bar(formatted_dates, max_counts, color="#00b0f4", label="Daily Max Players", zorder=3)
+
+    # Set the title, labels, and color them white
+    ax.set_title("Daily Max Player Count", color="white")
+    ax.set_xlabel(f"Date ({datetime.datetime.now().year})", color="white")
+    ax.set_ylabel("Players Online", color="white")
+
+    # Rotate x-ticks for readability, force y-axis ticks to integers
+    ax.tick_params(axis="x", labelrotation=45, colors="white")
+    ax.tick_params(axis="y", colors="white")
+    ax.yaxis.set_major_locator(mticker.MaxNLocator(integer=True))
+
+    # Offset the x-tick labels to align better with the ticks
+    for label in ax.get_xticklabels():
+        label.set_ha("right")
+        label.set_position((0.09, 0))
+
+    # Sundays: red labels and slightly darker blue bars
+    for label, bar, day in zip(ax.get_xticklabels(), bars, days):
+        if day.weekday() == 6:
+            label.set_color("salmon")
+            bar.set_color("#005f99")
+
+    # Grid (light gray for contrast), legend with a Discord-like dark gray background
+    ax.grid(True, color="gray", alpha=0.3)
+    ax.legend(facecolor="#2f3136", edgecolor="none")
+    return _save(figure, path)
+
+
+def render_lag(lag_data: List[float], p95_data: List[float], tick_positions: List[int], tick_labels: List[str],
+               bucket_name: str, window: str, path: str) -> bytes:
+    """
+    Plots seconds of lag per bucket as bars and the p95 sec behind of each bucket as a line.
+    Args:
+        lag_data: Seconds behind per bucket, oldest first.
+        p95_data: p95 seconds behind per bucket.
+        tick_positions: Bucket indexes that get a time label.
+        tick_labels: The time labels ("3h ago", ..., "Now").
+        bucket_name: Bucket size for the legend, e.g. "minute".
+        window: Window for the title, e.g. "3h".
+        path: Where to save the PNG.
+    """
+    if plt is None:
+        init_worker()
+    figure, ax = _axes((12, 4))
+    bar_count = len(lag_data)
+
+    ax.bar(range(bar_count), lag_data, color="#ff4500", label=f"Lag per {bucket_name} (seconds)", zorder=3)
+    ax.plot(range(bar_count), p95_data, color="#ffd700", linewidth=1, label="p95 sec behind", zorder=4)
+
+    # Set major ticks (time labels) and minor ticks (every bucket)
+    ax.set_xticks(tick_positions)
+    ax.set_xticklabels(tick_labels, rotation=45, color="white")
+    ax.set_xticks(range(bar_count), minor=True)
+    ax.tick_params(axis="x", which="minor", length=3, color="gray")  # Small ticks for each bucket
+
+    ax.tick_params(axis="y", colors="white")
+    ax.set_xlabel("Time", color="white")
+    ax.set_ylabel("Seconds of Lag", color="white")
+    ax.set_title(f"Running Behind Errors (last {window})", color="white")
+
+    # Grid and legend
+    ax.grid(True, color="gray", alpha=0.3)
+    ax.legend(facecolor="#2f3136", edgecolor="none")
+    return _save(figure, path)
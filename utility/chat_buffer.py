@@ -0,0 +1,96 @@
+import gzip
+import asyncio
+import collections
+
+import config.config as cfg
+from utility.logger import get_logger
+log = get_logger()
+
+import utility.log_events as log_events
+import utility.log_index as log_index
+import utility.log_timestamp as log_timestamp
+
+# ──────────────────────────
+# Recent Chat Ring Buffer
+# ──────────────────────────
+# Holds the last few chat lines in memory so chat windows never have to search the logs.
+# Seeded once at startup from the sidecars of the newest archived logs, then fed by ChatEvents from latest.log.
+
+recent_chat = collections.deque(maxlen=cfg.config.bot.chat.history_lines)  # (timestamp, message), oldest first
+version = 0  # Bumped on every new line, lets chat windows skip edits when nothing changed
+chat_wakeup = log_events.Wakeup()  # Chat windows sleep on this until a new line arrives
+
+
+def on_chat(event: log_events.ChatEvent):
+    global version
+    recent_chat.append((event.timestamp, event.message))
+    version += 1
+    chat_wakeup.set()
+
+log_events.subscribe(log_events.ChatEvent, on_chat)
+
+
+def read_archive_chat(path: str) -> list:
+    """Returns all (timestamp, message) chat lines in an archived .log.gz, oldest first"""
+    chat = []
+    with gzip.open(path, "rt", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            if log_events.MESSAGE_SEPARATOR not in line:
+                continue
+            event = log_events.classify(line)
+            if isinstance(event, log_events.ChatEvent):
+                chat.append((event.timestamp, event.message))
+    return chat
+
+
+def collect_archive_chat(limit: int) -> list:
+    """
+    Takes chat lines from the sidecars of archived logs, newest first, until `limit` are found.
+    Returns:
+        list: Up to `limit` (timestamp, message) chat lines, oldest first.
+    """
+    collected = []
+    for path in reversed(log_index.list_archives()):
+        sidecar = log_index.get_sidecar(path)
+        if sidecar is None:
+            continue
+        chat = [(log_timestamp.ms_to_datetime(ts_ms) if ts_ms is not None else None, message) for ts_ms, message in sidecar["chat_tail"]]
+        if len(chat) < min(sidecar["chat_count"], limit - len(collected)):
+            # The sidecar keeps fewer lines than needed (chat.history_lines was raised), read the archive itself
+            try:
+                chat = read_archive_chat(path)
+            except (OSError, EOFError) as e:
+                log.warning(f"ChatBuffer: Could not read {path}: {e}")
+        collected = chat + collected
+        if len(collected) >= limit:
+            break
+    return collected[-limit:]
+
+
+async def seed_from_archives():
+    """
+    Fills the buffer with the newest chat lines from archived logs, once at startup.
+    Lines that already arrived from latest.log are newer and stay at the end.
+    """
+    global version
+    free = recent_chat.maxlen - len(recent_chat)
+    if free <= 0:
+        return
+    loop = asyncio.get_running_loop()
+    archived = await loop.run_in_executor(None, collect_archive_chat, free)
+    # Chat from latest.log may have arrived while the archives were read, appendleft on a full
+    # deque would push those newer lines out, so only fill the room that is left
+    free = recent_chat.maxlen - len(recent_chat)
+    seeded = archived[-free:] if free > 0 else []
+    for line in reversed(seeded):
+        recent_chat.appendleft(line)
+    version += 1
+    log.debug(f"ChatBuffer: Seeded {len(seeded)} chat lines from archived logs.")
+
+
+def get_recent_chat(limit: int) -> list:
+    """Returns the last `limit` (timestamp, message) chat lines, oldest first"""
+    if limit >= len(recent_chat):
+        return list(recent_chat)
+    # deque indexing is O(1) near the ends, only touch the last `limit` entries
+    return [recent_chat[i] for i in range(len(recent_chat) - limit, len(recent_chat))]
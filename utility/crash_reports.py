@@ -0,0 +1,68 @@
+import os
+from typing import List, Optional
+
+import config.config as cfg
+from utility.logger import get_logger
+log = get_logger()
+
+import utility.log_watcher as log_watcher
+
+# ──────────────────────────
+# Crash Report Times
+# ──────────────────────────
+# /status shows when the server last crashed. The times are read from the header of each
+# crash report once and cached until the log watcher sees crash-reports/ change.
+
+HEADER_LINES = 4  # "Time: 2025-01-19 20:04:15" is on one of the first lines of a report
+
+_crash_times: Optional[List[str]] = None  # Cached "YYYY-MM-DD HH:MM:SS" of all reports, oldest first
+
+
+def read_crash_time(path: str) -> Optional[str]:
+    """Returns the 'Time:' value from the header of a crash report, or None"""
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for _ in range(HEADER_LINES):
+            line = f.readline()
+            if line.startswith("Time: "):
+                # "Time: 2025-01-19 20:04:15 CET" -> "2025-01-19 20:04:15"
+                return " ".join(line.split()[1:3])
+    return None
+
+
+def read_crash_times() -> List[str]:
+    crash_dir = cfg.config.minecraft.crash_reports_dir
+    try:
+        names = sorted(os.listdir(crash_dir))  # crash-<date>_<time>-server.txt, so oldest first
+    except FileNotFoundError:
+        return []
+    times = []
+    for name in names:
+        path = os.path.join(crash_dir, name)
+        if not os.path.isfile(path):
+            continue
+        try:
+            crash_time = read_crash_time(path)
+        except OSError as e:
+            log.warning(f"CrashReports: Could not read {path}: {e}")
+            continue
+        if crash_time:
+            times.append(crash_time)
+    return times
+
+
+def get_recent_crash_times(limit: int = 10) -> List[str]:
+    """Returns the times of the last `limit` crash reports, oldest first"""
+    global _crash_times
+    if _crash_times is None:
+        _crash_times = read_crash_times()
+    return _crash_times[-limit:]
+
+
+def on_crash_reports_changed(name: Optional[str]):
+    """Log watcher callback, a new or changed crash report invalidates the cache"""
+    global _crash_times
+    if _crash_times is not None:
+        log.debug(f"CrashReports: {name or 'crash-reports/'} changed, re-reading crash times on next use.")
+    _crash_times = None
+
+log_watcher.watch(cfg.config.minecraft.crash_reports_dir, on_crash_reports_changed)
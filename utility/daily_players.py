@@ -0,0 +1,165 @@
+import os
+import json
+import asyncio
+import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+import config.config as cfg
+from utility.logger import get_logger
+log = get_logger()
+
+import utility.log_events as log_events
+import utility.log_index as log_index
+import utility.log_timestamp as log_timestamp
+
+# ──────────────────────────
+# Unique Players Per Day
+# ──────────────────────────
+# Keeps the set of players who joined on each day, keyed by local date ("2025-01-19").
+# Fed by JoinEvents from latest.log and backfilled from the sidecars of archived logs,
+# so "today", "yesterday" or "last N days" never have to search the logs.
+# Persisted to stats.daily_players_path as:
+#   {"days": {"2025-01-19": ["jonemartin", ...]}, "backfilled_archives": ["2025-01-19-1.log.gz", ...]}
+
+players_by_day: Dict[str, Set[str]] = {}
+backfilled_archives: Set[str] = set()  # Archives whose sidecars were merged into players_by_day
+_loaded = False
+
+
+def day_key(day: datetime.date) -> str:
+    return day.strftime("%Y-%m-%d")
+
+
+def load():
+    global _loaded
+    _loaded = True
+    try:
+        with open(cfg.config.stats.daily_players_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError) as e:
+        log.error(f"DailyPlayers: Failed to load {cfg.config.stats.daily_players_path}: {e}")
+        return
+    for day, players in data.get("days", {}).items():
+        players_by_day.setdefault(day, set()).update(players)
+    backfilled_archives.update(data.get("backfilled_archives", []))
+
+
+def save():
+    path = cfg.config.stats.daily_players_path
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "days": {day: sorted(players) for day, players in sorted(players_by_day.items())},
+                    "backfilled_archives": sorted(backfilled_archives),
+                },
+                f,
+            )
+        os.replace(temp_path, path)
+    except OSError as e:
+        log.error(f"DailyPlayers: Failed to save {path}: {e}")
+
+
+def _ensure_loaded():
+    if not _loaded:
+        load()
+
+
+def add_players(day: datetime.date, players: Iterable[str]) -> bool:
+    """
+    Records that players were online on day.
+    Returns:
+        bool: True if any of them was new for that day (and the file was saved).
+    """
+    _ensure_loaded()
+    day_players = players_by_day.setdefault(day_key(day), set())
+    before = len(day_players)
+    day_players.update(players)
+    if len(day_players) == before:
+        return False
+    save()
+    return True
+
+
+def players_on(day: datetime.date) -> Set[str]:
+    """Returns the players who joined on day"""
+    _ensure_loaded()
+    return players_by_day.get(day_key(day), set())
+
+
+def players_last_days(days: int) -> Set[str]:
+    """Returns the unique players who joined in the last `days` days, today included"""
+    _ensure_loaded()
+    today = datetime.date.today()
+    unique = set()
+    for offset in range(days):
+        unique |= players_by_day.get(day_key(today - datetime.timedelta(days=offset)), set())
+    return unique
+
+
+def on_join(event: log_events.JoinEvent):
+    day = log_timestamp.ms_to_datetime(event.ts_ms).date() if event.ts_ms is not None else datetime.date.today()
+    add_players(day, [event.player])
+
+log_events.subscribe(log_events.JoinEvent, on_join)
+
+
+# ──────────────────────────
+# Backfill From Archives
+# ──────────────────────────
+def collect_archive_joins(skip_archives: Set[str]) -> Dict[str, List[tuple]]:
+    """
+    Reads join events from the sidecars of archives not in skip_archives. Blocking.
+    Returns:
+        dict: archive name -> [(day_key, player), ...]
+    """
+    joins = {}
+    for archive_path in log_index.list_archives():
+        name = os.path.basename(archive_path)
+        if name in skip_archives:
+            continue
+        sidecar = log_index.get_sidecar(archive_path)
+        if sidecar is None:
+            continue
+        joins[name] = [
+            (day_key(log_timestamp.ms_to_datetime(ts_ms).date()), player)
+            for ts_ms, kind, player in sidecar["sessions"]
+            if kind == "join" and ts_ms is not None
+        ]
+    return joins
+
+
+async def backfill_from_archives():
+    """Merges the join events of archived logs that were not backfilled yet"""
+    _ensure_loaded()
+    loop = asyncio.get_running_loop()
+    try:
+        joins = await loop.run_in_executor(None, collect_archive_joins, set(backfilled_archives))
+    except Exception as e:
+        log.error(f"DailyPlayers: Backfill failed: {e}")
+        return
+    if not joins:
+        return
+    for name, archive_joins in joins.items():
+        for day, player in archive_joins:
+            players_by_day.setdefault(day, set()).add(player)
+        backfilled_archives.add(name)
+    save()
+    log.info(f"DailyPlayers: Backfilled unique players from {len(joins)} archived logs.")
+
+
+_backfill_task: Optional[asyncio.Task] = None
+
+
+def request_backfill():
+    """Log index callback, new sidecars may have joins that aren't recorded yet"""
+    global _backfill_task
+    if _backfill_task is not None and not _backfill_task.done():
+        return  # Anything it misses is picked up after the next indexing run
+    _backfill_task = asyncio.ensure_future(backfill_from_archives())
+
+log_index.indexed_subscribers.append(request_backfill)
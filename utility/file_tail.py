@@ -0,0 +1,53 @@
+import os
+import asyncio
+from typing import List
+
+# ──────────────────────────
+# Reverse Tail Reader
+# ──────────────────────────
+# Reads the last N lines of a file by reading fixed-size blocks backwards from the end,
+# so time and memory depend on N and the line lengths, not on the size of the file.
+# Useful for debug.log, which can grow to several GB on Forge.
+
+BLOCK_BYTES = 64 * 1024          # Bytes read per backwards step
+MAX_TAIL_BYTES = 4 * 1024 * 1024  # Never read more than this per call, even if the lines are very long
+
+
+def tail_lines(path: str, line_count: int, max_bytes: int = MAX_TAIL_BYTES) -> List[str]:
+    """
+    Returns the last line_count lines of a file, with line endings kept.
+    Blocking, use async_tail_lines from coroutines.
+    Args:
+        path (str): File to read.
+        line_count (int): Number of lines wanted.
+        max_bytes (int): Upper bound on bytes read. Fewer lines are returned if they don't fit.
+    Returns:
+        List[str]: Up to line_count lines, oldest first.
+    """
+    if line_count <= 0:
+        return []
+    with open(path, "rb") as file:
+        file.seek(0, os.SEEK_END)
+        end = file.tell()
+        position = end
+        blocks = []
+        newlines = 0
+        # One newline more than lines wanted, so the oldest line is known to be complete
+        while position > 0 and newlines <= line_count and end - position < max_bytes:
+            size = min(BLOCK_BYTES, position, max_bytes - (end - position))
+            position -= size
+            file.seek(position)
+            block = file.read(size)
+            blocks.append(block)
+            newlines += block.count(b"\n")
+
+    lines = b"".join(reversed(blocks)).decode("utf-8", errors="ignore").splitlines(keepends=True)
+    if position > 0 and lines:
+        lines = lines[1:]  # Started reading mid-line, drop the partial line
+    return lines[-line_count:]
+
+
+async def async_tail_lines(path: str, line_count: int, max_bytes: int = MAX_TAIL_BYTES) -> List[str]:
+    """Runs tail_lines in a thread so large files never block the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, tail_lines, path, line_count, max_bytes)
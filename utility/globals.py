@@ -4,7 +4,6 @@
 # Global
 # ──────────────────────────
 player_count = 0
-ext_chunk_count = 0
 # ──────────────────────────
 # Single Chat Window *per channel*
 # ──────────────────────────
@@ -15,5 +14,3 @@ ext_chunk_count = 0
 #       "task": asyncio.Task
 #   }
 chat_windows = {}
-
-lag_history = []  # Stores lag seconds per minute
@@ -1,20 +1,19 @@
 import os
 import re
-import subprocess
 import asyncio
 import datetime
-import csv
 import discord
 
-import matplotlib
-matplotlib.use('Agg')  # Use a non-GUI backend
-import matplotlib.pyplot as plt
-import matplotlib.ticker as mticker
-
 import config.config as cfg
 from utility.logger import get_logger
 log = get_logger()
 import utility.globals as globals
+import utility.chat_buffer as chat_buffer
+import utility.lag_tiers as lag_tiers
+import utility.player_stats as player_stats
+import utility.render_cache as render_cache
+import utility.chart_renderer as chart_renderer
+import utility.log_timestamp as log_timestamp
 
 import tasks.background_tasks as tasks
 
@@ -80,189 +79,97 @@ def update_csv_player_count():
         else:
             count_to_log = globals.player_count
 
-        # Prepare CSV row data
-        # Example: 2025-01-19 20:45, 5
-        now = datetime.datetime.now()
-        timestamp = now.strftime("%Y-%m-%d %H:%M")
-        row = [timestamp, count_to_log]
+        # Append the sample to the player count history
+        player_stats.record_player_count(count_to_log)
 
-        # Write (or append) to the CSV
-        write_player_count_csv(row)
 
-def write_player_count_csv(row):
+async def generate_player_count_graph(graph_window_days = 30) -> bytes:
     """
-    Appends a single row [timestamp, player_count] to STAT_CSV_PATH.
-    If the file doesn't exist, writes a header first.
+    Returns the PNG of the daily max player count chart, also saved to PLAYER_COUNT_PNG.
+    Only rendered again when a daily max changed or a new day started, otherwise the cached PNG is returned.
     """
-    log.debug(f"Writing row to {cfg.config.stats.csv_path}: {row}")  # Debug
-    file_exists = os.path.isfile(cfg.config.stats.csv_path)
-
-    with open(cfg.config.stats.csv_path, mode="a", newline="", encoding="utf-8") as csvfile:
-        writer = csv.writer(csvfile)
-
-        # If it's a new file, write a header
-        if not file_exists:
-            writer.writerow(["Timestamp", "PlayerCount"])
-
-        # Append our new row
-        writer.writerow(row)
+    version = (player_stats.daily_max_version, datetime.date.today())
+    return await render_cache.get_or_render(
+        "players", str(graph_window_days), version,
+        lambda: render_player_count_graph(graph_window_days)
+    )
 
 
-def generate_player_count_graph(graph_window_days = 30):
+async def render_player_count_graph(graph_window_days = 30) -> bytes:
     """
-    Reads the CSV (Timestamp, PlayerCount), groups by day to calculate daily max,
-    and plots a column chart (bar chart) saved to PLAYER_COUNT_PNG with a dark theme.
+    Reads the daily max player count rollups (one point per day, no raw samples)
+    and renders them as a column chart in the chart renderer process.
     """
     
-    daily_counts = {}
-
-    # 1) Read the CSV data
-    if not os.path.isfile(cfg.config.stats.csv_path):
-        log.warning("No CSV found to plot.")
-        return
-
-    with open(cfg.config.stats.csv_path, mode="r", encoding="utf-8") as csvfile:
-        reader = csv.reader(csvfile)
-        header = next(reader, None)  # Skip header row if present
-        for row in reader:
-            if len(row) < 2:
-                continue
-            timestamp_str, count_str = row[0], row[1]
-            try:
-                # Skip data older than a month
-                if (datetime.datetime.now() - datetime.datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M")).days > graph_window_days:
-                    continue
-                dt = datetime.datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M")
-                count = int(count_str)
-            except ValueError:
-                continue
-
-            # Group by date (YYYY-MM-DD) and calculate daily max
-            date_str = dt.strftime("%Y-%m-%d")
-            if date_str not in daily_counts:
-                daily_counts[date_str] = count
-            else:
-                daily_counts[date_str] = max(daily_counts[date_str], count)
+    # 1) Read the daily rollups of the last graph_window_days days
+    daily_counts = {
+        rollup.day.strftime("%Y-%m-%d"): rollup.max_players
+        for rollup in player_stats.daily_rollups(graph_window_days + 1)
+    }
 
     # Ensure today's date is included in the plot
     today = datetime.datetime.now().strftime("%Y-%m-%d")
     if today not in daily_counts:
         daily_counts[today] = 0  # Assume 0 players for today if no data exists
 
-    if not daily_counts:
-        log.warning("No data in CSV to plot.")
-        return
-
     # 2) Prepare data for plotting
     dates = sorted(daily_counts.keys())  # Ensure dates are sorted
     max_counts = [daily_counts[date] for date in dates]
 
-    # Format the dates into the desired format: "short_weekday DD.MM"
-    formatted_dates = [
-        datetime.datetime.strptime(date, "%Y-%m-%d").strftime("%d.%m %a")
-        for date in dates
-    ]
-
-    # 3) Use a dark style for Discord
-    plt.style.use('dark_background')
-
-    plt.figure(figsize=(10, 4))
-    plt.bar(formatted_dates, max_counts, color="#00b0f4", label="Daily Max Players", zorder=3)
-
-    # 4) Set the title, labels, and color them white
-    plt.title("Daily Max Player Count", color="white")
-    plt.xlabel(f"Date ({datetime.datetime.now().year})", color="white")
-    plt.ylabel("Players Online", color="white")
+    # 3) Render off the event loop
+    png = await chart_renderer.render(chart_renderer.render_player_count, dates, max_counts, cfg.config.stats.player_count_png)
+    log.info(f"Saved bar chart to {cfg.config.stats.player_count_png}.")
+    return png
 
-    # Rotate x-ticks for readability
-    plt.xticks(rotation=45, color="white")
 
-    # Force y-axis ticks to integers
-    ax = plt.gca()
-    ax.yaxis.set_major_locator(mticker.MaxNLocator(integer=True))
-    plt.yticks(color="white")
 
-    # Offset the x-tick labels to align better with the ticks
-    for label in ax.get_xticklabels():
-        label.set_ha('right')  # Horizontal alignment (use 'left' or 'center')
-        label.set_position((0.09, 0))  # Adjust x and y offset 
-    
-    # Change the color of Sunday labels to red
-    for label, date in zip(ax.get_xticklabels(), dates):
-        if datetime.datetime.strptime(date, "%Y-%m-%d").weekday() == 6:  # 6 is Sunday
-            label.set_color("salmon")
-    # Change the color of Sunday bars to a slightly darker blue
-    for bar, date in zip(ax.patches, dates):
-        if datetime.datetime.strptime(date, "%Y-%m-%d").weekday() == 6:  # 6 is Sunday
-            bar.set_color("#005f99")  # Slightly darker blue
-
-    # Add a grid (light gray for contrast)
-    plt.grid(True, color="gray", alpha=0.3)
-
-    # Legend with a Discord-like dark gray background
-    plt.legend(facecolor="#2f3136", edgecolor="none")
-
-    plt.tight_layout()
-    plt.savefig(cfg.config.stats.player_count_png)
-    plt.close()
-    log.info(f"Saved bar chart to {cfg.config.stats.player_count_png}.")
+LAG_GRAPH_WINDOWS = {"3h": 3 * 3600, "24h": 24 * 3600, "7d": 7 * 24 * 3600, "30d": 30 * 24 * 3600}
+LAG_GRAPH_MAX_BARS = 200
 
+async def generate_lag_graph(window: str = "3h") -> bytes:
+    """
+    Returns the PNG of the lag chart, also saved to LAG_PNG.
+    Only rendered again when a lag event arrived or the newest bucket moved on, otherwise the cached PNG is returned.
+    """
+    tier = lag_tiers.tier_for(LAG_GRAPH_WINDOWS[window], LAG_GRAPH_MAX_BARS)
+    version = (lag_tiers.version, log_timestamp.now_ms() // 1000 // tier.bucket_sec)
+    return await render_cache.get_or_render("lag", window, version, lambda: render_lag_graph(window))
 
 
-def generate_lag_graph():
+async def render_lag_graph(window: str = "3h") -> bytes:
     """
-    Plots a bar chart of lag data from globals.lag_history,
-    showing seconds of lag per minute over time.
-    The X-axis represents time in hours ago format.
+    Renders a bar chart of lag data from the multi-resolution lag history in the chart renderer process,
+    showing seconds of lag per bucket (1 min, 10 min or 1 hour, depending on the window)
+    and the p95 ms behind of each bucket as a line.
+    The X-axis represents time in hours/days ago format.
     The Y-axis represents lag in seconds.
     """
+    window_sec = LAG_GRAPH_WINDOWS[window]
+    tier = lag_tiers.tier_for(window_sec, LAG_GRAPH_MAX_BARS)
+    buckets = lag_tiers.recent_buckets(window_sec, tier)
+    bar_count = len(buckets)
 
     now = datetime.datetime.now()
-    MAX_MINUTES = 180  # Rolling window of last 6 hours
-
-    # Ensure a full 6-hour window (one timestamp per minute)
-    timestamps = [now - datetime.timedelta(minutes=i) for i in range(MAX_MINUTES)][::-1]
-
-    # Ensure lag data has 360 values (older data pushed left, new data added)
-    lag_data = ([0] * (MAX_MINUTES - len(globals.lag_history))) + globals.lag_history[-MAX_MINUTES:]
-
-    # Use a dark theme
-    plt.style.use("dark_background")
-
-    plt.figure(figsize=(12, 4))
-    plt.bar(range(MAX_MINUTES), lag_data, color="#ff4500", label="Lag (seconds)", zorder=3)
-
-    # Format timestamps for major ticks (every hour)
-    def format_time(ts):
-        delta = now - ts
-        hours_ago = int(delta.total_seconds() // 3600)
-        return "Now" if ts >= now - datetime.timedelta(minutes=1) else f"{hours_ago +1}h ago"
-
-    tick_positions = list(range(0, MAX_MINUTES, 60)) + [MAX_MINUTES - 1]  # Every hour + "Now" at the last position
-    tick_labels = [format_time(timestamps[i]) for i in tick_positions]
-
-    ax = plt.gca()
-
-    # Set major ticks (hourly labels) and minor ticks (every minute)
-    ax.set_xticks(tick_positions)
-    ax.set_xticklabels(tick_labels, rotation=45, color="white")
-
-    ax.set_xticks(range(MAX_MINUTES), minor=True)
-    ax.tick_params(axis="x", which="minor", length=3, color="gray")  # Small ticks for each minute
-
-    plt.yticks(color="white")
-    plt.xlabel("Time", color="white")
-    plt.ylabel("Seconds of Lag", color="white")
-    plt.title("Running Behind Errors", color="white")
-
-    # Grid and legend
-    plt.grid(True, color="gray", alpha=0.3)
-    plt.legend(facecolor="#2f3136", edgecolor="none")
-
-    plt.tight_layout()
-    plt.savefig(cfg.config.stats.lag_png)
-    plt.close()
+    lag_data = [bucket.sum_ms / 1000 for bucket in buckets]  # Convert ms to seconds
+    p95_data = [bucket.p95_ms / 1000 for bucket in buckets]
+
+    # Format timestamps for major ticks (hours ago up to a day, days ago beyond)
+    unit_sec = 3600 if window_sec <= 24 * 3600 else 24 * 3600
+    unit = "h" if unit_sec == 3600 else "d"
+    def format_time(bucket):
+        age_sec = (now - datetime.datetime.fromtimestamp(bucket.start_sec)).total_seconds()
+        return "Now" if age_sec < tier.bucket_sec else f"{int(age_sec // unit_sec) + 1}{unit} ago"
+
+    tick_step = max(1, bar_count // 8)
+    tick_positions = list(range(0, bar_count - tick_step // 2, tick_step)) + [bar_count - 1]  # Evenly spaced + "Now" at the last position
+    tick_labels = [format_time(buckets[i]) for i in tick_positions]
+
+    png = await chart_renderer.render(
+        chart_renderer.render_lag,
+        lag_data, p95_data, tick_positions, tick_labels, tier.name, window, cfg.config.stats.lag_png
+    )
     log.info(f"Saved lag chart to {cfg.config.stats.lag_png}.")
+    return png
     
 
 # ──────────────────────────
@@ -311,85 +218,17 @@ async def post_or_refresh_chat_window(bot, channel: discord.abc.Messageable):
 
 def get_recent_chat_lines(limit=10):
     """
-    - Gathers lines from *.log / *.log.gz (excluding debug logs).
-    - Extracts the date/time from each line (e.g. "[19Jan2025 20:04:15.335]").
-    - Sorts all matching lines chronologically by that datetime.
-    - Returns the last `limit` lines, each formatted as "HH:MM <chat>".
+    - Takes the last `limit` chat lines from the in-memory chat buffer.
+    - Returns them each formatted as "HH:MM <chat>".
     """
-    # Matches lines containing <Name>, [Rcon], or [Server]
-    chat_pattern = r'Server thread/INFO\] \[net\.minecraft\.server\.MinecraftServer/\]: (\[Rcon\]|<|\[Server\])'
-
-    # Full pattern to parse date/time:
-    # e.g., [19Jan2025 20:04:15.335] [Server thread/INFO] ...
-    # We'll capture group(1) as "19Jan2025 20:04:15.335"
-    # Later we'll parse that into a datetime object
-    full_line_regex = re.compile(
-        r'^\[(?P<date>[\d]{1,2}[A-Za-z]{3}\d{4}\s+\d{2}:\d{2}:\d{2}\.\d+)\]\s.*MinecraftServer/\]:\s+(?P<chat>.*)$'
-    )
-
-    try:
-        # 1) Build file list for *.log* (including .log.gz), excluding debug
-        logs_cmd = f'ls -1 "{cfg.config.minecraft.logs_dir}"/*.log* 2>/dev/null || true'
-        logs_list = subprocess.check_output(logs_cmd, shell=True).decode(errors="ignore").split()
-
-        # Exclude debug logs
-        filtered_logs = [f for f in logs_list if "debug" not in os.path.basename(f).lower()]
-        if not filtered_logs:
-            return ["No recent chat lines found (no suitable log files)."]
-
-        # 2) zgrep lines matching chat_pattern from all these logs
-        #    We won't pipe to `tail` here because we need to parse and globally sort.
-        file_paths = " ".join(f'"{path}"' for path in filtered_logs)
-        grep_cmd = f'zgrep -Eh "{chat_pattern}" {file_paths}'
-        raw_output = subprocess.check_output(grep_cmd, shell=True, stderr=subprocess.DEVNULL).decode(errors="ignore")
-
-        if not raw_output.strip():
-            return ["No recent chat lines found."]
-    except subprocess.CalledProcessError:
+    lines = chat_buffer.get_recent_chat(limit)
+    if not lines:
         return ["No recent chat lines found."]
-    except Exception as e:
-        return [f"Error retrieving chat lines: {e}"]
-
-    # 3) Parse each line, extracting date/time + chat text
-    lines_with_dt = []
-    for line in raw_output.splitlines():
-        m = full_line_regex.match(line)
-        if not m:
-            # If the line doesn't match exactly, skip or do a fallback
-            # We'll do a fallback parse that tries to remove the prefix
-            fallback_chat = re.sub(r'^.*MinecraftServer/\]:\s+', '', line).strip()
-            # We'll store "None" for dt so we can still keep the line if needed
-            lines_with_dt.append((None, fallback_chat))
-            continue
-
-        date_str = m.group("date")   # e.g. "19Jan2025 20:04:15.335"
-        chat_msg = m.group("chat")   # e.g. "[Rcon]  jonshard: test5"
-
-        # 4) Convert date_str into a Python datetime. For example "19Jan2025 20:04:15.335"
-        #    We'll parse "DDMonYYYY HH:MM:SS.mmm"
-        #    Example format: "19Jan2025 20:04:15.335"
-        try:
-            # Build a datetime format string: day(2) abbreviated month(3) year(4) hour(2):minute(2):second(2).millis
-            dt = datetime.datetime.strptime(date_str, "%d%b%Y %H:%M:%S.%f")
-        except ValueError:
-            # Fallback if we can't parse for some reason
-            dt = None
-
-        # Store (dt, chat_msg) for sorting
-        lines_with_dt.append((dt, chat_msg.strip()))
-
-    # 5) Sort lines by dt (None goes first). We'll ensure lines with valid dt are at the end:
-    #    We want chronological order, so we can do:
-    lines_with_dt.sort(key=lambda x: (x[0] is None, x[0]))
-
-    # 6) Keep only the last `limit` lines
-    #    i.e. the most recent lines
-    lines_with_dt = lines_with_dt[-limit:]
 
-    # 7) Format each line as "HH:MM <chat>"
-    #    If dt is None, we omit the time or do "??:??"
+    # Format each line as "HH:MM <chat>"
+    # If dt is None, we omit the time
     final = []
-    for (dt, msg) in lines_with_dt:
+    for (dt, msg) in lines:
         if dt is not None:
             hhmm = dt.strftime("%H:%M")
             final.append(f"{hhmm} {msg}")
@@ -535,21 +374,6 @@ def validate_timestamp(before_date: str) -> datetime:
     return now
 
 
-timestamp_regex = None
 def extract_timestamp(log_line):
-    global timestamp_regex
-    if timestamp_regex is None:
-        timestamp_regex = re.compile(
-            r'^\[(?P<day>\d{1,2})(?P<month>[a-zA-Z]{3})\.?(?P<year>\d{4}) (?P<hour>\d{2}):(?P<minute>\d{2}):(?P<second>\d{2})\.(?P<millis>\d+)\]'
-        )
-    # Extract matched timestamp
-    ts_match = timestamp_regex.match(log_line)
-    if ts_match:
-        log_day = ts_match.group("day")
-        log_month = ts_match.group("month").capitalize()
-        log_year = ts_match.group("year")
-        log_time = f"{ts_match.group('hour')}:{ts_match.group('minute')}:{ts_match.group('second')}.{ts_match.group('millis')}"
-
-        log_timestamp_str = f"{log_day}{log_month}{log_year} {log_time}"
-        return datetime.datetime.strptime(log_timestamp_str, "%d%b%Y %H:%M:%S.%f")
-    return None
\ No newline at end of file
+    """Returns the datetime of a '[19Jan2025 20:04:15.335] ...' log line, or None"""
+    return log_timestamp.parse_timestamp(log_line)
@@ -0,0 +1,147 @@
+import os
+import array
+import struct
+from typing import List, Optional
+
+import config.config as cfg
+from utility.logger import get_logger
+log = get_logger()
+
+import utility.log_timestamp as log_timestamp
+
+# ──────────────────────────
+# Per-Second Lag Series
+# ──────────────────────────
+# Milliseconds behind from "Running 2114ms or 42 ticks behind" lines, summed per second of the
+# log timestamp, in a fixed-size ring: second s lives in slot s % SERIES_SECONDS.
+# Slots between the newest second written and now are zeroed before reads, so stale values
+# from one lap ago never leak into a window. Windows are handed out as memoryviews over the
+# ring (two when the window wraps around the end), nothing is copied.
+#
+# Persisted to stats.lag_series_path as a small header followed by the raw array:
+#   magic "LAGS", format version, slot count, head second, last event second, then SERIES_SECONDS uint32.
+
+SERIES_SECONDS = 6 * 60 * 60  # Keep the last 6 hours at 1 second resolution
+FILE_MAGIC = b"LAGS"
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct("<4sIIqq")  # magic, version, slot count, head second, last event second
+
+series = array.array("I", bytes(4 * SERIES_SECONDS))  # ms behind per second
+head_sec = 0        # Newest second the ring covers, slots up to here are current
+last_event_sec = 0  # Second of the newest lag event added, events at or before a loaded value were already counted
+_loaded_event_sec = 0
+_loaded = False
+dirty = False       # Changed since the last save
+
+
+def _ensure_loaded():
+    if not _loaded:
+        load()
+
+
+def advance(now_sec: int):
+    """Moves the head of the ring to now_sec, zeroing the slots of the seconds in between"""
+    global head_sec
+    if now_sec <= head_sec:
+        return
+    gap = now_sec - head_sec
+    if gap >= SERIES_SECONDS:
+        series[:] = array.array("I", bytes(4 * SERIES_SECONDS))
+    else:
+        start = (head_sec + 1) % SERIES_SECONDS
+        end = start + gap
+        if end <= SERIES_SECONDS:
+            series[start:end] = array.array("I", bytes(4 * gap))
+        else:
+            series[start:] = array.array("I", bytes(4 * (SERIES_SECONDS - start)))
+            series[:end - SERIES_SECONDS] = array.array("I", bytes(4 * (end - SERIES_SECONDS)))
+    head_sec = now_sec
+
+
+def add(ts_ms: Optional[int], lag_ms: int):
+    """Adds a lag event at its log timestamp (now if it has none)"""
+    global last_event_sec, dirty
+    _ensure_loaded()
+    sec = (ts_ms if ts_ms is not None else log_timestamp.now_ms()) // 1000
+    if sec <= _loaded_event_sec:
+        return  # Counted before the bot restarted, seen again because the whole latest.log is re-read
+    advance(sec)
+    if sec <= head_sec - SERIES_SECONDS:
+        return  # Older than the ring
+    slot = sec % SERIES_SECONDS
+    series[slot] = min(series[slot] + lag_ms, 0xFFFFFFFF)
+    last_event_sec = max(last_event_sec, sec)
+    dirty = True
+
+
+def _views(start_sec: int, end_sec: int) -> List[memoryview]:
+    """Memoryviews over the slots of seconds start_sec..end_sec (inclusive), clipped to what the ring holds"""
+    start_sec = max(start_sec, head_sec - SERIES_SECONDS + 1)
+    end_sec = min(end_sec, head_sec)
+    if end_sec < start_sec:
+        return []
+    start = start_sec % SERIES_SECONDS
+    end = start + (end_sec - start_sec + 1)
+    view = memoryview(series)
+    if end <= SERIES_SECONDS:
+        return [view[start:end]]
+    return [view[start:], view[:end - SERIES_SECONDS]]
+
+
+def window(seconds: int) -> List[memoryview]:
+    """
+    Returns the per-second lag ms of the last `seconds` seconds, oldest first, as one or two
+    memoryviews into the ring (two when the window wraps). Don't hold on to them across awaits.
+    """
+    _ensure_loaded()
+    now_sec = log_timestamp.now_ms() // 1000
+    advance(now_sec)
+    return _views(now_sec - seconds + 1, now_sec)
+
+
+def window_sum(seconds: int) -> int:
+    """Total lag ms in the last `seconds` seconds"""
+    return sum(sum(part) for part in window(seconds))
+
+
+def load():
+    """Loads the series saved by a previous run, if it is still in the same format"""
+    global head_sec, last_event_sec, _loaded_event_sec, _loaded
+    _loaded = True
+    path = cfg.config.stats.lag_series_path
+    try:
+        with open(path, "rb") as f:
+            magic, version, slot_count, saved_head_sec, saved_event_sec = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+            if magic != FILE_MAGIC or version != FILE_VERSION or slot_count != SERIES_SECONDS:
+                log.warning(f"LagSeries: {path} has an unknown format, starting empty.")
+                return
+            loaded = array.array("I")
+            loaded.fromfile(f, SERIES_SECONDS)
+    except FileNotFoundError:
+        return
+    except (OSError, EOFError, struct.error) as e:
+        log.warning(f"LagSeries: Could not load {path}, starting empty: {e}")
+        return
+    series[:] = loaded
+    head_sec = saved_head_sec
+    last_event_sec = _loaded_event_sec = saved_event_sec
+    log.debug(f"LagSeries: Loaded {path}.")
+
+
+def save():
+    """Writes the series to disk if it changed since the last save"""
+    global dirty
+    _ensure_loaded()
+    if not dirty:
+        return
+    path = cfg.config.stats.lag_series_path
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, SERIES_SECONDS, head_sec, last_event_sec))
+            series.tofile(f)
+        os.replace(temp_path, path)
+        dirty = False
+    except OSError as e:
+        log.error(f"LagSeries: Failed to save {path}: {e}")
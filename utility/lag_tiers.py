@@ -0,0 +1,228 @@
+import os
+import array
+import bisect
+import struct
+from dataclasses import dataclass
+from typing import List, Optional
+
+import config.config as cfg
+from utility.logger import get_logger
+log = get_logger()
+
+import utility.log_timestamp as log_timestamp
+
+# ──────────────────────────
+# Multi-Resolution Lag History
+# ──────────────────────────
+# Lag events are downsampled into fixed-size rings of buckets at three resolutions, so graphs
+# and summaries over days or weeks read a few hundred buckets instead of raw samples:
+#   minute tier:     1 min buckets, last 24 hours
+#   10-minute tier: 10 min buckets, last 7 days
+#   hour tier:      60 min buckets, last 90 days
+# Each bucket holds the sum and max of "Running Nms behind" values, the number of events and the
+# p95 ms behind. The p95 comes from a small log-scale histogram of the newest bucket of each tier,
+# so it is accurate to one histogram bin (10%). Bucket n lives in slot n % capacity, and each slot
+# remembers its bucket number so slots left over from a previous lap read as empty.
+#
+# Persisted to stats.lag_tiers_path as a header followed by the raw arrays of every tier.
+
+HISTOGRAM_MIN_MS = 1000  # The server only logs "Running behind" from 2000 ms on
+HISTOGRAM_GROWTH = 1.1
+HISTOGRAM_BINS = 64      # Up to ~450 sec behind, anything above lands in the last bin
+HISTOGRAM_EDGES = [int(HISTOGRAM_MIN_MS * HISTOGRAM_GROWTH ** i) for i in range(1, HISTOGRAM_BINS)]
+
+FILE_MAGIC = b"LAGT"
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct("<4sIq")  # magic, version, last event second
+TIER_HEADER = struct.Struct("<II")    # bucket seconds, capacity
+
+
+@dataclass
+class LagBucket:
+    start_sec: int
+    sum_ms: int
+    max_ms: int
+    p95_ms: int
+    count: int
+
+
+class LagTier:
+    def __init__(self, name: str, bucket_sec: int, capacity: int):
+        self.name = name
+        self.bucket_sec = bucket_sec
+        self.capacity = capacity
+        self.bucket_ids = array.array("q", [-1]) * capacity  # Bucket number held by each slot
+        self.sums = array.array("Q", bytes(8 * capacity))
+        self.maxes = array.array("I", bytes(4 * capacity))
+        self.p95s = array.array("I", bytes(4 * capacity))
+        self.counts = array.array("I", bytes(4 * capacity))
+        self._histogram_bucket = -1  # Bucket the histogram belongs to
+        self._histogram = [0] * HISTOGRAM_BINS
+
+    @property
+    def span_sec(self) -> int:
+        return self.bucket_sec * self.capacity
+
+    def add(self, sec: int, lag_ms: int):
+        bucket = sec // self.bucket_sec
+        slot = bucket % self.capacity
+        if self.bucket_ids[slot] != bucket:
+            if self.bucket_ids[slot] > bucket:
+                return  # Older than the ring
+            self.bucket_ids[slot] = bucket
+            self.sums[slot] = self.maxes[slot] = self.p95s[slot] = self.counts[slot] = 0
+        self.sums[slot] += lag_ms
+        self.maxes[slot] = max(self.maxes[slot], min(lag_ms, 0xFFFFFFFF))
+        self.counts[slot] += 1
+
+        if bucket > self._histogram_bucket:
+            self._histogram_bucket = bucket
+            self._histogram = [0] * HISTOGRAM_BINS
+        if bucket == self._histogram_bucket:
+            self._histogram[bisect.bisect_left(HISTOGRAM_EDGES, lag_ms)] += 1
+            self.p95s[slot] = min(self._p95(), self.maxes[slot])
+        else:
+            # A late event for an older bucket, its histogram is gone
+            self.p95s[slot] = max(self.p95s[slot], min(lag_ms, self.maxes[slot]))
+
+    def _p95(self) -> int:
+        target = 0.95 * sum(self._histogram)
+        seen = 0
+        for i, count in enumerate(self._histogram):
+            seen += count
+            if seen >= target:
+                return HISTOGRAM_EDGES[i] if i < len(HISTOGRAM_EDGES) else 0xFFFFFFFF
+        return 0
+
+    def buckets(self, start_sec: int, end_sec: int) -> List[LagBucket]:
+        """Returns every bucket overlapping start_sec..end_sec, oldest first, empty buckets included"""
+        first = max(start_sec // self.bucket_sec, end_sec // self.bucket_sec - self.capacity + 1)
+        result = []
+        for bucket in range(first, end_sec // self.bucket_sec + 1):
+            slot = bucket % self.capacity
+            if self.bucket_ids[slot] == bucket:
+                result.append(LagBucket(bucket * self.bucket_sec, self.sums[slot], self.maxes[slot], self.p95s[slot], self.counts[slot]))
+            else:
+                result.append(LagBucket(bucket * self.bucket_sec, 0, 0, 0, 0))
+        return result
+
+    def _arrays(self):
+        return (self.bucket_ids, self.sums, self.maxes, self.p95s, self.counts)
+
+
+minute_tier = LagTier("minute", 60, 24 * 60)
+ten_minute_tier = LagTier("10 minutes", 10 * 60, 7 * 24 * 6)
+hour_tier = LagTier("hour", 60 * 60, 90 * 24)
+tiers = [minute_tier, ten_minute_tier, hour_tier]  # Finest first
+
+last_event_sec = 0
+_loaded_event_sec = 0
+_loaded = False
+dirty = False
+version = 0  # Changes whenever an event is added, tells cached lag charts they are outdated
+
+
+def _ensure_loaded():
+    if not _loaded:
+        load()
+
+
+def add(ts_ms: Optional[int], lag_ms: int):
+    """Adds a lag event at its log timestamp (now if it has none) to every tier"""
+    global last_event_sec, dirty, version
+    _ensure_loaded()
+    sec = (ts_ms if ts_ms is not None else log_timestamp.now_ms()) // 1000
+    if sec <= _loaded_event_sec:
+        return  # Counted before the bot restarted, seen again because the whole latest.log is re-read
+    for tier in tiers:
+        tier.add(sec, lag_ms)
+    last_event_sec = max(last_event_sec, sec)
+    dirty = True
+    version += 1
+
+
+def tier_for(seconds: int, max_buckets: int = 1500) -> LagTier:
+    """Returns the finest tier that covers the last `seconds` seconds in at most max_buckets buckets"""
+    for tier in tiers:
+        if tier.span_sec >= seconds and seconds // tier.bucket_sec <= max_buckets:
+            return tier
+    return tiers[-1]
+
+
+def recent_buckets(seconds: int, tier: Optional[LagTier] = None) -> List[LagBucket]:
+    """Returns the buckets of the last `seconds` seconds from tier (default: tier_for(seconds)), oldest first"""
+    _ensure_loaded()
+    tier = tier or tier_for(seconds)
+    now_sec = log_timestamp.now_ms() // 1000
+    return tier.buckets(now_sec - seconds + 1, now_sec)
+
+
+def summary(seconds: int) -> LagBucket:
+    """
+    Sums up the last `seconds` seconds.
+    Returns:
+        LagBucket: Total ms behind, the worst event, event count, and the highest bucket p95
+        (an upper bound of the window's p95).
+    """
+    buckets = recent_buckets(seconds)
+    return LagBucket(
+        buckets[0].start_sec if buckets else 0,
+        sum(bucket.sum_ms for bucket in buckets),
+        max((bucket.max_ms for bucket in buckets), default=0),
+        max((bucket.p95_ms for bucket in buckets), default=0),
+        sum(bucket.count for bucket in buckets),
+    )
+
+
+def load():
+    """Loads the tiers saved by a previous run. Tiers whose size changed start empty."""
+    global last_event_sec, _loaded_event_sec, _loaded
+    _loaded = True
+    path = cfg.config.stats.lag_tiers_path
+    try:
+        with open(path, "rb") as f:
+            magic, version, saved_event_sec = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+            if magic != FILE_MAGIC or version != FILE_VERSION:
+                log.warning(f"LagTiers: {path} has an unknown format, starting empty.")
+                return
+            for tier in tiers:
+                bucket_sec, capacity = TIER_HEADER.unpack(f.read(TIER_HEADER.size))
+                loaded = []
+                for existing in tier._arrays():
+                    values = array.array(existing.typecode)
+                    values.fromfile(f, capacity)
+                    loaded.append(values)
+                if (bucket_sec, capacity) == (tier.bucket_sec, tier.capacity):
+                    for existing, values in zip(tier._arrays(), loaded):
+                        existing[:] = values
+                else:
+                    log.warning(f"LagTiers: Saved {tier.name} tier has a different size, starting it empty.")
+    except FileNotFoundError:
+        return
+    except (OSError, EOFError, struct.error) as e:
+        log.warning(f"LagTiers: Could not load {path}, starting empty: {e}")
+        return
+    last_event_sec = _loaded_event_sec = saved_event_sec
+    log.debug(f"LagTiers: Loaded {path}.")
+
+
+def save():
+    """Writes all tiers to disk if they changed since the last save"""
+    global dirty
+    _ensure_loaded()
+    if not dirty:
+        return
+    path = cfg.config.stats.lag_tiers_path
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, last_event_sec))
+            for tier in tiers:
+                f.write(TIER_HEADER.pack(tier.bucket_sec, tier.capacity))
+                for values in tier._arrays():
+                    values.tofile(f)
+        os.replace(temp_path, path)
+        dirty = False
+    except OSError as e:
+        log.error(f"LagTiers: Failed to save {path}: {e}")
@@ -0,0 +1,190 @@
+import re
+import asyncio
+import datetime
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import config.config as cfg
+from utility.logger import get_logger
+log = get_logger()
+
+import utility.log_tailer as log_tailer
+import utility.log_timestamp as log_timestamp
+
+# ──────────────────────────
+# Typed latest.log Events
+# ──────────────────────────
+# Every line handed out by the log tailer is classified once into at most one
+# event, and the event is fanned out to everyone subscribed to its type.
+# Example lines:
+# [19Jan2025 20:04:15.335] [Server thread/WARN] [net.minecraft.server.MinecraftServer/]: Can't keep up! Is the server overloaded? Running 2114ms or 42 ticks behind
+# [19Jan2025 20:04:15.335] [Server thread/INFO] [net.minecraft.server.MinecraftServer/]: <jonshard> hello
+# [20Jan2025 11:24:46.081] [Server thread/INFO] [net.minecraft.server.MinecraftServer/]: jonemartin joined the game
+# [20Jan2025 11:31:02.410] [Server thread/INFO] [net.minecraft.server.MinecraftServer/]: jonemartin has made the advancement [Stone Age]
+# [20Jan2025 05:00:41.632] [Server thread/WARN] [ModernFix/]: Dedicated server took 37.64 seconds to load
+
+@dataclass
+class LogEvent:
+    ts_ms: Optional[int]  # Epoch milliseconds of the line, None if it had no timestamp
+    line: str
+
+    @property
+    def timestamp(self) -> Optional[datetime.datetime]:
+        return log_timestamp.ms_to_datetime(self.ts_ms) if self.ts_ms is not None else None
+
+@dataclass
+class LagEvent(LogEvent):
+    ms: int
+    ticks: int
+
+@dataclass
+class ChatEvent(LogEvent):
+    message: str  # "<name> text", "[Rcon] text" or "[Server] text"
+
+@dataclass
+class JoinEvent(LogEvent):
+    player: str
+
+@dataclass
+class LeaveEvent(LogEvent):
+    player: str
+
+@dataclass
+class AdvancementEvent(LogEvent):
+    player: str
+    advancement: str
+    message: str
+
+@dataclass
+class ServerStartedEvent(LogEvent):
+    pass
+
+@dataclass
+class OversizedChunkEvent(LogEvent):
+    pass
+
+@dataclass
+class GenericErrorEvent(LogEvent):
+    pattern: str  # The configured generic_error_patterns key that matched
+    message: str
+
+
+LAG_REGEX = re.compile(r'Running (?P<ms>\d+)ms or (?P<ticks>\d+) ticks behind')
+ADVANCEMENT_REGEX = re.compile(r'^(?P<player>\w+) has made the advancement \[(?P<advancement>.*?)\]$')
+
+CHAT_PREFIXES = ("<", "[Rcon]", "[Server]")
+MESSAGE_SEPARATOR = "/]: "  # Ends the "[logger/]: " part of the line, the message follows
+SERVER_STARTED_PREFIX = "Dedicated server took "  # "Dedicated server took 37.64 seconds to load"
+JOINED_SUFFIX = " joined the game"
+LEFT_SUFFIX = " left the game"
+
+
+def classify(line: str) -> Optional[LogEvent]:
+    """
+    Turns a single log line into a typed event.
+    Cheap substring checks decide which regex, if any, has to run.
+    Returns:
+        LogEvent: The event, or None for lines nobody is interested in.
+    """
+    if "ticks behind" in line:
+        match = LAG_REGEX.search(line)
+        if match:
+            return LagEvent(log_timestamp.parse_timestamp_ms(line), line, int(match.group("ms")), int(match.group("ticks")))
+
+    separator = line.find(MESSAGE_SEPARATOR)
+    if separator != -1:
+        message = line[separator + len(MESSAGE_SEPARATOR):].rstrip()
+        if message.startswith(CHAT_PREFIXES):
+            if line.endswith("MinecraftServer", 0, separator):
+                return ChatEvent(log_timestamp.parse_timestamp_ms(line), line, message)
+        elif message.endswith(JOINED_SUFFIX):
+            player = message[:-len(JOINED_SUFFIX)]
+            if player and " " not in player:
+                return JoinEvent(log_timestamp.parse_timestamp_ms(line), line, player)
+        elif message.endswith(LEFT_SUFFIX):
+            player = message[:-len(LEFT_SUFFIX)]
+            if player and " " not in player:
+                return LeaveEvent(log_timestamp.parse_timestamp_ms(line), line, player)
+        elif "has made the advancement" in message:
+            match = ADVANCEMENT_REGEX.match(message)
+            if match:
+                return AdvancementEvent(log_timestamp.parse_timestamp_ms(line), line, match.group("player"), match.group("advancement"), message)
+        elif message.startswith(SERVER_STARTED_PREFIX) and message.endswith(" to load"):
+            return ServerStartedEvent(log_timestamp.parse_timestamp_ms(line), line)
+
+    if "Saving oversized chunk" in line:
+        return OversizedChunkEvent(log_timestamp.parse_timestamp_ms(line), line)
+
+    pattern = cfg.generic_error_matcher.search(line)
+    if pattern:
+        message = line[separator + len(MESSAGE_SEPARATOR):].strip() if separator != -1 else line.strip()
+        return GenericErrorEvent(log_timestamp.parse_timestamp_ms(line), line, pattern, message)
+    return None
+
+
+# ──────────────────────────
+# Fan-out
+# ──────────────────────────
+EventCallback = Callable[[LogEvent], None]
+subscribers: Dict[type, List[EventCallback]] = {}
+
+
+def subscribe(event_type: type, callback: EventCallback):
+    """Registers callback to be called with every new event of event_type found in latest.log"""
+    subscribers.setdefault(event_type, []).append(callback)
+
+
+def subscribe_rotation(callback: Callable[[], None]):
+    """Registers callback to be called when latest.log is rotated, meaning a new server session started"""
+    log_tailer.rotation_subscribers.append(callback)
+
+
+class Wakeup:
+    """
+    Lets tasks sleep until a log event arrives instead of polling on a timer.
+    Subscribe wakeup.set to the events of interest and await wakeup.wait() in the task.
+    The asyncio.Event is created on first wait, so instances can live at module level.
+    """
+    def __init__(self):
+        self._event: Optional[asyncio.Event] = None
+        self._set_early = False  # set() before anyone waited, e.g. during the first log poll
+
+    def set(self, _event: Optional[LogEvent] = None):
+        if self._event is None:
+            self._set_early = True
+        else:
+            self._event.set()
+
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until set() is called, or timeout seconds pass.
+        Returns:
+            bool: True if woken up by set(), False on timeout.
+        """
+        if self._event is None:
+            self._event = asyncio.Event()
+            if self._set_early:
+                self._event.set()
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._event.clear()
+        return True
+
+
+def publish_lines(lines: List[str]):
+    """Classifies new log lines and delivers the resulting events to their subscribers"""
+    for line in lines:
+        event = classify(line)
+        if event is None:
+            continue
+        if type(event) is GenericErrorEvent:
+            cfg.generic_error_matcher.count_hit(event.pattern)
+        for callback in subscribers.get(type(event), ()):
+            try:
+                callback(event)
+            except Exception as e:
+                log.error(f"LogEvents: Subscriber {callback.__name__} failed on {type(event).__name__}: {e}")
+
+log_tailer.subscribe(publish_lines)
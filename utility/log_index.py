@@ -0,0 +1,251 @@
+import os
+import json
+import gzip
+import asyncio
+import collections
+from typing import Callable, List, Optional
+
+import config.config as cfg
+from utility.logger import get_logger
+log = get_logger()
+
+import utility.log_events as log_events
+import utility.log_timestamp as log_timestamp
+import utility.log_watcher as log_watcher
+
+# ──────────────────────────
+# Archived Log Index
+# ──────────────────────────
+# A rotated logs/<date>-<n>.log.gz never changes again, so it is decompressed and classified
+# once and summarized into a small JSON sidecar in stats.log_index_dir:
+#   {
+#     "version": 1, "archive": "2025-01-19-1.log.gz", "size": ..., "mtime_ns": ...,
+#     "first_ts_ms": ..., "last_ts_ms": ...,
+#     "sessions": [[ts_ms, "join" | "leave" | "restart", player or null], ...],
+#     "chat_count": 42, "chat_offsets": [uncompressed byte offset of each chat line, ...],
+#     "chat_tail": [[ts_ms, message], ...],            # Last bot.chat.history_lines chat lines
+#     "lag_per_minute": [[minute_ms, lag_ms, missed_ticks, occurrences], ...],
+#     "oversized_chunks": 0,
+#     "error_hits": {pattern: count},                  # generic_error_patterns at index time
+#   }
+# Historical queries read sidecars instead of decompressing the archives again.
+# A sidecar whose size/mtime no longer match its archive is rebuilt.
+
+SIDECAR_VERSION = 1
+
+
+def sidecar_path(archive_path: str, index_dir: Optional[str] = None) -> str:
+    return os.path.join(index_dir or cfg.config.stats.log_index_dir, os.path.basename(archive_path) + ".json")
+
+
+def list_archives(logs_dir: Optional[str] = None) -> List[str]:
+    """Returns paths of all archived server logs (no debug logs), oldest first"""
+    logs_dir = logs_dir or cfg.config.minecraft.logs_dir
+    try:
+        archives = [
+            os.path.join(logs_dir, f) for f in os.listdir(logs_dir)
+            if f.endswith(".log.gz") and "debug" not in f.lower()
+        ]
+    except FileNotFoundError:
+        return []
+    archives.sort(key=os.path.getmtime)
+    return archives
+
+
+def build_sidecar(archive_path: str, chat_tail_lines: Optional[int] = None) -> dict:
+    """
+    Reads an archived log once and summarizes it. Blocking.
+    Raises OSError/EOFError if the archive is unreadable or still being written.
+    """
+    stat = os.stat(archive_path)
+    if chat_tail_lines is None:
+        chat_tail_lines = cfg.config.bot.chat.history_lines
+    first_ts_ms = None
+    last_stamped_line = None
+    sessions = []
+    chat_offsets = []
+    chat_tail = collections.deque(maxlen=chat_tail_lines)
+    lag_per_minute = {}  # minute_ms -> [lag_ms, missed_ticks, occurrences]
+    oversized_chunks = 0
+    error_hits = {}
+
+    offset = 0
+    with gzip.open(archive_path, "rb") as f:
+        for raw in f:
+            line_offset = offset
+            offset += len(raw)
+            line = raw.decode("utf-8", errors="ignore").rstrip("\r\n")
+            if line.startswith("["):
+                last_stamped_line = line
+                if first_ts_ms is None:
+                    first_ts_ms = log_timestamp.parse_timestamp_ms(line)
+
+            event = log_events.classify(line)
+            if event is None:
+                continue
+            event_type = type(event)
+            if event_type is log_events.ChatEvent:
+                chat_offsets.append(line_offset)
+                chat_tail.append([event.ts_ms, event.message])
+            elif event_type is log_events.JoinEvent:
+                sessions.append([event.ts_ms, "join", event.player])
+            elif event_type is log_events.LeaveEvent:
+                sessions.append([event.ts_ms, "leave", event.player])
+            elif event_type is log_events.ServerStartedEvent:
+                sessions.append([event.ts_ms, "restart", None])
+            elif event_type is log_events.LagEvent and event.ts_ms is not None:
+                minute = lag_per_minute.setdefault(event.ts_ms // 60000 * 60000, [0, 0, 0])
+                minute[0] += event.ms
+                minute[1] += event.ticks
+                minute[2] += 1
+            elif event_type is log_events.OversizedChunkEvent:
+                oversized_chunks += 1
+            elif event_type is log_events.GenericErrorEvent:
+                error_hits[event.pattern] = error_hits.get(event.pattern, 0) + 1
+
+    return {
+        "version": SIDECAR_VERSION,
+        "archive": os.path.basename(archive_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "first_ts_ms": first_ts_ms,
+        "last_ts_ms": log_timestamp.parse_timestamp_ms(last_stamped_line) if last_stamped_line else None,
+        "sessions": sessions,
+        "chat_count": len(chat_offsets),
+        "chat_offsets": chat_offsets,
+        "chat_tail": list(chat_tail),
+        "lag_per_minute": [[minute_ms] + totals for minute_ms, totals in sorted(lag_per_minute.items())],
+        "oversized_chunks": oversized_chunks,
+        "error_hits": error_hits,
+    }
+
+
+def load_sidecar(archive_path: str, index_dir: Optional[str] = None) -> Optional[dict]:
+    """Returns the sidecar of an archive if it exists and is up to date, else None"""
+    try:
+        with open(sidecar_path(archive_path, index_dir), "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+        stat = os.stat(archive_path)
+    except (OSError, ValueError):
+        return None
+    if sidecar.get("version") != SIDECAR_VERSION or sidecar.get("size") != stat.st_size or sidecar.get("mtime_ns") != stat.st_mtime_ns:
+        return None
+    return sidecar
+
+
+def write_sidecar(sidecar: dict, archive_path: str, index_dir: Optional[str] = None):
+    path = sidecar_path(archive_path, index_dir)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(sidecar, f, separators=(",", ":"))
+    os.replace(temp_path, path)
+
+
+def get_sidecar(archive_path: str, index_dir: Optional[str] = None) -> Optional[dict]:
+    """
+    Returns the sidecar of an archive, building it first if needed. Blocking.
+    Returns:
+        dict: The sidecar, or None if the archive can't be read (yet).
+    """
+    sidecar = load_sidecar(archive_path, index_dir)
+    if sidecar is not None:
+        return sidecar
+    try:
+        sidecar = build_sidecar(archive_path)
+    except (OSError, EOFError) as e:
+        log.debug(f"LogIndex: Could not index {archive_path} (yet): {e}")
+        return None
+    try:
+        write_sidecar(sidecar, archive_path, index_dir)
+    except OSError as e:
+        log.warning(f"LogIndex: Could not write sidecar for {archive_path}: {e}")
+    return sidecar
+
+
+def index_archives(logs_dir: Optional[str] = None, index_dir: Optional[str] = None) -> int:
+    """
+    Builds missing or outdated sidecars and removes sidecars of deleted archives. Blocking.
+    Returns:
+        int: Number of sidecars built.
+    """
+    index_dir = index_dir or cfg.config.stats.log_index_dir
+    archives = list_archives(logs_dir)
+    built = 0
+    for archive_path in archives:
+        try:
+            # Cheap check first, a sidecar written after its archive was last modified is up to date
+            if os.stat(sidecar_path(archive_path, index_dir)).st_mtime_ns >= os.stat(archive_path).st_mtime_ns:
+                continue
+        except OSError:
+            pass
+        if load_sidecar(archive_path, index_dir) is None and get_sidecar(archive_path, index_dir) is not None:
+            built += 1
+
+    archive_names = {os.path.basename(path) for path in archives}
+    try:
+        sidecar_names = os.listdir(index_dir)
+    except FileNotFoundError:
+        sidecar_names = []
+    for name in sidecar_names:
+        if name.endswith(".json") and name[:-len(".json")] not in archive_names:
+            try:
+                os.remove(os.path.join(index_dir, name))
+            except OSError:
+                pass
+    return built
+
+
+def load_sidecars(logs_dir: Optional[str] = None, index_dir: Optional[str] = None) -> List[dict]:
+    """Returns the sidecars of all archives, oldest first, building missing ones. Blocking."""
+    sidecars = []
+    for archive_path in list_archives(logs_dir):
+        sidecar = get_sidecar(archive_path, index_dir)
+        if sidecar is not None:
+            sidecars.append(sidecar)
+    return sidecars
+
+
+# ──────────────────────────
+# Background Indexing
+# ──────────────────────────
+_index_task = None
+_index_again = False
+indexed_subscribers: List[Callable[[], None]] = []  # Called on the event loop after each indexing run
+
+
+async def _index_until_idle():
+    global _index_again
+    loop = asyncio.get_running_loop()
+    while True:
+        _index_again = False
+        try:
+            built = await loop.run_in_executor(None, index_archives)
+            if built:
+                log.info(f"LogIndex: Indexed {built} archived logs.")
+        except Exception as e:
+            log.error(f"LogIndex: Indexing failed: {e}")
+        for callback in indexed_subscribers:
+            try:
+                callback()
+            except Exception as e:
+                log.error(f"LogIndex: Subscriber {callback.__name__} failed: {e}")
+        if not _index_again:
+            break
+
+
+def request_index():
+    """Schedules indexing of new archives, coalescing requests made while it runs"""
+    global _index_task, _index_again
+    if _index_task is not None and not _index_task.done():
+        _index_again = True
+        return
+    _index_task = asyncio.ensure_future(_index_until_idle())
+
+
+def on_logs_dir_changed(name: Optional[str]):
+    """Log watcher callback, a new archive appears when latest.log is rotated"""
+    if name is None or name.endswith(".log.gz"):
+        request_index()
+
+log_watcher.watch(cfg.config.minecraft.logs_dir, on_logs_dir_changed)
@@ -0,0 +1,179 @@
+import os
+import asyncio
+from typing import Callable, List, Optional, Tuple
+
+import config.config as cfg
+from utility.logger import get_logger
+log = get_logger()
+
+# ──────────────────────────
+# Incremental latest.log Tailer
+# ──────────────────────────
+# One shared reader for the Minecraft server log. It remembers how far into
+# latest.log it has read and only hands out bytes appended since the last poll.
+# When the server restarts, latest.log is gzipped into logs/<date>-<n>.log.gz and
+# a new latest.log is created. We keep the old file handle open, drain whatever
+# was appended before the rotation, and then switch to the new file.
+
+CHUNK_BYTES = 4 * 1024 * 1024  # Max bytes read per executor call, keeps startup catch-up in bounded pieces
+
+LinesCallback = Callable[[List[str]], None]
+RotationCallback = Callable[[], None]
+
+line_subscribers: List[LinesCallback] = []
+rotation_subscribers: List[RotationCallback] = []
+
+
+class LogTailer:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._inode = None
+        self._offset = 0
+        self._partial = b""
+
+    def close(self):
+        if self._file:
+            self._file.close()
+        self._file = None
+        self._inode = None
+        self._offset = 0
+        self._partial = b""
+
+    def _open(self) -> bool:
+        try:
+            self._file = open(self.path, "rb")
+        except FileNotFoundError:
+            return False
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        self._offset = 0
+        self._partial = b""
+        return True
+
+    def _read_lines(self, flush_partial: bool = False) -> List[str]:
+        data = self._file.read(CHUNK_BYTES)
+        self._offset += len(data)
+        data = self._partial + data
+        if flush_partial:
+            self._partial = b""
+        else:
+            # Keep an unterminated last line until the server finishes writing it
+            cut = data.rfind(b"\n") + 1
+            data, self._partial = data[:cut], data[cut:]
+        if not data:
+            return []
+        return data.decode("utf-8", errors="ignore").splitlines()
+
+    def read_chunk(self) -> Tuple[List[str], bool]:
+        """
+        Reads the next batch of complete lines appended to the log.
+        Blocking, meant to be run in an executor.
+        Returns:
+            (lines, rotated): New lines, and True if the log was rotated or truncated
+            since the last call. Lines from before a rotation are always returned
+            before the rotation is reported.
+        """
+        if self._file is None and not self._open():
+            return [], False
+
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            stat = None  # Mid-rotation, keep draining the old handle
+
+        if stat is not None and stat.st_ino == self._inode and stat.st_size < self._offset:
+            # Truncated in place, start over from the top
+            log.info(f"LogTailer: {self.path} was truncated, reading from the start.")
+            self._file.seek(0)
+            self._offset = 0
+            self._partial = b""
+            return [], True
+
+        rotated = stat is not None and stat.st_ino != self._inode
+        lines = self._read_lines(flush_partial=rotated)
+        if lines or not rotated:
+            return lines, False
+
+        # The old file is fully drained, switch over to the new latest.log
+        log.info(f"LogTailer: {self.path} was rotated, following the new file.")
+        self.close()
+        self._open()
+        return [], True
+
+
+tailer: Optional[LogTailer] = None
+_poll_lock = None
+
+
+def subscribe(on_lines: LinesCallback, on_rotation: Optional[RotationCallback] = None):
+    """
+    Registers a consumer of new latest.log lines.
+    Args:
+        on_lines: Called with a list of new lines, in file order.
+        on_rotation: Optional, called when a new log session starts (server restart).
+    """
+    line_subscribers.append(on_lines)
+    if on_rotation:
+        rotation_subscribers.append(on_rotation)
+
+
+async def poll():
+    """
+    Reads everything appended to latest.log since the last poll and hands it to all subscribers.
+    The first poll reads the current log session from the start.
+    """
+    global tailer, _poll_lock
+    if _poll_lock is None:
+        _poll_lock = asyncio.Lock()
+
+    async with _poll_lock:
+        if tailer is None or tailer.path != cfg.config.minecraft.log_file_path:
+            if tailer:
+                tailer.close()
+            tailer = LogTailer(cfg.config.minecraft.log_file_path)
+
+        loop = asyncio.get_running_loop()
+        while True:
+            lines, rotated = await loop.run_in_executor(None, tailer.read_chunk)
+            if lines:
+                for callback in line_subscribers:
+                    try:
+                        callback(lines)
+                    except Exception as e:
+                        log.error(f"LogTailer: Subscriber {callback.__name__} failed: {e}")
+            if rotated:
+                for callback in rotation_subscribers:
+                    try:
+                        callback()
+                    except Exception as e:
+                        log.error(f"LogTailer: Rotation subscriber {callback.__name__} failed: {e}")
+            if not lines and not rotated:
+                break
+
+
+_poll_task = None
+_poll_again = False
+
+
+async def _poll_until_idle():
+    global _poll_again
+    while True:
+        _poll_again = False
+        try:
+            await poll()
+        except Exception as e:
+            log.error(f"LogTailer: Poll failed: {e}")
+        if not _poll_again:
+            break
+
+
+def request_poll():
+    """
+    Schedules a poll() without waiting for it, e.g. from a file watcher callback.
+    Requests made while a poll is running are coalesced into one more poll afterwards.
+    """
+    global _poll_task, _poll_again
+    if _poll_task is not None and not _poll_task.done():
+        _poll_again = True
+        return
+    _poll_task = asyncio.ensure_future(_poll_until_idle())
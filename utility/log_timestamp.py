@@ -0,0 +1,112 @@
+import time
+import datetime
+from typing import Optional, Tuple
+
+# ──────────────────────────
+# Forge Log Timestamp Parser
+# ──────────────────────────
+# Parses the "[19Jan2025 20:04:15.335]" prefix of Minecraft/Forge log lines without strptime.
+# The date part only changes once a day, so it is looked up in a small cache, and the
+# local epoch of each hour is cached too, so epoch milliseconds cost a few int() calls.
+
+MONTHS = {
+    "Jan": 1, "Feb": 2, "Mar": 3, "Apr": 4, "May": 5, "Jun": 6,
+    "Jul": 7, "Aug": 8, "Sep": 9, "Oct": 10, "Nov": 11, "Dec": 12,
+}
+MONTHS.update({name.lower(): number for name, number in list(MONTHS.items())})
+MONTHS.update({name.upper(): number for name, number in list(MONTHS.items())})
+
+CACHE_LIMIT = 512  # Days/hours kept in the caches before they are cleared
+
+_date_cache = {}        # "19Jan2025" -> (2025, 1, 19)
+_hour_epoch_cache = {}  # ((2025, 1, 19), 20) -> epoch ms of 19Jan2025 20:00:00 local time
+
+
+def _parse_date(date_str: str) -> Tuple[int, int, int]:
+    """Parses '19Jan2025' (or '19Jan.2025') into (year, month, day). Raises ValueError/KeyError if malformed."""
+    date = _date_cache.get(date_str)
+    if date is None:
+        compact = date_str.replace(".", "")
+        day_len = len(compact) - 7  # One or two day digits, then 3 month letters and 4 year digits
+        if day_len not in (1, 2):
+            raise ValueError(f"Malformed log date: {date_str}")
+        date = (int(compact[-4:]), MONTHS[compact[day_len:day_len + 3]], int(compact[:day_len]))
+        if len(_date_cache) >= CACHE_LIMIT:
+            _date_cache.clear()
+        _date_cache[date_str] = date
+    return date
+
+
+def _split(line: str):
+    """Returns (date, hour, minute, second, fraction_str) from a log line prefix, or None"""
+    if not line.startswith("["):
+        return None
+    space = line.find(" ", 1, 14)
+    if space == -1:
+        return None
+    close = line.find("]", space, space + 20)
+    if close == -1:
+        return None
+    clock = line[space + 1:close]  # "20:04:15.335"
+    if len(clock) < 10 or clock[2] != ":" or clock[5] != ":" or clock[8] != ".":
+        return None
+    try:
+        return _parse_date(line[1:space]), int(clock[0:2]), int(clock[3:5]), int(clock[6:8]), clock[9:]
+    except (ValueError, KeyError):
+        return None
+
+
+def parse_timestamp(line: str) -> Optional[datetime.datetime]:
+    """
+    Parses the timestamp prefix of a log line.
+    Args:
+        line (str): A log line, e.g. "[19Jan2025 20:04:15.335] [Server thread/INFO] ..."
+    Returns:
+        datetime: Naive local datetime, or None if the line has no timestamp.
+    """
+    parts = _split(line)
+    if parts is None:
+        return None
+    (year, month, day), hour, minute, second, fraction = parts
+    try:
+        return datetime.datetime(year, month, day, hour, minute, second, int(fraction[:6].ljust(6, "0")))
+    except ValueError:
+        return None
+
+
+def parse_timestamp_ms(line: str) -> Optional[int]:
+    """
+    Parses the timestamp prefix of a log line into epoch milliseconds.
+    Args:
+        line (str): A log line, e.g. "[19Jan2025 20:04:15.335] [Server thread/INFO] ..."
+    Returns:
+        int: Milliseconds since the epoch (the log is in local time), or None if the line has no timestamp.
+    """
+    parts = _split(line)
+    if parts is None:
+        return None
+    date, hour, minute, second, fraction = parts
+    hour_key = (date, hour)
+    hour_ms = _hour_epoch_cache.get(hour_key)
+    if hour_ms is None:
+        try:
+            hour_ms = int(time.mktime((date[0], date[1], date[2], hour, 0, 0, 0, 0, -1))) * 1000
+        except (ValueError, OverflowError):
+            return None
+        if len(_hour_epoch_cache) >= CACHE_LIMIT:
+            _hour_epoch_cache.clear()
+        _hour_epoch_cache[hour_key] = hour_ms
+    try:
+        return hour_ms + minute * 60000 + second * 1000 + int(fraction[:3].ljust(3, "0"))
+    except ValueError:
+        return None
+
+
+def ms_to_datetime(ts_ms: int) -> datetime.datetime:
+    """Converts epoch milliseconds from parse_timestamp_ms back into a naive local datetime"""
+    return datetime.datetime.fromtimestamp(ts_ms / 1000)
+
+
+def now_ms() -> int:
+    """Current time in epoch milliseconds, comparable with parse_timestamp_ms"""
+    return int(time.time() * 1000)
@@ -0,0 +1,148 @@
+import os
+import sys
+import struct
+import asyncio
+import ctypes
+import ctypes.util
+from typing import Callable, Dict, List, Optional, Tuple
+
+import config.config as cfg
+from utility.logger import get_logger
+log = get_logger()
+
+# ──────────────────────────
+# Directory Watcher
+# ──────────────────────────
+# Tells consumers when files in a directory change (logs/, crash-reports/), so they can react
+# right away instead of polling on a timer. Uses Linux inotify through the event loop when
+# available. Directories inotify can't watch (missing, or not on Linux) are polled every
+# minecraft.log_tail.poll_interval_sec by comparing mtime and size of their files.
+#
+# Callbacks are called on the event loop with the changed file name, or None when
+# anything in the directory may have changed (e.g. the inotify queue overflowed).
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, name length
+READ_BYTES = 64 * 1024
+
+WatchCallback = Callable[[Optional[str]], None]
+watches: List[Tuple[str, WatchCallback]] = []
+
+
+def watch(directory: str, callback: WatchCallback):
+    """Registers callback for changes in directory. Call before start()."""
+    watches.append((directory, callback))
+
+
+def _notify(callback: WatchCallback, name: Optional[str]):
+    try:
+        callback(name)
+    except Exception as e:
+        log.error(f"LogWatcher: Callback {callback.__name__} failed for {name}: {e}")
+
+
+class InotifyWatcher:
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._callbacks: Dict[int, List[WatchCallback]] = {}
+
+    def add_watch(self, directory: str, callback: WatchCallback):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), directory)
+        self._callbacks.setdefault(wd, []).append(callback)
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        loop.add_reader(self.fd, self._on_readable)
+
+    def _on_readable(self):
+        try:
+            data = os.read(self.fd, READ_BYTES)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", errors="ignore") or None
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped, tell everyone to look again
+                for callbacks in self._callbacks.values():
+                    for callback in callbacks:
+                        _notify(callback, None)
+                continue
+            for callback in self._callbacks.get(wd, ()):
+                _notify(callback, name)
+
+
+def _snapshot(directory: str) -> Dict[str, Tuple[int, int]]:
+    snapshot = {}
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.name] = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        pass  # Missing (e.g. no crash yet) or unreadable, looks empty until it appears
+    return snapshot
+
+
+async def poll_directories(polled: List[Tuple[str, WatchCallback]]):
+    """Fallback for directories inotify can't watch: compare file mtimes and sizes on an interval"""
+    snapshots = {directory: _snapshot(directory) for directory, _ in polled}
+    while True:
+        await asyncio.sleep(cfg.config.minecraft.log_tail.poll_interval_sec)
+        for directory, callback in polled:
+            current = _snapshot(directory)
+            previous = snapshots.get(directory, {})
+            for name, stat in current.items():
+                if previous.get(name) != stat:
+                    _notify(callback, name)
+            snapshots[directory] = current
+
+
+inotify_watcher: Optional[InotifyWatcher] = None
+poll_task: Optional[asyncio.Task] = None
+
+
+def start():
+    """Starts watching all registered directories, with inotify where possible and polling otherwise"""
+    global inotify_watcher, poll_task
+    loop = asyncio.get_running_loop()
+    try:
+        inotify_watcher = InotifyWatcher()
+    except (OSError, AttributeError) as e:
+        log.warning(f"LogWatcher: inotify unavailable ({e}), polling every {cfg.config.minecraft.log_tail.poll_interval_sec} sec instead.")
+        inotify_watcher = None
+
+    polled = []
+    for directory, callback in watches:
+        if inotify_watcher:
+            try:
+                inotify_watcher.add_watch(directory, callback)
+                log.debug(f"LogWatcher: Watching {directory} with inotify.")
+                continue
+            except OSError as e:
+                log.warning(f"LogWatcher: Can't watch {directory} with inotify ({e}), polling it instead.")
+        polled.append((directory, callback))
+
+    if inotify_watcher:
+        inotify_watcher.start(loop)
+    if polled:
+        poll_task = loop.create_task(poll_directories(polled))
@@ -0,0 +1,93 @@
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from utility.logger import get_logger
+log = get_logger()
+
+import utility.log_events as log_events
+
+# ──────────────────────────
+# Log Session Metrics
+# ──────────────────────────
+# Running count/sum/min/max of values read from latest.log, updated as lines arrive and reset
+# when a new log session starts (server restart). /status and the presence read these instead
+# of searching the log.
+
+LAG_MS = "lag_ms"                      # ms behind per 'Running behind' line
+MISSED_TICKS = "missed_ticks"          # Ticks behind per 'Running behind' line
+OVERSIZED_CHUNKS = "oversized_chunks"  # 'Saving oversized chunk' lines
+GENERIC_ERRORS = "generic_errors"      # Lines matching notifications.generic_error_patterns
+CHAT_LINES = "chat_lines"
+JOINS = "joins"
+
+
+@dataclass
+class Metric:
+    count: int = 0
+    sum: float = 0
+    min: Optional[float] = None
+    max: Optional[float] = None
+    last: Optional[float] = None
+    last_ts_ms: Optional[int] = None  # Log timestamp of the last observation
+
+    def observe(self, value: float = 1, ts_ms: Optional[int] = None):
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.last = value
+        if ts_ms is not None:
+            self.last_ts_ms = ts_ms
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0
+
+
+registry: Dict[str, Metric] = {}
+
+
+def get(name: str) -> Metric:
+    """Returns the metric called name, creating an empty one if needed"""
+    metric = registry.get(name)
+    if metric is None:
+        metric = registry[name] = Metric()
+    return metric
+
+
+def observe(name: str, value: float = 1, ts_ms: Optional[int] = None):
+    get(name).observe(value, ts_ms)
+
+
+def reset():
+    """Starts all metrics over, a new latest.log means the server restarted"""
+    log.debug("Metrics: New log session, resetting metrics.")
+    for name in registry:
+        registry[name] = Metric()
+
+
+# ──────────────────────────
+# latest.log Consumers
+# ──────────────────────────
+def on_lag(event: log_events.LagEvent):
+    observe(LAG_MS, event.ms, event.ts_ms)
+    observe(MISSED_TICKS, event.ticks, event.ts_ms)
+
+def on_oversized_chunk(event: log_events.OversizedChunkEvent):
+    observe(OVERSIZED_CHUNKS, 1, event.ts_ms)
+
+def on_generic_error(event: log_events.GenericErrorEvent):
+    observe(GENERIC_ERRORS, 1, event.ts_ms)
+
+def on_chat(event: log_events.ChatEvent):
+    observe(CHAT_LINES, 1, event.ts_ms)
+
+def on_join(event: log_events.JoinEvent):
+    observe(JOINS, 1, event.ts_ms)
+
+log_events.subscribe(log_events.LagEvent, on_lag)
+log_events.subscribe(log_events.OversizedChunkEvent, on_oversized_chunk)
+log_events.subscribe(log_events.GenericErrorEvent, on_generic_error)
+log_events.subscribe(log_events.ChatEvent, on_chat)
+log_events.subscribe(log_events.JoinEvent, on_join)
+log_events.subscribe_rotation(reset)
@@ -7,6 +7,7 @@ from concurrent.futures import ThreadPoolExecutor
 
 import utility.server_properties_helper as props_helper
 import utility.service_helpers as serv_helper
+import utility.rcon_helpers as rcon_helpers
 
 import config.config as cfg
 from utility.logger import get_logger
@@ -194,6 +195,11 @@ async def async_service_control(action: str) -> str:
     service_name = cfg.config.minecraft.service_name
 
     log.info(f"{action} {service_name}")
+
+    if action == "stop":
+        # RCON callers fail fast from now on instead of trying to reach a stopping server
+        rcon_helpers.set_service_running(False)
+        await rcon_helpers.close_rcon_connection()
     
     process = await asyncio.create_subprocess_exec(
         "sudo", "systemctl", action, service_name,
@@ -205,6 +211,9 @@ async def async_service_control(action: str) -> str:
     if process.returncode != 0:
         raise Exception(f"Systemctl error: {stderr.decode(errors='ignore').strip()}")
 
+    if action != "stop":
+        rcon_helpers.set_service_running(True)
+
     return f"Server action **{action}** completed successfully on `{service_name}`."
 
 
@@ -248,6 +257,8 @@ async def async_service_status() -> str:
 
 
 
+STOPPED_SERVICE_STATES = {"inactive", "failed", "deactivating"}  # `systemctl is-active` output of a server that is down
+
 async def is_service_running(skip_service_check: bool = False) -> bool:
     """
     Checks if the Minecraft server service is currently running.
@@ -261,20 +272,30 @@ async def is_service_running(skip_service_check: bool = False) -> bool:
     service_name = cfg.config.minecraft.service_name
 
     # Use `systemctl is-active` to check the service status
-    process = await asyncio.create_subprocess_exec(
-        "sudo", "systemctl", "is-active", service_name,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE
-    )
-    stdout, stderr = await process.communicate()
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "sudo", "systemctl", "is-active", service_name,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+    except OSError:
+        rcon_helpers.set_service_running(None)  # The check failed, not the server
+        raise
 
     # Decode the output
     status_output = stdout.decode(errors="ignore").strip()
     error_output = stderr.decode(errors="ignore").strip()
 
     if process.returncode == 0 and status_output == "active":
+        rcon_helpers.set_service_running(True)
         return True
-    elif process.returncode != 0:
+    elif status_output in STOPPED_SERVICE_STATES:
+        rcon_helpers.set_service_running(False)
+    else:
+        # The check itself failed (sudo, systemd), leave it to the RCON breaker whether the server is reachable
+        rcon_helpers.set_service_running(None)
+    if process.returncode != 0:
         # Log or print an error message for debugging if necessary
         if error_output:
             log.error(f"Error checking service status: {error_output}")
@@ -0,0 +1,347 @@
+import os
+import json
+import bisect
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import config.config as cfg
+from utility.logger import get_logger
+log = get_logger()
+
+import utility.log_events as log_events
+import utility.log_index as log_index
+import utility.log_timestamp as log_timestamp
+
+# ──────────────────────────
+# Player Session Index
+# ──────────────────────────
+# Turns join/leave/restart events into sessions (player, start, end) and indexes them by start
+# time and by player, so playtime, peak concurrency and session lengths over any range are
+# answered without touching the logs. All times are epoch milliseconds.
+#
+# Two layers:
+#   archived: sessions from the sidecars of archived logs, persisted to stats.sessions_path
+#             with the archives it contains, extended when the log index finds new archives.
+#   live:     sessions from the current latest.log, seeded with the players still online at the
+#             end of the newest archive. Rebuilt from its events when the archived layer changes,
+#             started over when the log rotates (its events are in the next archive then).
+# A restart closes all open sessions at the last log line seen before it.
+
+EventTuple = Tuple[int, str, Optional[str]]  # (ts_ms, "join" | "leave" | "restart", player)
+
+
+@dataclass
+class Session:
+    player: str
+    start_ms: int
+    end_ms: Optional[int] = None  # None while the player is online
+
+    def clipped_ms(self, start_ms: int, end_ms: int, now_ms: int) -> int:
+        """Returns how much of this session lies within start_ms..end_ms"""
+        session_end = self.end_ms if self.end_ms is not None else now_ms
+        return max(0, min(session_end, end_ms) - max(self.start_ms, start_ms))
+
+
+class SessionIndex:
+    def __init__(self):
+        self.sessions: List[Session] = []              # Closed sessions, sorted by start
+        self.starts: List[int] = []                    # Time index: start_ms of each closed session
+        self.by_player: Dict[str, List[Session]] = {}  # Per-player index of closed sessions, sorted by start
+        self.player_starts: Dict[str, List[int]] = {}  # start_ms of each session in by_player, to bisect on
+        self.open: Dict[str, Session] = {}             # Players online at the last event
+        self.max_duration_ms = 0
+        self.last_event_ms = 0                         # Newest log line seen
+
+    def _close(self, session: Session, end_ms: int):
+        session.end_ms = max(end_ms, session.start_ms)
+        self.max_duration_ms = max(self.max_duration_ms, session.end_ms - session.start_ms)
+        i = bisect.bisect_right(self.starts, session.start_ms)
+        self.starts.insert(i, session.start_ms)
+        self.sessions.insert(i, session)
+        player_starts = self.player_starts.setdefault(session.player, [])
+        i = bisect.bisect_right(player_starts, session.start_ms)
+        player_starts.insert(i, session.start_ms)
+        self.by_player.setdefault(session.player, []).insert(i, session)
+
+    def apply(self, ts_ms: int, kind: str, player: Optional[str]):
+        if kind == "join":
+            previous = self.open.pop(player, None)
+            if previous is not None:
+                self._close(previous, ts_ms)  # Joined again without a leave line
+            self.open[player] = Session(player, ts_ms)
+        elif kind == "leave":
+            session = self.open.pop(player, None)
+            if session is not None:
+                self._close(session, ts_ms)
+        elif kind == "restart":
+            # The server went down somewhere after the last line it logged
+            for session in self.open.values():
+                self._close(session, self.last_event_ms or ts_ms)
+            self.open.clear()
+        self.saw(ts_ms)
+
+    def saw(self, ts_ms: Optional[int]):
+        if ts_ms is not None:
+            self.last_event_ms = max(self.last_event_ms, ts_ms)
+
+    def overlapping(self, start_ms: int, end_ms: int, player: Optional[str] = None) -> Iterator[Session]:
+        """Yields the closed sessions overlapping start_ms..end_ms, of one player or everyone"""
+        if player is not None:
+            first = bisect.bisect_left(self.player_starts.get(player, []), start_ms - self.max_duration_ms)
+            candidates = self.by_player.get(player, [])[first:]
+        else:
+            first = bisect.bisect_left(self.starts, start_ms - self.max_duration_ms)
+            candidates = self.sessions[first:bisect.bisect_left(self.starts, end_ms)]
+        for session in candidates:
+            if session.start_ms >= end_ms:
+                return
+            if session.end_ms > start_ms:
+                yield session
+
+    def to_json(self) -> dict:
+        return {
+            "sessions": [[s.player, s.start_ms, s.end_ms] for s in self.sessions],
+            "open": [[s.player, s.start_ms] for s in self.open.values()],
+            "last_event_ms": self.last_event_ms,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "SessionIndex":
+        index = cls()
+        for player, start_ms, end_ms in data.get("sessions", []):
+            index._close(Session(player, start_ms), end_ms)
+        for player, start_ms in data.get("open", []):
+            index.open[player] = Session(player, start_ms)
+        index.last_event_ms = data.get("last_event_ms", 0)
+        return index
+
+
+archived = SessionIndex()
+archived_names: List[str] = []  # Archives in the archived layer, oldest first
+live = SessionIndex()
+live_events: List[EventTuple] = []  # Session events of the current latest.log
+_loaded = False
+
+
+def load():
+    global archived, archived_names, _loaded
+    _loaded = True
+    try:
+        with open(cfg.config.stats.sessions_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError) as e:
+        log.error(f"PlayerSessions: Failed to load {cfg.config.stats.sessions_path}: {e}")
+        return
+    archived = SessionIndex.from_json(data)
+    archived_names = data.get("archives", [])
+    _rebuild_live()
+
+
+def save():
+    path = cfg.config.stats.sessions_path
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"archives": archived_names, **archived.to_json()}, f)
+        os.replace(temp_path, path)
+    except OSError as e:
+        log.error(f"PlayerSessions: Failed to save {path}: {e}")
+
+
+def _ensure_loaded():
+    if not _loaded:
+        load()
+
+
+def _rebuild_live():
+    """Starts the live layer from the players still online in the archived layer and replays latest.log's events"""
+    global live
+    live = SessionIndex()
+    live.last_event_ms = archived.last_event_ms
+    for player, session in archived.open.items():
+        live.open[player] = Session(player, session.start_ms)
+    for event in live_events:
+        if event[0] > archived.last_event_ms:  # Older ones are already in the archived layer
+            live.apply(*event)
+
+
+# ──────────────────────────
+# Queries
+# ──────────────────────────
+def _sessions(start_ms: int, end_ms: int, player: Optional[str] = None) -> Iterator[Session]:
+    """Yields all sessions overlapping start_ms..end_ms, including the ones still open"""
+    _ensure_loaded()
+    yield from archived.overlapping(start_ms, end_ms, player)
+    yield from live.overlapping(start_ms, end_ms, player)
+    for session in live.open.values():
+        if (player is None or session.player == player) and session.start_ms < end_ms:
+            yield session
+
+
+def playtime_ms(start_ms: int, end_ms: int, player: Optional[str] = None) -> Dict[str, int]:
+    """Returns the time each player (or just player) was online within start_ms..end_ms"""
+    now_ms = log_timestamp.now_ms()
+    totals: Dict[str, int] = {}
+    for session in _sessions(start_ms, end_ms, player):
+        totals[session.player] = totals.get(session.player, 0) + session.clipped_ms(start_ms, end_ms, now_ms)
+    return totals
+
+
+def peak_concurrency(start_ms: int, end_ms: int) -> Tuple[int, Optional[int]]:
+    """Returns the most players online at once within start_ms..end_ms and when that was first reached"""
+    now_ms = log_timestamp.now_ms()
+    changes = []
+    for session in _sessions(start_ms, end_ms):
+        session_end = session.end_ms if session.end_ms is not None else now_ms
+        if session_end <= start_ms:
+            continue
+        changes.append((max(session.start_ms, start_ms), 1))
+        changes.append((min(session_end, end_ms), -1))
+    changes.sort()  # At the same ms a leave (-1) sorts before a join (+1)
+    online, peak, peak_ms = 0, 0, None
+    for ts_ms, change in changes:
+        online += change
+        if online > peak:
+            peak, peak_ms = online, ts_ms
+    return peak, peak_ms
+
+
+def session_lengths_ms(start_ms: int, end_ms: int, player: Optional[str] = None) -> List[int]:
+    """Returns the lengths of the finished sessions that started within start_ms..end_ms, shortest first"""
+    return sorted(
+        session.end_ms - session.start_ms
+        for session in _sessions(start_ms, end_ms, player)
+        if session.end_ms is not None and session.start_ms >= start_ms
+    )
+
+
+def percentile(sorted_values: List[int], fraction: float) -> int:
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def format_duration_ms(duration_ms: int) -> str:
+    minutes = duration_ms // 60000
+    return f"{minutes // 60}h {minutes % 60:02d}m" if minutes >= 60 else f"{minutes}m"
+
+
+def known_players() -> List[str]:
+    _ensure_loaded()
+    return sorted(set(archived.by_player) | set(archived.open) | set(live.by_player) | set(live.open))
+
+
+# ──────────────────────────
+# latest.log Consumers
+# ──────────────────────────
+def on_session_event(ts_ms: Optional[int], kind: str, player: Optional[str]):
+    _ensure_loaded()
+    ts_ms = ts_ms if ts_ms is not None else log_timestamp.now_ms()
+    live_events.append((ts_ms, kind, player))
+    if ts_ms > archived.last_event_ms:
+        live.apply(ts_ms, kind, player)
+
+def on_join(event: log_events.JoinEvent):
+    on_session_event(event.ts_ms, "join", event.player)
+
+def on_leave(event: log_events.LeaveEvent):
+    on_session_event(event.ts_ms, "leave", event.player)
+
+def on_server_started(event: log_events.ServerStartedEvent):
+    on_session_event(event.ts_ms, "restart", None)
+
+def on_rotation():
+    """latest.log was archived, its events reach the archived layer once the archive is indexed"""
+    live_events.clear()
+    _rebuild_live()
+
+log_events.subscribe(log_events.JoinEvent, on_join)
+log_events.subscribe(log_events.LeaveEvent, on_leave)
+log_events.subscribe(log_events.ServerStartedEvent, on_server_started)
+log_events.subscribe_rotation(on_rotation)
+
+
+# ──────────────────────────
+# Backfill From Archives
+# ──────────────────────────
+def collect_archive_events(archive_paths: List[str]) -> List[Tuple[str, List[EventTuple], Optional[int]]]:
+    """
+    Reads the session events of archives from their sidecars. Blocking.
+    Returns:
+        list: (archive name, events, last log line ts_ms) per readable archive, in the given order.
+    """
+    result = []
+    for archive_path in archive_paths:
+        sidecar = log_index.get_sidecar(archive_path)
+        if sidecar is None:
+            continue
+        events = [(ts_ms, kind, player) for ts_ms, kind, player in sidecar["sessions"] if ts_ms is not None]
+        result.append((os.path.basename(archive_path), events, sidecar.get("last_ts_ms")))
+    return result
+
+
+def build_archived(archive_events) -> SessionIndex:
+    index = SessionIndex()
+    for _, events, last_ts_ms in archive_events:
+        for event in events:
+            index.apply(*event)
+        index.saw(last_ts_ms)
+    return index
+
+
+def plan_backfill() -> Tuple[bool, List[str]]:
+    """
+    Decides which archives have to be read. Blocking.
+    Returns:
+        (rebuild, paths): rebuild is True if an archive older than the newest one already in the
+        archived layer showed up (or one was removed), then paths are all archives.
+    """
+    paths = log_index.list_archives()
+    names = [os.path.basename(path) for path in paths]
+    if names[:len(archived_names)] == archived_names:
+        return False, paths[len(archived_names):]
+    return True, paths
+
+
+async def backfill_from_archives():
+    """Adds the sessions of archives that are not in the archived layer yet"""
+    global archived, archived_names
+    _ensure_loaded()
+    loop = asyncio.get_running_loop()
+    try:
+        rebuild, paths = await loop.run_in_executor(None, plan_backfill)
+        if not paths and not rebuild:
+            return
+        archive_events = await loop.run_in_executor(None, collect_archive_events, paths)
+        if rebuild:
+            archived = await loop.run_in_executor(None, build_archived, archive_events)
+            archived_names = [name for name, _, _ in archive_events]
+        else:
+            for name, events, last_ts_ms in archive_events:
+                for event in events:
+                    archived.apply(*event)
+                archived.saw(last_ts_ms)
+                archived_names.append(name)
+    except Exception as e:
+        log.error(f"PlayerSessions: Backfill failed: {e}")
+        return
+    _rebuild_live()
+    save()
+    log.info(f"PlayerSessions: {'Rebuilt sessions from' if rebuild else 'Added sessions of'} {len(archive_events)} archived logs.")
+
+
+_backfill_task: Optional[asyncio.Task] = None
+
+
+def request_backfill():
+    """Log index callback, new sidecars may have sessions that aren't indexed yet"""
+    global _backfill_task
+    if _backfill_task is not None and not _backfill_task.done():
+        return  # Anything it misses is picked up after the next indexing run
+    _backfill_task = asyncio.ensure_future(backfill_from_archives())
+
+log_index.indexed_subscribers.append(request_backfill)
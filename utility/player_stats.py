@@ -0,0 +1,205 @@
+import os
+import datetime
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+import config.config as cfg
+from utility.logger import get_logger
+log = get_logger()
+
+from utility.ts_store import Record, TimeSeriesStore
+import utility.daily_players as daily_players
+
+# ──────────────────────────
+# Player Count History
+# ──────────────────────────
+# Player count samples (every stats.csv_interval_min) in a binary time-series store at
+# stats.player_count_store_path. An existing stats.csv is imported the first time the
+# store is opened. Old samples are compacted once a day.
+#
+# Every sample also updates two rollup stores in stats.player_count_rollups_dir, so graphs and
+# stats read one precomputed point per day (or hour) instead of grouping raw samples:
+#   daily.bin:  max players, sum of samples, sample count, unique players that day
+#   hourly.bin: max players
+# The newest record of a rollup is the still open day/hour, it is overwritten in place until
+# the next one starts. Rollups are rebuilt from the raw samples when missing.
+
+FIELDS = ["players"]
+CSV_HEADER = ["Timestamp", "PlayerCount"]
+COMPACTION_TIERS = [
+    (30 * 24 * 3600, 3600),    # Older than 30 days: one sample per hour (max)
+    (365 * 24 * 3600, 86400),  # Older than a year: one sample per day (max)
+]
+
+DAILY_FIELDS = ["max_players", "sum_players", "samples", "unique_players"]
+HOURLY_FIELDS = ["max_players"]
+
+store: Optional[TimeSeriesStore] = None
+daily_store: Optional[TimeSeriesStore] = None
+hourly_store: Optional[TimeSeriesStore] = None
+daily_max_version = 0  # Changes whenever a daily max changes, tells cached player count charts they are outdated
+
+
+@dataclass
+class DayRollup:
+    day: datetime.date
+    max_players: int
+    mean_players: float
+    unique_players: int
+
+
+def get_store() -> TimeSeriesStore:
+    global store
+    if store is None or store.path != cfg.config.stats.player_count_store_path:
+        if store is not None:
+            store.close()
+        store = TimeSeriesStore(cfg.config.stats.player_count_store_path, FIELDS)
+        if not len(store) and os.path.isfile(cfg.config.stats.csv_path):
+            imported = store.import_csv(cfg.config.stats.csv_path)
+            log.info(f"PlayerStats: Imported {imported} rows from {cfg.config.stats.csv_path} into {store.path}.")
+    return store
+
+
+def _rollup_paths():
+    directory = cfg.config.stats.player_count_rollups_dir
+    return os.path.join(directory, "daily.bin"), os.path.join(directory, "hourly.bin")
+
+
+def get_rollup_stores():
+    """Returns the (daily, hourly) rollup stores, rebuilding them from the samples if they are missing"""
+    global daily_store, hourly_store
+    daily_path, hourly_path = _rollup_paths()
+    if daily_store is None or daily_store.path != daily_path or hourly_store.path != hourly_path:
+        close_rollups()
+        daily_store = TimeSeriesStore(daily_path, DAILY_FIELDS)
+        hourly_store = TimeSeriesStore(hourly_path, HOURLY_FIELDS)
+        if (not len(daily_store) or not len(hourly_store)) and len(get_store()):
+            rebuild_rollups()
+    return daily_store, hourly_store
+
+
+def close_rollups():
+    global daily_store, hourly_store
+    for rollup in (daily_store, hourly_store):
+        if rollup is not None:
+            rollup.close()
+    daily_store = hourly_store = None
+
+
+def _day_start(ts: int) -> int:
+    return int(datetime.datetime.combine(datetime.date.fromtimestamp(ts), datetime.time()).timestamp())
+
+
+def _hour_start(ts: int) -> int:
+    return int(datetime.datetime.fromtimestamp(ts).replace(minute=0, second=0, microsecond=0).timestamp())
+
+
+def _update_rollups(ts: int, count: int):
+    global daily_max_version
+    daily, hourly = get_rollup_stores()
+    day_ts = _day_start(ts)
+    unique = len(daily_players.players_on(datetime.date.fromtimestamp(ts)))
+    last = daily.last()
+    if last is not None and last[0] == day_ts:
+        if count > last[1]:
+            daily_max_version += 1
+        daily.upsert(day_ts, max(last[1], count), last[2] + count, last[3] + 1, max(last[4], unique))
+    elif last is None or day_ts > last[0]:
+        daily_max_version += 1
+        daily.upsert(day_ts, count, count, 1, unique)
+
+    hour_ts = _hour_start(ts)
+    last = hourly.last()
+    if last is not None and last[0] == hour_ts:
+        hourly.upsert(hour_ts, max(last[1], count))
+    elif last is None or hour_ts > last[0]:
+        hourly.upsert(hour_ts, count)
+
+
+def rebuild_rollups():
+    """Recomputes the daily and hourly rollups from all stored samples"""
+    global daily_store, hourly_store, daily_max_version
+    daily_path, hourly_path = _rollup_paths()
+    days: List[list] = []
+    hours: List[list] = []
+    for ts, count in get_store().range():
+        day_ts, hour_ts = _day_start(ts), _hour_start(ts)
+        if days and days[-1][0] == day_ts:
+            day = days[-1]
+            day[1] = max(day[1], count)
+            day[2] += count
+            day[3] += 1
+        else:
+            days.append([day_ts, count, count, 1, len(daily_players.players_on(datetime.date.fromtimestamp(ts)))])
+        if hours and hours[-1][0] == hour_ts:
+            hours[-1][1] = max(hours[-1][1], count)
+        else:
+            hours.append([hour_ts, count])
+
+    close_rollups()
+    for path in (daily_path, hourly_path):
+        if os.path.exists(path):
+            os.remove(path)
+    daily_store = TimeSeriesStore(daily_path, DAILY_FIELDS)
+    hourly_store = TimeSeriesStore(hourly_path, HOURLY_FIELDS)
+    daily_store.append_many(days)
+    hourly_store.append_many(hours)
+    daily_max_version += 1
+    log.info(f"PlayerStats: Rebuilt player count rollups, {len(days)} days and {len(hours)} hours.")
+
+
+def record_player_count(count: int, now: Optional[datetime.datetime] = None):
+    """Appends a player count sample, timestamped to the minute like the old CSV, and updates the rollups"""
+    now = (now or datetime.datetime.now()).replace(second=0, microsecond=0)
+    log.debug(f"PlayerStats: Writing sample to {cfg.config.stats.player_count_store_path}: {now:%Y-%m-%d %H:%M}, {count}")
+    ts = int(now.timestamp())
+    get_store().append(ts, count)
+    _update_rollups(ts, count)
+
+
+def daily_rollups(days: int) -> List[DayRollup]:
+    """Returns the rollups of the last `days` days (today included) that have samples, oldest first"""
+    daily, _ = get_rollup_stores()
+    start = datetime.date.today() - datetime.timedelta(days=days - 1)
+    start_ts = int(datetime.datetime.combine(start, datetime.time()).timestamp())
+    return [
+        DayRollup(datetime.date.fromtimestamp(ts), max_players, sum_players / samples if samples else 0, unique)
+        for ts, max_players, sum_players, samples, unique in daily.range(start_ts=start_ts)
+    ]
+
+
+def hourly_max_since(start: datetime.datetime) -> Iterator[Record]:
+    """Yields (epoch seconds of the hour, max players) from start on, oldest first"""
+    _, hourly = get_rollup_stores()
+    return hourly.range(start_ts=int(start.timestamp()))
+
+
+def samples_since(start: datetime.datetime) -> Iterator[Record]:
+    """Yields (epoch seconds, player count) samples from start on, oldest first"""
+    return get_store().range(start_ts=int(start.timestamp()))
+
+
+def compact():
+    removed = get_store().compact(COMPACTION_TIERS)
+    if removed:
+        log.info(f"PlayerStats: Compacted {removed} old player count samples.")
+
+
+def delete_all() -> bool:
+    """
+    Deletes the player count history, including a leftover stats.csv.
+    Returns:
+        bool: True if there was anything to delete.
+    """
+    global store, daily_max_version
+    if store is not None:
+        store.close()
+        store = None
+    close_rollups()
+    daily_max_version += 1
+    deleted = False
+    for path in (cfg.config.stats.player_count_store_path, cfg.config.stats.csv_path, *_rollup_paths()):
+        if os.path.exists(path):
+            os.remove(path)
+            deleted = True
+    return deleted
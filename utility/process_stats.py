@@ -0,0 +1,195 @@
+import time
+import asyncio
+import datetime
+from dataclasses import dataclass
+from typing import List, Optional
+
+import psutil
+
+import config.config as cfg
+from utility.logger import get_logger
+log = get_logger()
+
+from utility.ts_store import TimeSeriesStore
+
+# ──────────────────────────
+# Java Process Resource History
+# ──────────────────────────
+# Samples the Minecraft server's java process every stats.process_sample_interval_sec into a
+# binary time-series store at stats.process_stats_path, so /status can show how memory, CPU,
+# threads and file descriptors develop between the scheduled restarts instead of a single
+# snapshot. The process is looked up once and looked up again only when it is gone (restart).
+# CPU is stored in tenths of a percent (of one core), I/O as the process' cumulative bytes.
+
+FIELDS = ["rss_bytes", "cpu_permille", "threads", "open_fds", "read_bytes", "write_bytes"]
+COMPACTION_TIERS = [
+    (7 * 24 * 3600, 600),      # Older than a week: one sample per 10 minutes (max)
+    (90 * 24 * 3600, 3600),    # Older than 90 days: one sample per hour (max)
+]
+SPARKLINE_CHARS = "▁▂▃▄▅▆▇█"
+
+
+@dataclass
+class ProcessSample:
+    ts: int
+    rss_bytes: int
+    cpu_percent: float
+    threads: int
+    open_fds: int
+    read_bytes: int
+    write_bytes: int
+
+
+store: Optional[TimeSeriesStore] = None
+process: Optional[psutil.Process] = None
+
+
+def get_store() -> TimeSeriesStore:
+    global store
+    if store is None or store.path != cfg.config.stats.process_stats_path:
+        if store is not None:
+            store.close()
+        store = TimeSeriesStore(cfg.config.stats.process_stats_path, FIELDS)
+    return store
+
+
+def find_server_process() -> Optional[psutil.Process]:
+    """Returns the java process running the server in minecraft.server_path, or any java process if none matches"""
+    fallback = None
+    for candidate in psutil.process_iter(["name", "cwd"]):
+        if "java" not in (candidate.info["name"] or ""):
+            continue
+        if candidate.info["cwd"] == cfg.config.minecraft.server_path:
+            return candidate
+        fallback = fallback or candidate
+    return fallback
+
+
+def get_process() -> Optional[psutil.Process]:
+    """Returns the cached server process, looking it up again if it has exited"""
+    global process
+    if process is not None and process.is_running():
+        return process
+    process = find_server_process()
+    if process is not None:
+        process.cpu_percent(None)  # The first call only sets the baseline for the next sample
+        log.info(f"ProcessStats: Sampling java process {process.pid}.")
+    return process
+
+
+def take_sample() -> Optional[ProcessSample]:
+    """Reads the server process' current resource usage, None if the server isn't running"""
+    global process
+    server = get_process()
+    if server is None:
+        return None
+    try:
+        with server.oneshot():
+            io = server.io_counters()
+            return ProcessSample(
+                int(time.time()),
+                server.memory_info().rss,
+                server.cpu_percent(None),
+                server.num_threads(),
+                server.num_fds(),
+                io.read_bytes,
+                io.write_bytes,
+            )
+    except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+        log.debug(f"ProcessStats: Could not sample java process: {e}")
+        process = None
+        return None
+
+
+def record_sample() -> Optional[ProcessSample]:
+    sample = take_sample()
+    if sample is not None:
+        get_store().append(
+            sample.ts, sample.rss_bytes, round(sample.cpu_percent * 10), sample.threads,
+            sample.open_fds, sample.read_bytes, sample.write_bytes
+        )
+    return sample
+
+
+async def sample_async() -> Optional[ProcessSample]:
+    """record_sample() in a thread, looking up the process scans /proc"""
+    return await asyncio.get_running_loop().run_in_executor(None, record_sample)
+
+
+def samples_since(start_ts: int) -> List[ProcessSample]:
+    return [
+        ProcessSample(ts, rss, cpu_permille / 10, threads, fds, read, write)
+        for ts, rss, cpu_permille, threads, fds, read, write in get_store().range(start_ts=start_ts)
+    ]
+
+
+def server_started_at() -> Optional[datetime.datetime]:
+    """
+    Returns when the current server process started, None if it isn't running.
+    Only uses the process found by the sampler: looking it up scans /proc, too slow for the event loop.
+    """
+    server = process
+    try:
+        if server is None or not server.is_running():
+            return None
+        return datetime.datetime.fromtimestamp(server.create_time())
+    except psutil.NoSuchProcess:
+        return None
+
+
+def compact():
+    removed = get_store().compact(COMPACTION_TIERS)
+    if removed:
+        log.info(f"ProcessStats: Compacted {removed} old java process samples.")
+
+
+# ──────────────────────────
+# Trends
+# ──────────────────────────
+def sparkline(values: List[float], width: int = 24) -> str:
+    """Draws values as a line of block characters, each character is the max of its share of the values"""
+    if not values:
+        return ""
+    chunk = max(1, -(-len(values) // width))  # Ceiling division
+    points = [max(values[i:i + chunk]) for i in range(0, len(values), chunk)]
+    low, high = min(points), max(points)
+    if high == low:
+        return SPARKLINE_CHARS[0] * len(points)
+    scale = (len(SPARKLINE_CHARS) - 1) / (high - low)
+    return "".join(SPARKLINE_CHARS[round((point - low) * scale)] for point in points)
+
+
+def format_bytes(value: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(value) < 1024 or unit == "GB":
+            return f"{value:.1f} {unit}" if unit != "B" else f"{value:.0f} B"
+        value /= 1024
+
+
+def trend_text(width: int = 24) -> str:
+    """
+    Summarizes the samples since the server process started (at most the last 24 hours):
+    current value, change since the start and a sparkline per resource.
+    """
+    started_at = server_started_at()
+    start_ts = int(time.time()) - 24 * 3600
+    if started_at is not None:
+        start_ts = max(start_ts, int(started_at.timestamp()))
+    samples = samples_since(start_ts)
+    if not samples:
+        return "No samples yet"
+
+    first, last = samples[0], samples[-1]
+    hours = max((last.ts - first.ts) / 3600, 1 / 60)
+    rss_growth = last.rss_bytes - first.rss_bytes
+    io_seconds = max(last.ts - first.ts, 1)
+    lines = [
+        f"RSS     {format_bytes(last.rss_bytes):>9} {sparkline([s.rss_bytes for s in samples], width)} "
+        f"{'+' if rss_growth >= 0 else '-'}{format_bytes(abs(rss_growth))} ({format_bytes(rss_growth / hours)}/h)",
+        f"CPU     {last.cpu_percent:>7.0f} % {sparkline([s.cpu_percent for s in samples], width)}",
+        f"Threads {last.threads:>9} {sparkline([s.threads for s in samples], width)}",
+        f"FDs     {last.open_fds:>9} {sparkline([s.open_fds for s in samples], width)}",
+        f"I/O     {format_bytes(max(0, last.read_bytes - first.read_bytes) / io_seconds)}/s read, "
+        f"{format_bytes(max(0, last.write_bytes - first.write_bytes) / io_seconds)}/s write",
+    ]
+    return "\n".join(lines)
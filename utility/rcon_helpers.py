@@ -1,77 +1,261 @@
 import os
 import re
-from mcrcon import MCRcon
+import time
+import asyncio
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
 
 import config.config as cfg
 from utility.logger import get_logger
 log = get_logger()
 
-mcr_connection = None
+import utility.log_events as log_events
+from utility.async_rcon import AsyncRcon
+
+mcr_connection = None  # AsyncRcon while connected, `await mcr_connection.command(...)`
 
 
 # ──────────────────────────
-# RCON Utilities
+# RCON Connection Breaker
 # ──────────────────────────
+# Every caller goes through ensure_rcon_connection, so while the server is down it decides
+# whether a connect is worth trying at all:
+#   closed     connected, or not connected yet but nothing has failed
+#   open       the last connect failed, callers return at once until the backoff has passed
+#              (backoff_min_sec, doubled per failure up to backoff_max_sec)
+#   half-open  the backoff passed, one caller tries to connect, the others return at once
+# While systemd reports the service stopped no connect is tried either; if the service check
+# itself fails the state is unknown and only the backoff applies. The service state comes from
+# ops_helpers (is_service_running/async_service_control), and "Dedicated server took ..."
+# in the log ends the backoff, since that is when RCON starts listening.
+# server.properties is only parsed again when its mtime changes, a change also ends the backoff
+# so a fixed password is tried right away.
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+breaker_state = CLOSED
+_failures = 0
+_retry_at = 0.0                          # time.monotonic() when the next connect may be tried
+_service_running: Optional[bool] = None  # None until the service state is known
+_rcon_properties = None                  # (mtime_ns, port, password) of server.properties
+
+
+def _read_rcon_properties(server_properties_path: str):
+    """Returns (port, password) from server.properties, parsed again only if the file changed since the last call"""
+    global _rcon_properties, breaker_state, _retry_at
+    mtime_ns = os.stat(server_properties_path).st_mtime_ns
+    if _rcon_properties is not None and _rcon_properties[0] == mtime_ns:
+        return _rcon_properties[1:]
+
+    # Default RCON port and password
+    rcon_port = 25575  # Default RCON port
+    rcon_password = None
+    with open(server_properties_path, "r") as file:
+        for line in file:
+            if line.startswith("rcon.port="):
+                rcon_port = int(line.split("=")[-1].strip())
+            elif line.startswith("rcon.password="):
+                rcon_password = line.split("=")[-1].strip()
+
+    if _rcon_properties is not None and breaker_state == OPEN:
+        log.info("RCON: server.properties changed, retrying now.")
+        _retry_at = 0.0
+    _rcon_properties = (mtime_ns, rcon_port, rcon_password)
+    return rcon_port, rcon_password
+
+
+def _connect_failed(message: str):
+    global breaker_state, _failures, _retry_at
+    _failures += 1
+    backoff = min(cfg.config.minecraft.rcon.backoff_min_sec * 2 ** (_failures - 1), cfg.config.minecraft.rcon.backoff_max_sec)
+    breaker_state = OPEN
+    _retry_at = time.monotonic() + backoff
+    # Only the first failure is an error, the retries of a server that stays down are expected
+    if _failures == 1:
+        log.error(f"{message} Retrying in {backoff:g}s.")
+    else:
+        log.debug(f"{message} Failed {_failures} times, retrying in {backoff:g}s.")
+
+
+def retry_now():
+    """Ends the backoff, the next caller tries to connect"""
+    global _retry_at
+    _retry_at = 0.0
+
+
+def set_service_running(running: Optional[bool]):
+    """
+    Called with the systemd service state whenever it is checked or changed.
+    None when the check itself failed: connects are tried again, paced by the backoff alone.
+    """
+    global _service_running, _failures
+    if running and _service_running is False:
+        # The server is booting, start the backoff over
+        _failures = 0
+        retry_now()
+    _service_running = running
+
+
+def breaker_text() -> str:
+    """One line for /status, e.g. 'connected' or 'open, 3 failures, retry in 8s'"""
+    if mcr_connection is not None and mcr_connection.connected:
+        return "connected"
+    if _service_running is False:
+        return "server stopped"
+    if breaker_state == CLOSED:
+        return "not connected"
+    return f"{breaker_state}, {_failures} failures, retry in {max(_retry_at - time.monotonic(), 0):.0f}s"
+
+
+_connect_lock = asyncio.Lock()
+
 
 async def ensure_rcon_connection():
-    """Ensure we have a persistent RCON connection."""
-    global mcr_connection
+    """
+    Ensure we have a persistent RCON connection.
+    Returns right away, leaving mcr_connection None, while the server is stopped or the breaker is open.
+    """
+    global mcr_connection, breaker_state, _failures
 
     # Check if already connected
     if mcr_connection is not None:
+        if mcr_connection.connected:
+            return
+        mcr_connection = None  # The server closed the connection
+
+    # Fail fast while the server is known to be down
+    if _service_running is False or _connect_lock.locked() or time.monotonic() < _retry_at:
         return
 
-    # Default RCON port and password
-    rcon_port = 25575  # Default RCON port
-    rcon_password = None
+    async with _connect_lock:
+        if breaker_state == OPEN:
+            breaker_state = HALF_OPEN
 
-    # Path to server.properties
-    server_properties_path = os.path.join(cfg.config.minecraft.server_path, "server.properties")
+        # Path to server.properties
+        server_properties_path = os.path.join(cfg.config.minecraft.server_path, "server.properties")
 
-    try:
-        # Parse RCON port and password from server.properties
-        with open(server_properties_path, "r") as file:
-            for line in file:
-                if line.startswith("rcon.port="):
-                    rcon_port = int(line.split("=")[-1].strip())
-                elif line.startswith("rcon.password="):
-                    rcon_password = line.split("=")[-1].strip()
-
-        if not rcon_password:
-            raise ValueError("RCON password not found in server.properties.")
-
-        # Establish the RCON connection
-        conn = MCRcon("localhost", rcon_password, port=rcon_port)
-        conn.connect()
-        mcr_connection = conn
-        log.info("RCON: Connected successfully.")
-    except FileNotFoundError:
-        log.error(f"RCON: server.properties not found at {server_properties_path}.")
-        mcr_connection = None
-    except Exception as e:
-        log.error(f"RCON: Failed to connect: {e}")
-        mcr_connection = None
+        try:
+            # Parse RCON port and password from server.properties
+            rcon_port, rcon_password = _read_rcon_properties(server_properties_path)
+
+            if not rcon_password:
+                raise ValueError("RCON password not found in server.properties.")
+
+            # Establish the RCON connection
+            conn = AsyncRcon(cfg.config.minecraft.rcon.host, rcon_port, rcon_password, timeout=cfg.config.minecraft.rcon.timeout_sec)
+            await conn.connect()
+            mcr_connection = conn
+            log.info("RCON: Connected successfully." if _failures == 0 else f"RCON: Connected successfully after {_failures} failed attempts.")
+            breaker_state = CLOSED
+            _failures = 0
+        except FileNotFoundError:
+            _connect_failed(f"RCON: server.properties not found at {server_properties_path}.")
+        except Exception as e:
+            _connect_failed(f"RCON: Failed to connect: {e!r}")
+
+
+def on_server_started(event: log_events.ServerStartedEvent):
+    retry_now()
+
+log_events.subscribe(log_events.ServerStartedEvent, on_server_started)
 
 async def close_rcon_connection():
     """Close the RCON connection if open."""
     global mcr_connection
     if mcr_connection:
         try:
-            mcr_connection.disconnect()
+            await mcr_connection.close()
         except Exception as e:
             log.error(f"RCON: Error while disconnecting: {e}")
         mcr_connection = None
 
 
-async def get_players():
+@dataclass
+class BatchResult:
+    responses: List[Optional[str]]  # Per command in order, None if it failed, got no response or was not sent
+    sent: int                       # Commands sent, the ones after these were not run
+
+    @property
+    def not_run(self) -> int:
+        return len(self.responses) - self.sent
+
+
+async def run_batch(commands: Sequence[str], deadline_sec: Optional[float] = None) -> BatchResult:
+    """
+    Runs commands one after another over the one RCON connection, checking the connection once for the whole batch.
+    They are not pipelined (the vanilla server drops clients that send a packet before the previous one is answered),
+    so a batch takes one round trip per command; what it adds is a deadline for the whole batch.
+    Args:
+        commands: Commands to run, in order.
+        deadline_sec: Time for the whole batch. No command is sent after it, the one in flight gets at most what is left.
+    Returns:
+        BatchResult: The responses and how many commands were sent. Once a command fails or times out
+            (which closes the connection) or the deadline passes, the rest are not run.
+    Raises:
+        ConnectionError: If there is no RCON connection.
+    """
+    await ensure_rcon_connection()
+    connection = mcr_connection
+    if connection is None:
+        raise ConnectionError("Could not connect to RCON.")
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + deadline_sec if deadline_sec is not None else None
+    result = BatchResult([None] * len(commands), 0)
+    for i, command in enumerate(commands):
+        timeout = None
+        if deadline is not None:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                log.warning(f"RCON: Batch deadline of {deadline_sec:g}s passed, {len(commands) - i} of {len(commands)} commands not run.")
+                break
+            timeout = min(timeout, connection.timeout)
+        result.sent += 1
+        try:
+            result.responses[i] = await connection.command(command, timeout=timeout)
+        except asyncio.TimeoutError:
+            log.warning(f"RCON: Batch command {command!r} got no response in time, {len(commands) - i - 1} commands not run.")
+            break
+        except Exception as e:
+            log.error(f"RCON: Batch command error: {e!r}")
+            break
+    if not connection.connected:
+        await close_rcon_connection()
+    return result
+
+
+# ──────────────────────────
+# Online Player Snapshot
+# ──────────────────────────
+# The presence task, join notifications, /rcon players and the restore flow all ask for the online
+# players. They share one snapshot: a caller gets the last result while it is younger than its
+# max_age_sec (default minecraft.rcon.player_list_ttl_sec), and callers arriving while a `list` is in
+# flight wait for that same request instead of sending their own.
+
+@dataclass
+class PlayerSnapshot:
+    players: Optional[List[str]]  # None if RCON was unavailable
+    taken_at: float               # Epoch seconds when the response arrived
+
+    @property
+    def age_sec(self) -> float:
+        return time.time() - self.taken_at
+
+
+player_snapshot: Optional[PlayerSnapshot] = None
+_player_list_request: Optional[asyncio.Future] = None
+
+
+async def _request_players() -> Optional[List[str]]:
     """Get the list of current online players from 'list' command."""
-    global mcr_connection
     await ensure_rcon_connection()
     
     if mcr_connection is None:
         return None  # Return None if connection is unavailable
     try:
-        response = mcr_connection.command("list")
+        response = await mcr_connection.command("list")
         match = re.search(r"There are \d+ of a max of \d+ players online: (.+)", response)
         
         if match:
@@ -80,7 +264,36 @@ async def get_players():
         return []  # No players online
 
     except Exception as e:
-        log.error(f"RCON: Command error: {e}")
+        log.error(f"RCON: Command error: {e!r}")
         await close_rcon_connection()
         return None
 
+
+async def _refresh_player_snapshot() -> PlayerSnapshot:
+    global player_snapshot, _player_list_request
+    try:
+        player_snapshot = PlayerSnapshot(await _request_players(), time.time())
+        return player_snapshot
+    finally:
+        _player_list_request = None
+
+
+async def get_player_snapshot(max_age_sec: Optional[float] = None) -> PlayerSnapshot:
+    """
+    Returns the online players with the time they were read, reusing a snapshot younger than max_age_sec
+    (default minecraft.rcon.player_list_ttl_sec) or a `list` request that is already in flight.
+    """
+    global _player_list_request
+    if max_age_sec is None:
+        max_age_sec = cfg.config.minecraft.rcon.player_list_ttl_sec
+    if player_snapshot is not None and player_snapshot.age_sec <= max_age_sec:
+        return player_snapshot
+    if _player_list_request is None:
+        _player_list_request = asyncio.ensure_future(_refresh_player_snapshot())
+    # Shielded, so a caller that gets cancelled doesn't cancel the request the others are waiting for
+    return await asyncio.shield(_player_list_request)
+
+
+async def get_players(max_age_sec: Optional[float] = None) -> Optional[List[str]]:
+    """Returns the online players (None if RCON is unavailable), at most max_age_sec old, see get_player_snapshot"""
+    return (await get_player_snapshot(max_age_sec)).players
@@ -0,0 +1,44 @@
+from typing import Awaitable, Callable, Dict, Hashable, Tuple
+
+from utility.logger import get_logger
+log = get_logger()
+
+# ──────────────────────────
+# Chart Render Cache
+# ──────────────────────────
+# Keeps the PNG bytes of the last render of every (chart kind, window). A chart is only
+# rendered again when its version changes, i.e. new data arrived or the current bucket
+# (day, minute, ...) moved on. Otherwise the cached bytes are sent without touching matplotlib.
+
+hits = 0
+misses = 0
+_entries: Dict[Tuple[str, str], Tuple[Hashable, bytes]] = {}  # (kind, window) -> (version, png)
+
+
+async def get_or_render(kind: str, window: str, version: Hashable, render: Callable[[], Awaitable[bytes]]) -> bytes:
+    """
+    Returns the cached PNG of kind/window if it was rendered at this version, otherwise awaits render() and caches its result.
+    Args:
+        kind: Chart kind, e.g. "players" or "lag".
+        window: Time window shown by the chart, e.g. "30" (days) or "3h".
+        version: Anything hashable that changes when the chart would look different.
+        render: Renders the chart, returns an awaitable of the PNG bytes.
+    """
+    global hits, misses
+    cached = _entries.get((kind, window))
+    if cached is not None and cached[0] == version:
+        hits += 1
+        log.debug(f"RenderCache: Hit for {kind} chart ({window}).")
+        return cached[1]
+    misses += 1
+    png = await render()
+    _entries[(kind, window)] = (version, png)
+    return png
+
+
+def clear():
+    _entries.clear()
+
+
+def stats_text() -> str:
+    return f"{hits} hits, {misses} misses"
@@ -0,0 +1,265 @@
+import os
+import csv
+import mmap
+import struct
+import datetime
+import threading
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from utility.logger import get_logger
+log = get_logger()
+
+# ──────────────────────────
+# Binary Time-Series Store
+# ──────────────────────────
+# Append-only file of fixed-width little-endian records: int64 epoch seconds followed by
+# one int64 per field. Records are appended in time order, so reads memory-map the file and
+# binary search on the timestamp instead of parsing every row like a CSV.
+#   header: magic "MBTS", format version, field count, 0
+#   record: ts, value_1, ..., value_n
+# compact() downsamples old records into coarser buckets (max per field), e.g. 5 minute samples
+# older than 30 days into one record per hour, so the file stops growing linearly.
+# It can run in a thread while the event loop keeps reading and appending: it reads through its own
+# map, and a per-file lock, also taken by the writes, covers the copy of the newest records and the
+# swap to the compacted file. Readers see the new file by its inode and remap.
+
+FILE_MAGIC = b"MBTS"
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct("<4sIII")  # magic, version, field count, reserved
+
+Record = Tuple[int, ...]  # (epoch seconds, value_1, ..., value_n)
+
+_write_locks: Dict[str, threading.Lock] = {}  # Absolute path -> lock shared by every store of that file
+_write_locks_guard = threading.Lock()
+
+
+def _write_lock(path: str) -> threading.Lock:
+    with _write_locks_guard:
+        return _write_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+class TimeSeriesStore:
+    def __init__(self, path: str, fields: Sequence[str]):
+        self.path = path
+        self.fields = list(fields)
+        self.record = struct.Struct("<q" + "q" * len(self.fields))
+        self._file = None
+        self._map = None
+        self._mapped_size = 0
+        self._mapped_inode = None
+        self._lock = _write_lock(path)
+        self._check_header()
+
+    def _check_header(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            header = f.read(FILE_HEADER.size)
+        if len(header) < FILE_HEADER.size:
+            raise ValueError(f"{self.path} is not a time-series store")
+        magic, version, field_count, _ = FILE_HEADER.unpack(header)
+        if magic != FILE_MAGIC or version != FILE_VERSION or field_count != len(self.fields):
+            raise ValueError(f"{self.path} has an unknown format or {field_count} fields instead of {len(self.fields)}")
+
+    # ─── Writing ───
+
+    def append(self, ts: int, *values: int):
+        """Appends a record. Records must be appended in time order, older ones are rejected."""
+        last = self.last()
+        if last is not None and ts < last[0]:
+            raise ValueError(f"Record at {ts} is older than the last record at {last[0]}")
+        self.append_many([(ts,) + tuple(values)])
+
+    def upsert(self, ts: int, *values: int):
+        """
+        Appends a record, or overwrites the last record if it has the same timestamp.
+        Lets rollups keep their newest (still open) bucket up to date without rewriting the file.
+        """
+        last = self.last()
+        if last is None or ts > last[0]:
+            self.append_many([(ts,) + tuple(values)])
+            return
+        if ts < last[0]:
+            raise ValueError(f"Record at {ts} is older than the last record at {last[0]}")
+        with self._lock, open(self.path, "r+b") as f:
+            f.seek(FILE_HEADER.size + (len(self) - 1) * self.record.size)
+            f.write(self.record.pack(ts, *values))
+        self.close()  # The size didn't change, remap so reads see the new values
+
+    def append_many(self, records: Sequence[Record]):
+        """Appends records, which have to be sorted and not older than the last stored record"""
+        if not records:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        data = b"".join(self.record.pack(*record) for record in records)
+        with self._lock:
+            new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, "ab") as f:
+                if new_file:
+                    f.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, len(self.fields), 0))
+                f.write(data)
+
+    # ─── Reading ───
+
+    def _mapped(self) -> Optional[mmap.mmap]:
+        """Returns a read-only map of the file, remapped when it has grown or was replaced by compact()"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self.close()
+            return None
+        if self._map is not None and stat.st_size == self._mapped_size and stat.st_ino == self._mapped_inode:
+            return self._map
+        self.close()
+        if stat.st_size <= FILE_HEADER.size:
+            return None
+        self._file = open(self.path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mapped_size = len(self._map)
+        self._mapped_inode = os.fstat(self._file.fileno()).st_ino
+        return self._map
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+        self._map = None
+        self._file = None
+        self._mapped_size = 0
+        self._mapped_inode = None
+
+    def __len__(self) -> int:
+        data = self._mapped()
+        return (len(data) - FILE_HEADER.size) // self.record.size if data is not None else 0
+
+    def _ts_at(self, data: mmap.mmap, index: int) -> int:
+        return struct.unpack_from("<q", data, FILE_HEADER.size + index * self.record.size)[0]
+
+    def bisect(self, ts: int) -> int:
+        """Returns the index of the first record at or after ts"""
+        data = self._mapped()
+        if data is None:
+            return 0
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self._ts_at(data, middle) < ts:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def range(self, start_ts: Optional[int] = None, end_ts: Optional[int] = None) -> Iterator[Record]:
+        """Yields the records with start_ts <= ts < end_ts, oldest first"""
+        data = self._mapped()
+        if data is None:
+            return
+        index = self.bisect(start_ts) if start_ts is not None else 0
+        count = len(self)
+        for offset in range(FILE_HEADER.size + index * self.record.size, FILE_HEADER.size + count * self.record.size, self.record.size):
+            record = self.record.unpack_from(data, offset)
+            if end_ts is not None and record[0] >= end_ts:
+                return
+            yield record
+
+    def last(self) -> Optional[Record]:
+        count = len(self)
+        if not count:
+            return None
+        return self.record.unpack_from(self._mapped(), FILE_HEADER.size + (count - 1) * self.record.size)
+
+    # ─── Maintenance ───
+
+    def compact(self, tiers: Sequence[Tuple[int, int]], now: Optional[int] = None) -> int:
+        """
+        Downsamples old records, keeping the max of each field per bucket. Safe to run in a thread, see the top of the file.
+        Args:
+            tiers: (age_sec, bucket_sec) pairs, records older than age_sec are merged into buckets of bucket_sec.
+            now: Current epoch seconds, defaults to the current time.
+        Returns:
+            int: Number of records removed.
+        """
+        now = int(now if now is not None else datetime.datetime.now().timestamp())
+        cutoffs = sorted(((now - age_sec, bucket_sec) for age_sec, bucket_sec in tiers), reverse=True)  # Youngest cutoff first
+        if not cutoffs:
+            return 0
+
+        # A store of its own, so the map other threads read through is never closed under them
+        snapshot = TimeSeriesStore(self.path, self.fields)
+        try:
+            compacted: List[list] = []
+            for record in snapshot.range(end_ts=cutoffs[0][0]):
+                ts = record[0]
+                bucket_sec = max(bucket for cutoff, bucket in cutoffs if ts < cutoff)
+                bucket_ts = ts - ts % bucket_sec
+                if compacted and compacted[-1][0] == bucket_ts:
+                    last = compacted[-1]
+                    for i in range(1, len(record)):
+                        last[i] = max(last[i], record[i])
+                else:
+                    compacted.append([bucket_ts] + list(record[1:]))
+            old_records = snapshot.bisect(cutoffs[0][0])
+            if len(compacted) == old_records:
+                return 0  # Already compacted
+            compacted_data = b"".join(self.record.pack(*record) for record in compacted)
+
+            temp_path = self.path + ".tmp"
+            with self._lock:
+                # Newer records, including any appended while the old ones were compacted
+                recent = list(snapshot.range(start_ts=cutoffs[0][0]))
+                with open(temp_path, "wb") as f:
+                    f.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, len(self.fields), 0))
+                    f.write(compacted_data)
+                    f.write(b"".join(self.record.pack(*record) for record in recent))
+                snapshot.close()
+                os.replace(temp_path, self.path)
+        finally:
+            snapshot.close()
+        removed = old_records - len(compacted)
+        log.debug(f"TimeSeriesStore: Compacted {self.path}, removed {removed} records.")
+        return removed
+
+    # ─── CSV ───
+
+    def import_csv(self, csv_path: str, timestamp_format: str = "%Y-%m-%d %H:%M") -> int:
+        """
+        Appends the rows of a CSV (timestamp, value_1, ..., value_n) with a header row,
+        skipping malformed rows and rows older than the last stored record.
+        Returns:
+            int: Number of records imported.
+        """
+        last = self.last()
+        records = []
+        with open(csv_path, "r", newline="", encoding="utf-8") as csvfile:
+            reader = csv.reader(csvfile)
+            next(reader, None)  # Header
+            for row in reader:
+                if len(row) < 1 + len(self.fields):
+                    continue
+                try:
+                    ts = int(datetime.datetime.strptime(row[0], timestamp_format).timestamp())
+                    values = tuple(int(value) for value in row[1:1 + len(self.fields)])
+                except ValueError:
+                    continue
+                records.append((ts,) + values)
+        records.sort(key=lambda record: record[0])
+        if last is not None:
+            records = [record for record in records if record[0] >= last[0]]
+        self.append_many(records)
+        return len(records)
+
+    def export_csv(self, csv_path: str, header: Sequence[str], timestamp_format: str = "%Y-%m-%d %H:%M") -> int:
+        """
+        Writes all records to a CSV with the given header row.
+        Returns:
+            int: Number of rows written.
+        """
+        rows = 0
+        with open(csv_path, "w", newline="", encoding="utf-8") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(header)
+            for record in self.range():
+                writer.writerow([datetime.datetime.fromtimestamp(record[0]).strftime(timestamp_format)] + list(record[1:]))
+                rows += 1
+        return rows